@@ -1,6 +1,11 @@
+import gc
+import click
 from flask import Flask
+from flask.cli import ScriptInfo
 from config import Config
-from extensions import db, jwt, migrate, ma, cors
+from extensions import db, jwt, cors
+from utils.database import prepare_engine_options, init_database
+from utils.token_cache import init_token_cache
 
 # Blueprints seront importés plus tard
 
@@ -9,11 +14,22 @@ def create_app():
     app.config.from_object(Config)
 
     # Initialisation des extensions
+    prepare_engine_options(app)
+    # IP du client (limitation des connexions) derrière un reverse proxy
+    if app.config.get('PROXY_FIX_X_FOR'):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'],
+                                x_proto=app.config['PROXY_FIX_X_FOR'])
     db.init_app(app)
+    init_database(app, db)
     jwt.init_app(app)
-    migrate.init_app(app, db)
-    ma.init_app(app)
-    cors.init_app(app, origins=app.config['CORS_ORIGINS'])
+    init_token_cache(app)
+    # Flask-Migrate (et alembic) seulement pour la CLI `flask` ; marshmallow au premier
+    # schéma utilisé (extensions.py)
+    if _cli_flask():
+        from extensions import migrate
+        migrate.init_app(app, db)
+    cors.init_app(app, origins=app.config['CORS_ORIGINS'], expose_headers=['X-Next-Cursor', 'ETag'])
 
     # Import et enregistrement des blueprints (routes)
     from routes.auth import auth_bp
@@ -21,10 +37,69 @@ def create_app():
     from routes.users import users_bp
     from routes.stats import stats_bp
     from routes.import_export import import_export_bp
+    from routes.monitoring import monitoring_bp
+    from routes.jobs import jobs_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(tickets_bp)
     app.register_blueprint(users_bp)
     app.register_blueprint(stats_bp)
     app.register_blueprint(import_export_bp, url_prefix='/import_export')
-    return app 
\ No newline at end of file
+    app.register_blueprint(monitoring_bp)
+    app.register_blueprint(jobs_bp)
+
+    # Compteurs de modifications et cache des réponses (ETag)
+    from utils.change_tracking import init_change_tracking
+    from utils.response_cache import init_response_cache
+    init_change_tracking(app)
+    init_response_cache(app)
+
+    # Compression des réponses (Accept-Encoding)
+    from utils.compression import init_compression
+    init_compression(app)
+
+    # Workers des tâches de fond
+    from utils.jobs import init_jobs
+    init_jobs(app)
+
+    # Métriques et profilage (optionnels)
+    from utils.instrumentation import init_instrumentation
+    init_instrumentation(app, db)
+
+    # Table d'agrégats ticket_stats_daily (optionnelle)
+    from utils.stats_rollup import init_stats_rollup
+    init_stats_rollup(app)
+
+    # Charge des techniciens pour l'affectation automatique
+    from utils.workload import init_workload
+    init_workload(app)
+
+    # Archivage des tickets résolus
+    from utils.archive import init_archive
+    init_archive(app)
+    return app
+
+def _cli_flask():
+    contexte = click.get_current_context(silent=True)
+    return contexte is not None and contexte.find_object(ScriptInfo) is not None
+
+def preload(app):
+    """Préchargement dans le processus maître avant le fork des workers (gunicorn --preload,
+    APP_PRELOAD=true) : importe les dépendances chargées à la demande et remplit le cache
+    des références pour que les workers les partagent en copy-on-write, ferme les
+    connexions ouvertes (jamais partagées entre processus) puis gèle le ramasse-miettes,
+    dont les passages toucheraient sinon toutes les pages héritées."""
+    import pandas  # noqa: F401 (import CSV)
+    import schemas.ticket_schema  # noqa: F401
+    from models.categorie import Categorie
+    from models.statut import Statut
+    from models.type import Type
+    from utils.reference_cache import reference_cache
+    with app.app_context():
+        for model in (Statut, Categorie, Type):
+            reference_cache.all(model)
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    gc.collect()
+    gc.freeze() 
\ No newline at end of file
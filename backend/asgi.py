@@ -0,0 +1,232 @@
+"""Point d'entrée ASGI.
+
+    pip install starlette a2wsgi uvicorn python-multipart "sqlalchemy[asyncio]" aiosqlite   # asyncmy pour MySQL
+    uvicorn asgi:app --workers 4
+
+Les vues longues en entrée/sortie sont servies par des gestionnaires asynchrones sur un
+moteur SQLAlchemy asynchrone, sans occuper un thread par client :
+  - GET  /import_export/export  (export en flux)
+  - POST /import_export/import  (réception du fichier ; le traitement reste une tâche de fond)
+  - GET  /stats
+  - GET  /tickets/stream        (flux SSE)
+Toutes les autres routes sont servies par l'application Flask, montée via a2wsgi.
+L'authentification reprend role_required (mêmes contrôles et mêmes réponses d'erreur).
+"""
+import asyncio
+import os
+import shutil
+import uuid
+from contextlib import asynccontextmanager
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from flask_jwt_extended import get_jwt
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_etags
+from app import create_app
+from utils.database import create_async_engine_for
+from utils.decorators import role_required
+from utils.change_tracking import current_versions_async
+from utils.compression import EXCLUS, choose_encoding, compress_stream_async, compress_response, \
+    negotiated_encoding
+from utils.events import get_hub, event_filter, format_sse, DECONNECTE
+from utils.jobs import submit_job
+from utils.reference_cache import reference_cache
+from utils.representation import negotiated_mimetype
+from utils.response_cache import cache_key, _EN_TETES
+from utils.ticket_export import FORMATS, export_statement, export_tickets_async, noms_references, \
+    parquet_disponible
+from utils.ticket_import import import_tickets  # noqa: F401 (tâche 'import')
+from models.statut import Statut
+from routes.stats import agregats_select, repartition_technicien_select, stats_payload
+
+def _starlette_response(response):
+    return Response(response.get_data(), status_code=response.status_code,
+                    headers=dict(response.headers), media_type=response.mimetype)
+
+def _contexte(flask_app, request):
+    """Contexte de requête Flask construit à partir de la requête ASGI."""
+    return flask_app.test_request_context(request.url.path, method=request.method,
+                                          query_string=request.url.query,
+                                          headers=list(request.headers.items()))
+
+def authenticate(flask_app, request, roles, locations=None):
+    """Exécute role_required dans un contexte de requête Flask construit à partir de la
+    requête ASGI. Renvoie (claims, None) ou (None, réponse d'erreur)."""
+    @role_required(roles, locations)
+    def vue():
+        return dict(get_jwt())
+
+    with _contexte(flask_app, request):
+        try:
+            return vue(), None
+        except Exception as exc:
+            return None, _starlette_response(flask_app.make_response(flask_app.handle_user_exception(exc)))
+
+def _args(request):
+    return MultiDict(request.query_params.multi_items())
+
+def _prechauffer(flask_app, *models):
+    """Charge les tables de référence (requête synchrone) hors de la boucle d'événements."""
+    with flask_app.app_context():
+        for model in models:
+            reference_cache.all(model)
+
+async def export(request):
+    flask_app = request.app.state.flask
+    claims, erreur = authenticate(flask_app, request, ['admin', 'user', 'technicien'])
+    if erreur:
+        return erreur
+    format = request.query_params.get('format', 'csv')
+    if format not in FORMATS:
+        return JSONResponse({'msg': f'Format invalide : {format}'}, 400)
+    if format == 'parquet' and not parquet_disponible():
+        return JSONResponse({'msg': "L'export Parquet nécessite pyarrow"}, 501)
+    try:
+        stmt = export_statement(claims, _args(request))
+    except ValueError as exc:
+        return JSONResponse({'msg': str(exc)}, 400)
+
+    def references():
+        with flask_app.app_context():
+            return noms_references()
+    noms = await run_in_threadpool(references)
+    engine = request.app.state.engine
+
+    async def flux():
+        async with engine.connect() as connection:
+            async for chunk in export_tickets_async(connection, stmt, format, noms):
+                yield chunk
+
+    mimetype, nom_fichier = FORMATS[format]
+    en_tetes = {'Content-Disposition': f'attachment; filename={nom_fichier}'}
+    corps = flux()
+    if flask_app.config.get('COMPRESSION_ENABLED') and mimetype not in EXCLUS:
+        en_tetes['Vary'] = 'Accept-Encoding'
+        encodage = choose_encoding(request.headers.get('accept-encoding', ''))
+        if encodage is not None:
+            corps = compress_stream_async(corps, encodage)
+            en_tetes['Content-Encoding'] = encodage
+    return StreamingResponse(corps, media_type=mimetype, headers=en_tetes)
+
+async def import_csv(request):
+    flask_app = request.app.state.flask
+    claims, erreur = authenticate(flask_app, request, ['admin'])
+    if erreur:
+        return erreur
+    async with request.form() as form:
+        fichier = form.get('file')
+        if fichier is None or isinstance(fichier, str):
+            return JSONResponse({'msg': 'Aucun fichier fourni'}, 400)
+        dossier = flask_app.config['UPLOAD_FOLDER']
+        chemin = os.path.join(dossier, f'import_{uuid.uuid4().hex}.csv')
+
+        def enregistrer():
+            os.makedirs(dossier, exist_ok=True)
+            with open(chemin, 'wb') as sortie:
+                shutil.copyfileobj(fichier.file, sortie)
+        await run_in_threadpool(enregistrer)
+
+    def soumettre():
+        with flask_app.app_context():
+            return submit_job('import', {'chemin': chemin}, user_id=claims.get('user_id')).id
+    job_id = await run_in_threadpool(soumettre)
+    return JSONResponse({'msg': 'Import lancé', 'job_id': job_id}, 202,
+                        headers={'Location': f'/jobs/{job_id}'})
+
+async def stats(request):
+    flask_app = request.app.state.flask
+    claims, erreur = authenticate(flask_app, request, ['admin', 'technicien', 'user'])
+    if erreur:
+        return erreur
+    # même entrée de cache et même compression que la route Flask (cached_response)
+    with _contexte(flask_app, request):
+        encodage = negotiated_encoding()
+        variante = (negotiated_mimetype(), encodage)
+    cache = flask_app.extensions.get('response_cache')
+    async with request.app.state.engine.connect() as connection:
+        if cache is not None:
+            versions = await current_versions_async(connection, 'tickets', 'users', 'references')
+            cle = cache_key(request.url.path, request.query_params.multi_items(), claims, versions, variante)
+            etag = cle[:32]
+            en_tetes = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+            if parse_etags(request.headers.get('if-none-match')).contains(etag):
+                return Response(status_code=304, headers=en_tetes)
+            entree = cache.get(cle)
+            if entree is not None:
+                return Response(entree['corps'], headers={**entree['en_tetes'], **en_tetes})
+        with flask_app.app_context():
+            stmt_agregats = agregats_select(claims)
+            stmt_techniciens = repartition_technicien_select(claims)
+        agregats = (await connection.execute(stmt_agregats)).all()
+        techniciens = (await connection.execute(stmt_techniciens)).all()
+    await run_in_threadpool(_prechauffer, flask_app, Statut)
+    with flask_app.app_context():
+        response = flask_app.json.response(stats_payload(agregats, techniciens))
+        compress_response(response, encodage)
+    if cache is None:
+        return _starlette_response(response)
+    entree = {'corps': response.get_data(),
+              'en_tetes': {h: response.headers[h] for h in _EN_TETES if h in response.headers}}
+    cache.set(cle, entree)
+    return Response(entree['corps'], headers={**entree['en_tetes'], **en_tetes})
+
+async def stream(request):
+    flask_app = request.app.state.flask
+    claims, erreur = authenticate(flask_app, request, ['admin', 'technicien', 'user'],
+                                  locations=['headers', 'query_string'])
+    if erreur:
+        return erreur
+    with flask_app.app_context():
+        hub = get_hub()
+    subscription = hub.subscribe_async(event_filter(claims))
+    heartbeat = flask_app.config.get('EVENTS_HEARTBEAT_S', 15)
+
+    async def flux():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await subscription.get(timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                if event is DECONNECTE:
+                    yield 'event: resync\ndata: {}\n\n'
+                    return
+                yield format_sse(event)
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(flux(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def create_asgi_app(flask_app=None):
+    flask_app = flask_app or create_app()
+    engine = create_async_engine_for(flask_app)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+
+    # Les routes Flask ont leurs en-têtes CORS via Flask-CORS, les routes asynchrones via Starlette
+    # (OPTIONS déclaré pour que les requêtes préliminaires atteignent le middleware)
+    cors = [Middleware(CORSMiddleware, allow_origins=flask_app.config['CORS_ORIGINS'].split(','),
+                       allow_methods=['*'], allow_headers=['*'], expose_headers=['X-Next-Cursor', 'ETag'])]
+    app = Starlette(routes=[
+        Route('/import_export/export', export, methods=['GET', 'OPTIONS'], middleware=cors),
+        Route('/import_export/import', import_csv, methods=['POST', 'OPTIONS'], middleware=cors),
+        Route('/stats', stats, methods=['GET', 'OPTIONS'], middleware=cors),
+        Route('/tickets/stream', stream, methods=['GET', 'OPTIONS'], middleware=cors),
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ], lifespan=lifespan)
+    app.state.flask = flask_app
+    app.state.engine = engine
+    return app
+
+app = create_asgi_app()
@@ -0,0 +1,173 @@
+"""Générateur de jeux de données synthétiques réalistes.
+
+    python benchmarks/dataset.py 100k [--techniciens 40] [--seed 42]
+
+Crée le schéma sur la base DATABASE_URI (qui doit être vide), les références, les
+comptes admin@test.com / tech@test.com / user@test.com (mêmes mots de passe que seed.py),
+des techniciens supplémentaires et N tickets (10k, 100k, 1m ou un entier) insérés par
+lots. Le tirage est déterministe pour une graine donnée.
+
+Distributions :
+- ouvertures sur deux ans, surtout en semaine et aux heures de bureau ;
+- durée de résolution log-normale, médiane selon le type et la catégorie ;
+- probabilité d'être résolu croissante avec l'ancienneté du ticket ;
+- affectation des techniciens et demandeurs selon une loi de Zipf (quelques-uns
+  concentrent la charge).
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import current_app
+from sqlalchemy import insert, select, func
+from extensions import db
+from models.ticket import Ticket, technicien_ticket
+from models.user import User
+from models.statut import Statut
+from models.categorie import Categorie
+from models.type import Type
+from utils.auth import hash_password
+from utils.change_tracking import bump_versions
+from utils.stats_rollup import rebuild_rollup
+
+TAILLES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+CHUNK_SIZE = 10_000
+FIN = datetime(2026, 1, 1)
+DUREE_JOURS = 730
+
+STATUTS = ['Nouveau', 'En attente', 'En cours', 'Résolu']
+CATEGORIES = {'Réseau': 0.35, 'Logiciel': 0.45, 'Matériel': 0.20}
+TYPES = {'Incident': 0.6, 'Demande': 0.4}
+# médiane de résolution en heures par type, multiplicateur par catégorie
+MEDIANE_H = {'Incident': 4.0, 'Demande': 24.0}
+FACTEUR_CATEGORIE = {'Réseau': 1.0, 'Logiciel': 1.5, 'Matériel': 3.0}
+SIGMA = 1.2
+DEPARTEMENTS = ['IT', 'RH', 'Finance', 'Commercial', 'Production', 'Logistique', 'Direction']
+TITRES = {
+    'Réseau': ['Pas de connexion Internet', 'VPN inaccessible', 'Wi-Fi instable', 'Lenteur réseau'],
+    'Logiciel': ['Erreur au lancement de l\'application', 'Licence expirée', 'Mise à jour bloquée',
+                 'Messagerie inaccessible'],
+    'Matériel': ['Écran défectueux', 'Imprimante en panne', 'Clavier hors service', 'PC qui ne démarre plus'],
+}
+
+def taille(valeur):
+    return TAILLES.get(valeur.lower()) or int(valeur)
+
+def _zipf(n, s=1.1):
+    poids = [1 / (rang ** s) for rang in range(1, n + 1)]
+    total = sum(poids)
+    return [p / total for p in poids]
+
+def creer_references():
+    """Statuts, catégories, types et les trois comptes de seed.py."""
+    db.session.add_all([Statut(nom=n) for n in STATUTS])
+    db.session.add_all([Categorie(nom=n) for n in CATEGORIES])
+    db.session.add_all([Type(nom=n) for n in TYPES])
+    db.session.add_all([
+        User(nom='Admin', email='admin@test.com', mot_de_passe=hash_password('admin123'), role='admin'),
+        User(nom='Tech', email='tech@test.com', mot_de_passe=hash_password('tech123'), role='technicien'),
+        User(nom='Manager', email='user@test.com', mot_de_passe=hash_password('user123'), role='user'),
+    ])
+    db.session.commit()
+
+def creer_techniciens(nb):
+    """Techniciens synthétiques (mot de passe commun, haché une fois)."""
+    mot_de_passe = hash_password('tech123')
+    db.session.execute(insert(User.__table__), [
+        {'nom': f'Technicien {i}', 'email': f'technicien{i}@test.com', 'mot_de_passe': mot_de_passe,
+         'role': 'technicien'} for i in range(1, nb + 1)])
+    db.session.commit()
+
+def _ids(model):
+    return dict(db.session.execute(select(model.nom, model.id)).all())
+
+def inserer_tickets(nb_tickets, seed=42, chunk_size=CHUNK_SIZE, fin=FIN):
+    """Ajoute `nb_tickets` tickets synthétiques aux références et techniciens existants."""
+    rng = random.Random(seed)
+    statuts, categories, types = _ids(Statut), _ids(Categorie), _ids(Type)
+    techniciens = list(db.session.execute(
+        select(User.id).where(User.role == 'technicien').order_by(User.id)).scalars())
+    poids_techniciens = _zipf(len(techniciens))
+    demandeurs = [f'Demandeur {i}' for i in range(500)]
+    poids_demandeurs = _zipf(len(demandeurs), 0.8)
+    noms_categories, poids_categories = list(CATEGORIES), list(CATEGORIES.values())
+    noms_types, poids_types = list(TYPES), list(TYPES.values())
+    prochain_id = (db.session.execute(select(func.max(Ticket.id))).scalar() or 0) + 1
+    debut = fin - timedelta(days=DUREE_JOURS)
+
+    for lot in range(0, nb_tickets, chunk_size):
+        seq = bump_versions(db.session.connection(), 'tickets')['tickets']
+        tickets, affectations = [], []
+        for ticket_id in range(prochain_id + lot, prochain_id + min(lot + chunk_size, nb_tickets)):
+            jour = debut + timedelta(days=rng.randrange(DUREE_JOURS))
+            while jour.weekday() >= 5 and rng.random() < 0.8:
+                jour = debut + timedelta(days=rng.randrange(DUREE_JOURS))
+            heure = min(23.99, max(0.0, rng.gauss(11, 3)))
+            ouverture = jour + timedelta(hours=heure)
+            categorie = rng.choices(noms_categories, poids_categories)[0]
+            type = rng.choices(noms_types, poids_types)[0]
+            anciennete_j = (fin - ouverture).total_seconds() / 86400
+            resolution = None
+            if rng.random() < 0.97 * (1 - math.exp(-anciennete_j / 5)):
+                mediane = MEDIANE_H[type] * FACTEUR_CATEGORIE[categorie]
+                duree_h = rng.lognormvariate(math.log(mediane), SIGMA)
+                if ouverture + timedelta(hours=duree_h) < fin:
+                    resolution = ouverture + timedelta(hours=duree_h)
+            if resolution is not None:
+                statut = 'Résolu'
+            else:
+                statut = rng.choices(STATUTS[:3], (0.3, 0.2, 0.5))[0]
+            tickets.append({
+                'id': ticket_id,
+                'titre': rng.choice(TITRES[categorie]),
+                'description': f'{rng.choice(TITRES[categorie])} depuis ce matin, merci d\'intervenir.',
+                'date_d_ouverture': ouverture,
+                'demandeur': rng.choices(demandeurs, poids_demandeurs)[0],
+                'categorie_id': categories[categorie],
+                'statut_id': statuts[statut],
+                'type_id': types[type],
+                'departement_demandeur': rng.choice(DEPARTEMENTS),
+                'date_resolution': resolution,
+                'date_modification': resolution or ouverture,
+                'seq_modification': seq,
+            })
+            tirage = rng.random()
+            nb_techniciens = 0 if tirage < 0.03 else (2 if tirage > 0.88 else 1)
+            for technicien_id in set(rng.choices(techniciens, poids_techniciens, k=nb_techniciens)):
+                affectations.append({'ticket_id': ticket_id, 'technicien_id': technicien_id})
+        db.session.execute(insert(Ticket.__table__), tickets)
+        if affectations:
+            db.session.execute(insert(technicien_ticket), affectations)
+        db.session.commit()
+    # insertions hors ORM : les tables d'agrégats sont reconstruites
+    if current_app.config.get('STATS_ROLLUP_ENABLED'):
+        rebuild_rollup()
+
+def generer(nb_tickets, nb_techniciens=40, seed=42):
+    """Jeu de données complet sur une base vide."""
+    db.create_all()
+    creer_references()
+    creer_techniciens(nb_techniciens)
+    inserer_tickets(nb_tickets, seed)
+
+def main():
+    parser = argparse.ArgumentParser(description='Génère un jeu de données synthétique.')
+    parser.add_argument('tickets', type=taille, help='10k, 100k, 1m ou un nombre de tickets')
+    parser.add_argument('--techniciens', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        debut = time.perf_counter()
+        generer(args.tickets, args.techniciens, args.seed)
+        print(f'{args.tickets} tickets générés en {time.perf_counter() - debut:.1f} s.')
+
+if __name__ == '__main__':
+    main()
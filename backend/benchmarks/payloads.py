@@ -0,0 +1,139 @@
+"""Taille sur le réseau et coût CPU des représentations et encodages négociés.
+
+    python benchmarks/payloads.py [nb_tickets] [--iterations 5]
+
+Sur un jeu de données synthétique (benchmarks/dataset.py) dans une base SQLite temporaire,
+mesure pour chaque combinaison représentation (JSON, colonnes, MessagePack si installé) x
+encodage (identity, gzip, br et zstd si installés) d'une page de tickets, de la liste
+complète et de l'export NDJSON (en flux) : octets transférés et temps médian de la requête
+côté serveur. Pour la liste complète en JSON, donne aussi le temps de compression seul et
+celui de décompression côté client. Vérifie que chaque variante se décode vers les mêmes
+tickets. Cache de réponses désactivé.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_fd, _db_path = tempfile.mkstemp(suffix='.db')
+os.close(_fd)
+os.environ['DATABASE_URI'] = 'sqlite:///' + _db_path
+os.environ.update(RESPONSE_CACHE_ENABLED='false', JOBS_WORKERS='0', BCRYPT_ROUNDS='4')
+
+from app import create_app
+from benchmarks.dataset import generer
+from utils.compression import Compresseur, disponibles
+from utils.representation import MIME_JSON, MIME_COLONNES, MIME_MSGPACK, msgpack_disponible
+
+def decompresser(donnees, encodage):
+    if encodage is None:
+        return donnees
+    if encodage == 'gzip':
+        return zlib.decompress(donnees, 31)
+    if encodage == 'br':
+        import brotli
+        return brotli.decompress(donnees)
+    import zstandard
+    return zstandard.ZstdDecompressor().decompressobj().decompress(donnees)
+
+def decoder(donnees, mimetype):
+    """Tickets (liste de dicts) contenus dans une réponse de la représentation `mimetype`."""
+    if mimetype == MIME_MSGPACK:
+        import msgpack
+        contenu = msgpack.unpackb(donnees)
+    else:
+        contenu = json.loads(donnees)
+    if mimetype == MIME_JSON:
+        return contenu
+    colonnes, references = contenu['colonnes'], contenu['references']
+    tickets = []
+    for i in range(contenu['nb']):
+        ticket = {}
+        for champ, valeurs in colonnes.items():
+            valeur = valeurs[i]
+            if isinstance(valeur, list):
+                valeur = [references[champ][j] for j in valeur]
+            elif champ in references and valeur is not None:
+                valeur = references[champ][valeur]
+            ticket[champ] = valeur
+        tickets.append(ticket)
+    return tickets
+
+def _requete(client, url, en_tetes):
+    """Requête complète : un export en flux n'est produit qu'en lisant le corps."""
+    reponse = client.get(url, headers=en_tetes)
+    reponse.get_data()
+    reponse.close()
+    return reponse
+
+def _median_ms(fn, iterations):
+    durees = []
+    for _ in range(iterations):
+        debut = time.perf_counter()
+        resultat = fn()
+        durees.append(time.perf_counter() - debut)
+    return round(statistics.median(durees) * 1000, 2), resultat
+
+def main():
+    parser = argparse.ArgumentParser(description='Taille et coût des réponses compressées.')
+    parser.add_argument('tickets', type=int, nargs='?', default=10000)
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+    app = create_app()
+    with app.app_context():
+        generer(args.tickets)
+    client = app.test_client()
+    jeton = client.post('/auth/login', json={'email': 'admin@test.com', 'password': 'admin123'}).get_json()
+    auth = {'Authorization': 'Bearer ' + jeton['access_token']}
+    representations = [MIME_JSON, MIME_COLONNES] + ([MIME_MSGPACK] if msgpack_disponible() else [])
+    encodages = [None] + list(disponibles())
+    ressources = [('page', '/tickets?limit=500', representations),
+                  ('liste', '/tickets', representations),
+                  ('export_ndjson', '/import_export/export?format=ndjson', [MIME_JSON])]
+    resultats = {'nb_tickets': args.tickets, 'encodages': encodages[1:], 'mesures': []}
+    references = {}
+    for nom, url, mimetypes in ressources:
+        for mimetype in mimetypes:
+            for encodage in encodages:
+                en_tetes = dict(auth, Accept=mimetype, **{'Accept-Encoding': encodage or 'identity'})
+                duree, reponse = _median_ms(lambda: _requete(client, url, en_tetes), args.iterations)
+                if reponse.headers.get('Content-Encoding') not in (encodage, None):
+                    raise SystemExit(f'{nom} : encodage {reponse.headers.get("Content-Encoding")} au lieu de {encodage}')
+                corps = decompresser(reponse.data, reponse.headers.get('Content-Encoding'))
+                contenu = corps if nom == 'export_ndjson' else decoder(corps, mimetype)
+                if references.setdefault(nom, contenu) != contenu:
+                    raise SystemExit(f'{nom} {mimetype} {encodage} : contenu différent')
+                resultats['mesures'].append({
+                    'ressource': nom,
+                    'representation': mimetype.split('/')[1],
+                    'encodage': encodage or 'identity',
+                    'octets': len(reponse.data),
+                    'octets_decompresses': len(corps),
+                    'requete_ms': duree,
+                })
+    # coût seul de la compression du corps JSON de la liste complète, et de sa décompression
+    corps = client.get('/tickets', headers=dict(auth, **{'Accept-Encoding': 'identity'})).data
+    resultats['compression_liste_json'] = {}
+    for encodage in encodages[1:]:
+        compression_ms, compresse = _median_ms(lambda: Compresseur(encodage).tout(corps), args.iterations)
+        decompression_ms, _ = _median_ms(lambda: decompresser(compresse, encodage), args.iterations)
+        resultats['compression_liste_json'][encodage] = {
+            'ratio': round(len(corps) / len(compresse), 1),
+            'compression_ms': compression_ms,
+            'decompression_ms': decompression_ms,
+            'mo_par_s': round(len(corps) / 1e6 / (compression_ms / 1000), 1),
+        }
+    print(json.dumps(resultats, indent=2, ensure_ascii=False))
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        for suffixe in ('', '-wal', '-shm'):
+            if os.path.exists(_db_path + suffixe):
+                os.remove(_db_path + suffixe)
@@ -0,0 +1,108 @@
+"""Vérifie que les requêtes chaudes utilisent les index attendus (EXPLAIN).
+
+    python benchmarks/query_plans.py            # base SQLite temporaire, migrée
+    DATABASE_URI=mysql://... python benchmarks/query_plans.py --existing
+
+Sans --existing, le schéma est créé par les migrations (flask db upgrade) dans une base
+SQLite temporaire. Avec --existing, la base configurée est utilisée telle quelle (schéma
+migré, sans écriture). Chaque route est appelée via le client de test et les requêtes
+qu'elle exécute réellement sont passées à EXPLAIN. Le script s'arrête avec un code non
+nul si un index attendu n'apparaît dans le plan d'aucune d'elles.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+EXISTING = '--existing' in sys.argv
+if not EXISTING:
+    _fd, _db_path = tempfile.mkstemp(suffix='.db')
+    os.close(_fd)
+    os.environ['DATABASE_URI'] = 'sqlite:///' + _db_path
+os.environ['JOBS_WORKERS'] = '0'
+
+from contextlib import contextmanager
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from flask_migrate import upgrade
+from app import create_app
+from extensions import db, migrate
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+# (nom, rôle, URL, index attendu)
+REQUETES = (
+    ('GET /tickets (page)', 'admin', '/tickets?limit=50', 'ix_tickets_ouverture'),
+    ('GET /tickets?statut_id=', 'admin', '/tickets?limit=50&statut_id=1', 'ix_tickets_statut_ouverture'),
+    ('GET /tickets?categorie_id=', 'admin', '/tickets?limit=50&categorie_id=1', 'ix_tickets_categorie_ouverture'),
+    ('GET /tickets?type_id=', 'admin', '/tickets?limit=50&type_id=1', 'ix_tickets_type_ouverture'),
+    ('GET /tickets (technicien)', 'technicien', '/tickets?limit=50', 'ix_technicien_ticket_technicien'),
+    ('GET /stats', 'admin', '/stats', 'ix_tickets_stats'),
+    ('GET /stats/timeseries (résolutions)', 'admin',
+     '/stats/timeseries?periode=mois&date_debut=2025-01-01&date_fin=2025-03-31', 'ix_tickets_resolution'),
+)
+
+@contextmanager
+def capture(engine):
+    """Requêtes SELECT (texte, paramètres) exécutées sur `engine` dans le bloc."""
+    requetes = []
+
+    def enregistrer(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH', '(')):
+            requetes.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', enregistrer)
+    try:
+        yield requetes
+    finally:
+        event.remove(engine, 'before_cursor_execute', enregistrer)
+
+def plan(connection, statement, parameters):
+    """Texte du plan d'exécution de `statement` sur la connexion."""
+    prefixe = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+    lignes = connection.exec_driver_sql(prefixe + statement, parameters).all()
+    return '\n'.join(' '.join(str(v) for v in ligne) for ligne in lignes)
+
+def main():
+    app = create_app()
+    # chaque appel doit exécuter ses requêtes sur les tickets
+    app.config.update(RESPONSE_CACHE_ENABLED=False, STATS_ROLLUP_ENABLED=False,
+                      JWT_REVOCATION_ENABLED=False)
+    app.extensions.pop('response_cache', None)
+    echecs = 0
+    with app.app_context():
+        if not EXISTING:
+            # flask db upgrade (Flask-Migrate n'est initialisé que pour la CLI)
+            migrate.init_app(app, db, directory=MIGRATIONS)
+            upgrade(directory=MIGRATIONS)
+        jetons = {role: create_access_token(identity='1', additional_claims={'role': role, 'user_id': 1})
+                  for role in ('admin', 'technicien')}
+    client = app.test_client()
+    with app.app_context():
+        for nom, role, url, index in REQUETES:
+            with capture(db.engine) as requetes:
+                reponse = client.get(url, headers={'Authorization': f'Bearer {jetons[role]}',
+                                                   'Accept-Encoding': 'identity'})
+            if reponse.status_code != 200:
+                echecs += 1
+                print(f'[ÉCHEC] {nom} : HTTP {reponse.status_code} {reponse.get_data(as_text=True)[:200]}')
+                continue
+            with db.engine.connect() as connection:
+                textes = [plan(connection, statement, parameters) for statement, parameters in requetes]
+            ok = any(index in texte for texte in textes)
+            echecs += not ok
+            print(f"[{'OK' if ok else 'ÉCHEC'}] {nom} : {index}")
+            if not ok:
+                for texte in textes:
+                    print('    ' + texte.replace('\n', '\n    '))
+    return 1 if echecs else 0
+
+if __name__ == '__main__':
+    try:
+        code = main()
+    finally:
+        if not EXISTING:
+            for chemin in (_db_path, _db_path + '-wal', _db_path + '-shm'):
+                if os.path.exists(chemin):
+                    os.remove(chemin)
+    sys.exit(code)
@@ -0,0 +1,95 @@
+"""Compare ticket_schema.dump() et schemas/ticket_serializer.py sur une base SQLite temporaire.
+
+    python benchmarks/serializer.py [nb_tickets]
+
+Vérifie que les deux chemins produisent les mêmes octets JSON puis affiche les temps en JSON.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_fd, _db_path = tempfile.mkstemp(suffix='.db')
+os.close(_fd)
+os.environ['DATABASE_URI'] = 'sqlite:///' + _db_path
+
+from flask import jsonify
+from sqlalchemy import insert, select
+from app import create_app
+from extensions import db
+from models.ticket import Ticket, technicien_ticket
+from models.user import User
+from models.statut import Statut
+from models.categorie import Categorie
+from models.type import Type
+from schemas.ticket_schema import tickets_schema
+from schemas.ticket_serializer import COLONNES, serialize_ticket_rows
+
+def _peupler(nb_tickets):
+    db.create_all()
+    db.session.add_all([Statut(nom=n) for n in ['Nouveau', 'En attente', 'En cours', 'Résolu']])
+    db.session.add_all([Categorie(nom=n) for n in ['Réseau', 'Logiciel', 'Matériel']])
+    db.session.add_all([Type(nom=n) for n in ['Demande', 'Incident']])
+    db.session.add_all([User(nom=f'Tech {i}', email=f'tech{i}@test.com', mot_de_passe='x', role='technicien')
+                        for i in range(10)])
+    db.session.commit()
+    debut = datetime(2025, 1, 1)
+    db.session.execute(insert(Ticket.__table__), [{
+        'titre': f'Ticket {i}',
+        'description': 'Description du problème rencontré ' * 4,
+        'date_d_ouverture': debut + timedelta(minutes=17 * i),
+        'demandeur': f'Demandeur {i % 50}',
+        'categorie_id': 1 + i % 3,
+        'statut_id': 1 + i % 4,
+        'type_id': 1 + i % 2,
+        'departement_demandeur': 'IT',
+        'date_resolution': debut + timedelta(minutes=17 * i + 300) if i % 4 == 3 else None,
+        'date_modification': debut
+    } for i in range(nb_tickets)])
+    db.session.execute(insert(technicien_ticket), [
+        {'ticket_id': i + 1, 'technicien_id': 1 + i % 10} for i in range(nb_tickets)
+    ])
+    db.session.commit()
+
+def _chrono(fn, repetitions=3):
+    meilleur = None
+    for _ in range(repetitions):
+        db.session.expunge_all()
+        debut = time.perf_counter()
+        resultat = fn()
+        duree = time.perf_counter() - debut
+        meilleur = duree if meilleur is None else min(meilleur, duree)
+    return meilleur, resultat
+
+def main(nb_tickets):
+    app = create_app()
+    with app.test_request_context():
+        _peupler(nb_tickets)
+        ordre = (Ticket.date_d_ouverture.desc(), Ticket.id.desc())
+
+        def marshmallow():
+            return jsonify(tickets_schema.dump(Ticket.query.order_by(*ordre).all())).get_data()
+
+        def direct():
+            return jsonify(serialize_ticket_rows(db.session.execute(select(*COLONNES).order_by(*ordre)).all())).get_data()
+
+        t_marshmallow, octets_marshmallow = _chrono(marshmallow)
+        t_direct, octets_direct = _chrono(direct)
+        if octets_marshmallow != octets_direct:
+            raise SystemExit('Sorties différentes entre TicketSchema et ticket_serializer')
+        print(json.dumps({
+            'nb_tickets': nb_tickets,
+            'octets': len(octets_direct),
+            'marshmallow_s': round(t_marshmallow, 4),
+            'direct_s': round(t_direct, 4),
+            'acceleration': round(t_marshmallow / t_direct, 2)
+        }, indent=2))
+
+if __name__ == '__main__':
+    try:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
+    finally:
+        os.remove(_db_path)
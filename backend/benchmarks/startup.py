@@ -0,0 +1,189 @@
+"""Démarrage à froid et mémoire par worker.
+
+    python benchmarks/startup.py [--runs 5] [--workers 4] [--output resultats.json]
+                                 [--compare base.json] [--tolerance 0.2]
+                                 [--max-start-ms 1500] [--max-worker-mo 80]
+
+Démarrage : `create_app()` dans N interpréteurs neufs (médiane du temps d'import et de
+création, RSS à la fin) ; échoue si pandas, alembic ou marshmallow sont chargés à ce stade.
+
+Workers : un processus maître forke --workers workers qui servent chacun une connexion et
+une page de tickets, comme gunicorn, sans préchargement (chaque worker crée l'application)
+puis avec (`preload()` dans le maître avant le fork, APP_PRELOAD). Mémoire propre à chaque
+worker (USS, pages privées) et PSS, lues dans /proc (Linux).
+
+Le script s'arrête avec un code non nul si un seuil (--max-*) est dépassé ou, avec
+--compare, si le démarrage ou l'USS moyen d'un mode dépasse le résultat précédent de plus
+de --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+# Dépendances qui ne doivent être importées qu'au premier usage
+MODULES_A_LA_DEMANDE = ('pandas', 'alembic', 'marshmallow', 'pyarrow')
+
+DEMARRAGE = """
+import json, sys, time
+debut = time.perf_counter()
+from app import create_app
+create_app()
+duree = time.perf_counter() - debut
+print(json.dumps({'ms': duree * 1000, 'modules': sorted({m.split('.')[0] for m in sys.modules}
+                  & set(sys.argv[1:]))}))
+"""
+
+def _memoire():
+    """RSS, PSS et USS (Mo) du processus courant, None hors Linux."""
+    try:
+        with open('/proc/self/smaps_rollup', encoding='ascii') as fichier:
+            valeurs = {ligne.split(':')[0]: int(ligne.split()[1]) for ligne in fichier if ligne.endswith('kB\n')}
+    except OSError:
+        return {'rss_mo': None, 'pss_mo': None, 'uss_mo': None}
+    uss = valeurs.get('Private_Clean', 0) + valeurs.get('Private_Dirty', 0)
+    return {'rss_mo': round(valeurs['Rss'] / 1024, 1), 'pss_mo': round(valeurs['Pss'] / 1024, 1),
+            'uss_mo': round(uss / 1024, 1)}
+
+def _preparer_base():
+    fd, chemin = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URI'] = 'sqlite:///' + chemin
+    subprocess.run([sys.executable, os.path.join(BACKEND, 'benchmarks', 'dataset.py'), '2000'],
+                   cwd=BACKEND, check=True, stdout=subprocess.DEVNULL)
+    return chemin
+
+def mesurer_demarrage(runs):
+    mesures = []
+    for _ in range(runs):
+        sortie = subprocess.run([sys.executable, '-c', DEMARRAGE, *MODULES_A_LA_DEMANDE], cwd=BACKEND,
+                                check=True, capture_output=True, text=True).stdout
+        mesures.append(json.loads(sortie.strip().splitlines()[-1]))
+    return {
+        'median_ms': round(statistics.median(m['ms'] for m in mesures), 1),
+        'min_ms': round(min(m['ms'] for m in mesures), 1),
+        'modules_charges': sorted({nom for m in mesures for nom in m['modules']}),
+    }
+
+def _servir(app):
+    """Première activité d'un worker : connexion et première page de tickets."""
+    client = app.test_client()
+    reponse = client.post('/auth/login', json={'email': 'admin@test.com', 'password': 'admin123'})
+    en_tetes = {'Authorization': 'Bearer ' + reponse.get_json()['access_token']}
+    if client.get('/tickets?limit=50', headers=en_tetes).status_code != 200:
+        raise SystemExit('GET /tickets en échec')
+
+def maitre(preload, nb_workers):
+    """Processus maître (lancé par le script) : forke les workers et renvoie leurs mesures."""
+    app = None
+    if preload:
+        from app import create_app, preload as precharger
+        app = create_app()
+        precharger(app)
+    lectures = []
+    for _ in range(nb_workers):
+        lecture, ecriture = os.pipe()
+        if os.fork() == 0:
+            os.close(lecture)
+            if app is None:
+                from app import create_app
+                app = create_app()
+            _servir(app)
+            with os.fdopen(ecriture, 'w') as sortie:
+                sortie.write(json.dumps(_memoire()))
+            os._exit(0)
+        os.close(ecriture)
+        lectures.append(lecture)
+    mesures = []
+    for lecture in lectures:
+        with os.fdopen(lecture) as entree:
+            mesures.append(json.loads(entree.read()))
+        os.wait()
+    print(json.dumps(mesures))
+
+def mesurer_workers(preload, nb_workers):
+    sortie = subprocess.run([sys.executable, os.path.abspath(__file__), '--maitre', str(nb_workers)]
+                            + (['--preload'] if preload else []),
+                            cwd=BACKEND, check=True, capture_output=True, text=True).stdout
+    mesures = json.loads(sortie.strip().splitlines()[-1])
+    if mesures[0]['uss_mo'] is None:
+        return {'workers': nb_workers}
+    return {
+        'workers': nb_workers,
+        'uss_mo_moyen': round(statistics.mean(m['uss_mo'] for m in mesures), 1),
+        'pss_mo_moyen': round(statistics.mean(m['pss_mo'] for m in mesures), 1),
+        'rss_mo_moyen': round(statistics.mean(m['rss_mo'] for m in mesures), 1),
+    }
+
+def regressions(resultats, precedent, tolerance, max_start_ms, max_worker_mo):
+    """Messages des seuils dépassés."""
+    echecs = []
+    if resultats['demarrage']['modules_charges']:
+        echecs.append(f"modules chargés au démarrage : {', '.join(resultats['demarrage']['modules_charges'])}")
+    mesures = [('demarrage', 'median_ms', max_start_ms)]
+    mesures += [(f'workers_{mode}', 'uss_mo_moyen', max_worker_mo) for mode in ('standard', 'preload')]
+    for section, cle, maximum in mesures:
+        valeur = resultats[section].get(cle)
+        if valeur is None:
+            continue
+        if maximum is not None and valeur > maximum:
+            echecs.append(f'{section}.{cle} = {valeur} > {maximum}')
+        ancien = (precedent or {}).get(section, {}).get(cle)
+        if ancien and valeur > ancien * (1 + tolerance):
+            echecs.append(f'{section}.{cle} = {valeur} (précédent {ancien}, +{valeur / ancien - 1:.0%})')
+    return echecs
+
+def main():
+    parser = argparse.ArgumentParser(description='Démarrage et mémoire par worker de SmartTicket.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--output', help='fichier JSON de résultats (sinon sortie standard)')
+    parser.add_argument('--compare', help='résultats JSON précédents servant de référence')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--max-start-ms', type=float)
+    parser.add_argument('--max-worker-mo', type=float, help='USS moyen maximal d\'un worker')
+    parser.add_argument('--maitre', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--preload', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.maitre:
+        return maitre(args.preload, args.maitre)
+
+    os.environ.update(JOBS_WORKERS='0', BCRYPT_ROUNDS='4', RESPONSE_CACHE_ENABLED='false')
+    chemin = _preparer_base()
+    try:
+        resultats = {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'demarrage': mesurer_demarrage(args.runs),
+            'workers_standard': mesurer_workers(False, args.workers),
+            'workers_preload': mesurer_workers(True, args.workers),
+        }
+    finally:
+        for suffixe in ('', '-wal', '-shm'):
+            if os.path.exists(chemin + suffixe):
+                os.remove(chemin + suffixe)
+    sortie = json.dumps(resultats, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fichier:
+            fichier.write(sortie + '\n')
+    else:
+        print(sortie)
+    precedent = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fichier:
+            precedent = json.load(fichier)
+    echecs = regressions(resultats, precedent, args.tolerance, args.max_start_ms, args.max_worker_mo)
+    for echec in echecs:
+        print('RÉGRESSION', echec, file=sys.stderr)
+    sys.exit(1 if echecs else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""Suite de benchmarks HTTP (client de test Flask) sur un jeu de données synthétique.
+
+    python benchmarks/suite.py 100k [--iterations 50] [--output resultats.json] [--compare base.json]
+
+Le jeu de données (benchmarks/dataset.py) est généré une fois dans BENCH_DATA_DIR (par
+défaut le répertoire temporaire) puis copié avant chaque exécution, les scénarios PUT et
+import modifiant la base. Le cache de réponses est désactivé sauf avec --cache et la
+limitation des connexions est levée.
+
+Sortie JSON : pour chaque scénario, nombre d'appels, latences p50/p95/p99/moyenne (ms),
+débit (req/s), requêtes SQL par appel et pic de RSS du processus (Mo) à la fin du
+scénario. --compare affiche le rapport des p50/p95 avec un résultat précédent.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+from benchmarks.dataset import taille
+
+def _percentile(valeurs, q):
+    valeurs = sorted(valeurs)
+    rang = (len(valeurs) - 1) * q
+    bas = int(rang)
+    haut = min(bas + 1, len(valeurs) - 1)
+    return valeurs[bas] + (valeurs[haut] - valeurs[bas]) * (rang - bas)
+
+def _rss_mo():
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Ko sous Linux, octets sous macOS
+    return round(pic / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def _preparer_base(nb_tickets, seed):
+    dossier = os.getenv('BENCH_DATA_DIR', tempfile.gettempdir())
+    reference = os.path.join(dossier, f'smartticket-bench-{nb_tickets}-{seed}.db')
+    if not os.path.exists(reference):
+        script = os.path.join(BACKEND, 'benchmarks', 'dataset.py')
+        env = dict(os.environ, DATABASE_URI='sqlite:///' + reference)
+        subprocess.run([sys.executable, script, str(nb_tickets), '--seed', str(seed)], env=env, check=True)
+    fd, travail = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    shutil.copyfile(reference, travail)
+    return travail
+
+def _csv_import(nb_lignes, rng):
+    sortie = io.StringIO()
+    writer = csv.writer(sortie)
+    writer.writerow(['titre', 'description', 'date_d_ouverture', 'demandeur', 'categorie_id',
+                     'statut_id', 'type_id', 'departement_demandeur'])
+    for i in range(nb_lignes):
+        writer.writerow([f'Import {i}', 'Ticket importé', f'2025-06-{1 + i % 28:02d}T09:00:00',
+                         f'Demandeur {rng.randrange(500)}', rng.randint(1, 3), rng.randint(1, 3),
+                         rng.randint(1, 2), 'IT'])
+    return sortie.getvalue().encode('utf-8')
+
+class Suite:
+    def __init__(self, app, iterations, seed):
+        from sqlalchemy import event
+        from extensions import db
+        self.client = app.test_client()
+        self.iterations = iterations
+        self.rng = random.Random(seed)
+        self.nb_requetes_sql = 0
+        with app.app_context():
+            engines = list(db.engines.values())
+            self.max_id = db.session.execute(db.text('SELECT MAX(id) FROM tickets')).scalar() or 1
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._compter)
+        self.admin = self._login('admin@test.com', 'admin123')
+        self.tech = self._login('tech@test.com', 'tech123')
+
+    def _compter(self, *args):
+        self.nb_requetes_sql += 1
+
+    def _login(self, email, password):
+        reponse = self.client.post('/auth/login', json={'email': email, 'password': password})
+        return {'Authorization': 'Bearer ' + reponse.get_json()['access_token']}
+
+    def _verifier(self, reponse, nom):
+        if reponse.status_code >= 400:
+            raise SystemExit(f'{nom} : HTTP {reponse.status_code} {reponse.get_data(as_text=True)[:200]}')
+        return reponse
+
+    def mesurer(self, nom, appel, iterations):
+        durees = []
+        requetes_debut = self.nb_requetes_sql
+        debut_total = time.perf_counter()
+        for i in range(iterations):
+            debut = time.perf_counter()
+            reponse = self._verifier(appel(i), nom)
+            # le corps des réponses en flux n'est produit qu'à la lecture
+            reponse.get_data()
+            durees.append(time.perf_counter() - debut)
+        total = time.perf_counter() - debut_total
+        return {
+            'appels': iterations,
+            'p50_ms': round(_percentile(durees, 0.50) * 1000, 2),
+            'p95_ms': round(_percentile(durees, 0.95) * 1000, 2),
+            'p99_ms': round(_percentile(durees, 0.99) * 1000, 2),
+            'moyenne_ms': round(sum(durees) / iterations * 1000, 2),
+            'debit_rps': round(iterations / total, 1),
+            'requetes_sql': round((self.nb_requetes_sql - requetes_debut) / iterations, 1),
+            'rss_pic_mo': _rss_mo(),
+        }
+
+    def _import(self, i):
+        reponse = self.client.post('/import_export/import', headers=self.admin, data={
+            'file': (io.BytesIO(_csv_import(1000, self.rng)), 'import.csv')})
+        job_id = self._verifier(reponse, 'import').get_json()['job_id']
+        while True:
+            statut = self.client.get(f'/import_export/jobs/{job_id}', headers=self.admin)
+            if statut.get_json()['statut'] in ('termine', 'echec'):
+                return statut
+            time.sleep(0.01)
+
+    def scenarios(self):
+        n = self.iterations
+        curseur = {}
+
+        def page_suivante(i):
+            url = '/tickets?limit=50' + (f'&cursor={curseur["valeur"]}' if curseur.get('valeur') else '')
+            reponse = self.client.get(url, headers=self.admin)
+            curseur['valeur'] = reponse.headers.get('X-Next-Cursor')
+            return reponse
+
+        return [
+            ('login', lambda i: self.client.post(
+                '/auth/login', json={'email': 'admin@test.com', 'password': 'admin123'}), min(n, 20)),
+            ('tickets_page', lambda i: self.client.get('/tickets?limit=50', headers=self.admin), n),
+            ('tickets_pages_suivantes', page_suivante, n),
+            ('tickets_filtres', lambda i: self.client.get(
+                f'/tickets?limit=50&statut_id={1 + i % 4}&categorie_id={1 + i % 3}', headers=self.admin), n),
+            ('tickets_technicien', lambda i: self.client.get('/tickets?limit=50', headers=self.tech), n),
+            ('stats', lambda i: self.client.get('/stats', headers=self.admin), n),
+            ('stats_technicien', lambda i: self.client.get('/stats', headers=self.tech), n),
+            ('export_csv', lambda i: self.client.get(
+                '/import_export/export?format=csv', headers=self.admin), max(3, n // 10)),
+            ('import_1000_lignes', self._import, max(3, n // 10)),
+            ('put_ticket', lambda i: self.client.put(
+                f'/tickets/{self.rng.randint(1, self.max_id)}', headers=self.admin,
+                json={'statut_id': 1 + i % 4}), n),
+        ]
+
+    def executer(self, selection=None):
+        resultats = {}
+        for nom, appel, iterations in self.scenarios():
+            if selection and nom not in selection:
+                continue
+            resultats[nom] = self.mesurer(nom, appel, iterations)
+            print(f'{nom:<26} p50 {resultats[nom]["p50_ms"]:>9} ms  p95 {resultats[nom]["p95_ms"]:>9} ms',
+                  file=sys.stderr)
+        return resultats
+
+def comparer(actuel, precedent):
+    print(f'{"scénario":<26} {"p50":>8} {"p95":>8}', file=sys.stderr)
+    for nom, mesures in actuel['scenarios'].items():
+        ancien = precedent.get('scenarios', {}).get(nom)
+        if ancien:
+            rapports = [mesures[k] / ancien[k] if ancien[k] else float('nan') for k in ('p50_ms', 'p95_ms')]
+            print(f'{nom:<26} {rapports[0]:>7.2f}x {rapports[1]:>7.2f}x', file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks HTTP de SmartTicket.')
+    parser.add_argument('tickets', type=taille, help='10k, 100k, 1m ou un nombre de tickets')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scenario', action='append', help='limiter à ce scénario (répétable)')
+    parser.add_argument('--cache', action='store_true', help='garder le cache de réponses')
+    parser.add_argument('--output', help='fichier JSON de résultats (sinon sortie standard)')
+    parser.add_argument('--compare', help='résultats JSON précédents à comparer')
+    args = parser.parse_args()
+
+    chemin = _preparer_base(args.tickets, args.seed)
+    os.environ['DATABASE_URI'] = 'sqlite:///' + chemin
+    os.environ.setdefault('UPLOAD_FOLDER', tempfile.mkdtemp())
+    os.environ['LOGIN_MAX_ATTEMPTS_IP'] = os.environ['LOGIN_MAX_ATTEMPTS_ACCOUNT'] = str(10 ** 9)
+    if not args.cache:
+        os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+    try:
+        from app import create_app
+        app = create_app()
+        resultats = {
+            'commit': _commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'tickets': args.tickets,
+            'iterations': args.iterations,
+            'cache': args.cache,
+            'scenarios': Suite(app, args.iterations, args.seed).executer(args.scenario),
+        }
+    finally:
+        for suffixe in ('', '-wal', '-shm'):
+            if os.path.exists(chemin + suffixe):
+                os.remove(chemin + suffixe)
+    sortie = json.dumps(resultats, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fichier:
+            fichier.write(sortie + '\n')
+    else:
+        print(sortie)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fichier:
+            comparer(resultats, json.load(fichier))
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,26 @@
+import importlib
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
-from flask_migrate import Migrate
-from flask_marshmallow import Marshmallow
 from flask_cors import CORS
+from utils.database import RoutingSession
 
 # Extensions
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
-migrate = Migrate()
-ma = Marshmallow()
-cors = CORS() 
\ No newline at end of file
+cors = CORS()
+
+# Créées au premier accès (`from extensions import ma`) : marshmallow ne sert qu'aux
+# schémas, importés par les vues qui les utilisent, et alembic qu'à la CLI `flask db`
+_A_LA_DEMANDE = {'ma': ('flask_marshmallow', 'Marshmallow'), 'migrate': ('flask_migrate', 'Migrate')}
+
+def __getattr__(nom):
+    if nom not in _A_LA_DEMANDE:
+        raise AttributeError(f"module 'extensions' has no attribute '{nom}'")
+    module, classe = _A_LA_DEMANDE[nom]
+    extension = getattr(importlib.import_module(module), classe)()
+    if nom == 'ma' and has_app_context():
+        extension.init_app(current_app._get_current_object())
+    globals()[nom] = extension
+    return extension
@@ -4,6 +4,7 @@ from logging.config import fileConfig
 from flask import current_app
 
 from alembic import context
+from sqlalchemy.engine import make_url
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -51,6 +52,18 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_object_for(dialect):
+    """Objets hors autogenerate : table FTS5 de SQLite et ses tables internes (créées par
+    e7a93b4c6f18, absentes des modèles) et index FULLTEXT, propre à MySQL."""
+    def include_object(object, name, type_, reflected, compare_to):
+        if type_ == 'table' and name.startswith('tickets_fts'):
+            return False
+        if type_ == 'index' and name == 'ix_tickets_fulltext' and dialect != 'mysql':
+            return False
+        return True
+    return include_object
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +78,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object_for(make_url(url).get_backend_name())
     )
 
     with context.begin_transaction():
@@ -97,6 +111,8 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        if conf_args.get("include_object") is None:
+            conf_args["include_object"] = include_object_for(connection.dialect.name)
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
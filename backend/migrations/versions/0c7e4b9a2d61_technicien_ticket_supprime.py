@@ -0,0 +1,32 @@
+"""technicien_ticket_supprime: technicians of deleted tickets
+
+Revision ID: 0c7e4b9a2d61
+Revises: f2a6d8c3b519
+Create Date: 2025-09-05 11:12:40.582913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c7e4b9a2d61'
+down_revision = 'f2a6d8c3b519'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # les suppressions antérieures, sans techniciens connus, ne sont plus servies aux techniciens
+    op.create_table('technicien_ticket_supprime',
+    sa.Column('ticket_supprime_id', sa.Integer(), nullable=False),
+    sa.Column('technicien_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.ForeignKeyConstraint(['ticket_supprime_id'], ['tickets_supprimes.id'], ),
+    sa.PrimaryKeyConstraint('ticket_supprime_id', 'technicien_id')
+    )
+    op.create_index('ix_technicien_ticket_supprime_technicien', 'technicien_ticket_supprime', ['technicien_id', 'ticket_supprime_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_technicien_ticket_supprime_technicien', table_name='technicien_ticket_supprime')
+    op.drop_table('technicien_ticket_supprime')
@@ -0,0 +1,33 @@
+"""ticket_stats_daily rollup table
+
+Revision ID: 3b8f2c1d9a47
+Revises: 61e940b62b23
+Create Date: 2025-07-18 10:02:41.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8f2c1d9a47'
+down_revision = '61e940b62b23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ticket_stats_daily',
+    sa.Column('jour', sa.Date(), nullable=False),
+    sa.Column('statut_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('categorie_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('type_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('nb_tickets', sa.Integer(), nullable=False),
+    sa.Column('nb_avec_resolution', sa.Integer(), nullable=False),
+    sa.Column('duree_resolution_s', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('jour', 'statut_id', 'categorie_id', 'type_id')
+    )
+
+
+def downgrade():
+    op.drop_table('ticket_stats_daily')
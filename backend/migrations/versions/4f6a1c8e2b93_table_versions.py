@@ -0,0 +1,33 @@
+"""table_versions change counters
+
+Revision ID: 4f6a1c8e2b93
+Revises: e7a93b4c6f18
+Create Date: 2025-08-01 15:20:44.183502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f6a1c8e2b93'
+down_revision = 'e7a93b4c6f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('nom', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('nom')
+    )
+    op.bulk_insert(table_versions, [
+        {'nom': 'tickets', 'version': 0},
+        {'nom': 'users', 'version': 0},
+        {'nom': 'references', 'version': 0},
+    ])
+
+
+def downgrade():
+    op.drop_table('table_versions')
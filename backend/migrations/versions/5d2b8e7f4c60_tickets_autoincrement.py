@@ -0,0 +1,61 @@
+"""tickets: AUTOINCREMENT ids on SQLite
+
+Revision ID: 5d2b8e7f4c60
+Revises: 0c7e4b9a2d61
+Create Date: 2025-09-08 10:27:51.904136
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2b8e7f4c60'
+down_revision = '0c7e4b9a2d61'
+branch_labels = None
+depends_on = None
+
+# Triggers de tickets_fts (e7a93b4c6f18), supprimés avec l'ancienne table
+SQLITE_TRIGGERS = (
+    "CREATE TRIGGER tickets_fts_ai AFTER INSERT ON tickets BEGIN "
+    "INSERT INTO tickets_fts(rowid, titre, description, demandeur) "
+    "VALUES (new.id, new.titre, new.description, new.demandeur); END",
+    "CREATE TRIGGER tickets_fts_ad AFTER DELETE ON tickets BEGIN "
+    "INSERT INTO tickets_fts(tickets_fts, rowid, titre, description, demandeur) "
+    "VALUES ('delete', old.id, old.titre, old.description, old.demandeur); END",
+    "CREATE TRIGGER tickets_fts_au AFTER UPDATE OF titre, description, demandeur ON tickets BEGIN "
+    "INSERT INTO tickets_fts(tickets_fts, rowid, titre, description, demandeur) "
+    "VALUES ('delete', old.id, old.titre, old.description, old.demandeur); "
+    "INSERT INTO tickets_fts(rowid, titre, description, demandeur) "
+    "VALUES (new.id, new.titre, new.description, new.demandeur); END",
+    "INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')",
+)
+
+
+def _recreer(autoincrement):
+    # SQLite n'ajoute AUTOINCREMENT qu'à la création de la table : copie complète
+    with op.batch_alter_table('tickets', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}) as batch_op:
+        pass
+    for ddl in SQLITE_TRIGGERS:
+        op.execute(ddl)
+
+
+def upgrade():
+    # MySQL (AUTO_INCREMENT) ne réattribue pas les ids : rien à faire
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _recreer(True)
+    # prochain id au-delà de tout id déjà attribué, y compris archivé ou supprimé
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'tickets'")
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'tickets', max("
+        "(SELECT coalesce(max(id), 0) FROM tickets), "
+        "(SELECT coalesce(max(id), 0) FROM tickets_archive), "
+        "(SELECT coalesce(max(ticket_id), 0) FROM tickets_supprimes))")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _recreer(False)
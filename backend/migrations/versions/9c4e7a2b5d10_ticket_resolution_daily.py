@@ -0,0 +1,32 @@
+"""ticket_resolution_daily rollup table
+
+Revision ID: 9c4e7a2b5d10
+Revises: 3b8f2c1d9a47
+Create Date: 2025-07-21 16:45:12.903114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e7a2b5d10'
+down_revision = '3b8f2c1d9a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ticket_resolution_daily',
+    sa.Column('jour', sa.Date(), nullable=False),
+    sa.Column('categorie_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('type_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('classe', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('nb_resolus', sa.Integer(), nullable=False),
+    sa.Column('duree_resolution_s', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('jour', 'categorie_id', 'type_id', 'classe')
+    )
+
+
+def downgrade():
+    op.drop_table('ticket_resolution_daily')
@@ -0,0 +1,42 @@
+"""ticket sync: seq_modification and tickets_supprimes
+
+Revision ID: a2d5f7b0c914
+Revises: 4f6a1c8e2b93
+Create Date: 2025-08-05 10:48:09.377120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2d5f7b0c914'
+down_revision = '4f6a1c8e2b93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seq_modification', sa.BigInteger(), server_default='0', nullable=False))
+        batch_op.create_index('ix_tickets_seq_modification', ['seq_modification', 'id'], unique=False)
+
+    op.create_table('tickets_supprimes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.Column('seq_modification', sa.BigInteger(), nullable=False),
+    sa.Column('date_suppression', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tickets_supprimes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tickets_supprimes_seq_modification'), ['seq_modification'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tickets_supprimes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tickets_supprimes_seq_modification'))
+
+    op.drop_table('tickets_supprimes')
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_index('ix_tickets_seq_modification')
+        batch_op.drop_column('seq_modification')
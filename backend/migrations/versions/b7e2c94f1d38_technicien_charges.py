@@ -0,0 +1,46 @@
+"""technicien_charges open-ticket counts and technicien_categories skills
+
+Revision ID: b7e2c94f1d38
+Revises: d3f81a6c2e45
+Create Date: 2025-08-26 14:37:12.804117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c94f1d38'
+down_revision = 'd3f81a6c2e45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('technicien_charges',
+    sa.Column('technicien_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('tickets_ouverts', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['technicien_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('technicien_id')
+    )
+    op.create_table('technicien_categories',
+    sa.Column('technicien_id', sa.Integer(), nullable=False),
+    sa.Column('categorie_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['categorie_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['technicien_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('technicien_id', 'categorie_id')
+    )
+    # charges initiales (même requête que utils/workload.py:charges_select)
+    op.execute(
+        "INSERT INTO technicien_charges (technicien_id, tickets_ouverts) "
+        "SELECT technicien_ticket.technicien_id, COUNT(*) FROM technicien_ticket "
+        "JOIN tickets ON tickets.id = technicien_ticket.ticket_id "
+        "WHERE tickets.date_resolution IS NULL "
+        "AND tickets.statut_id NOT IN (SELECT id FROM statuts WHERE nom = 'Résolu') "
+        "GROUP BY technicien_ticket.technicien_id"
+    )
+
+
+def downgrade():
+    op.drop_table('technicien_categories')
+    op.drop_table('technicien_charges')
@@ -0,0 +1,42 @@
+"""hot query indexes
+
+Revision ID: c51d0e8f3a26
+Revises: 9c4e7a2b5d10
+Create Date: 2025-07-25 09:31:57.204418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c51d0e8f3a26'
+down_revision = '9c4e7a2b5d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.create_index('ix_tickets_ouverture', ['date_d_ouverture', 'id'], unique=False)
+        batch_op.create_index('ix_tickets_statut_ouverture', ['statut_id', 'date_d_ouverture', 'id'], unique=False)
+        batch_op.create_index('ix_tickets_categorie_ouverture', ['categorie_id', 'date_d_ouverture', 'id'], unique=False)
+        batch_op.create_index('ix_tickets_type_ouverture', ['type_id', 'date_d_ouverture', 'id'], unique=False)
+        batch_op.create_index('ix_tickets_resolution', ['date_resolution', 'date_d_ouverture'], unique=False)
+        batch_op.create_index('ix_tickets_stats', ['statut_id', 'categorie_id', 'date_d_ouverture', 'date_resolution'], unique=False)
+
+    with op.batch_alter_table('technicien_ticket', schema=None) as batch_op:
+        batch_op.create_index('ix_technicien_ticket_technicien', ['technicien_id', 'ticket_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('technicien_ticket', schema=None) as batch_op:
+        batch_op.drop_index('ix_technicien_ticket_technicien')
+
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_index('ix_tickets_stats')
+        batch_op.drop_index('ix_tickets_resolution')
+        batch_op.drop_index('ix_tickets_type_ouverture')
+        batch_op.drop_index('ix_tickets_categorie_ouverture')
+        batch_op.drop_index('ix_tickets_statut_ouverture')
+        batch_op.drop_index('ix_tickets_ouverture')
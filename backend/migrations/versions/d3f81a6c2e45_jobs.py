@@ -0,0 +1,54 @@
+"""jobs: persistent background task queue
+
+Revision ID: d3f81a6c2e45
+Revises: a2d5f7b0c914
+Create Date: 2025-08-19 09:12:41.506233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f81a6c2e45'
+down_revision = 'a2d5f7b0c914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('type', sa.String(length=30), nullable=False),
+    sa.Column('statut', sa.String(length=20), nullable=False),
+    sa.Column('priorite', sa.Integer(), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('cree_par', sa.Integer(), nullable=True),
+    sa.Column('tentatives', sa.Integer(), nullable=False),
+    sa.Column('max_tentatives', sa.Integer(), nullable=False),
+    sa.Column('annulation', sa.Boolean(), nullable=False),
+    sa.Column('progression', sa.JSON(), nullable=False),
+    sa.Column('nb_erreurs', sa.Integer(), nullable=False),
+    sa.Column('erreurs', sa.JSON(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('resultat_nom', sa.String(length=100), nullable=True),
+    sa.Column('resultat_type', sa.String(length=100), nullable=True),
+    sa.Column('worker', sa.String(length=100), nullable=True),
+    sa.Column('heartbeat_le', sa.DateTime(), nullable=True),
+    sa.Column('cree_le', sa.DateTime(), nullable=False),
+    sa.Column('disponible_le', sa.DateTime(), nullable=False),
+    sa.Column('debut_le', sa.DateTime(), nullable=True),
+    sa.Column('termine_le', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_jobs_file', ['statut', 'priorite', 'cree_le'], unique=False)
+        batch_op.create_index(batch_op.f('ix_jobs_cree_par'), ['cree_par'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_jobs_cree_par'))
+        batch_op.drop_index('ix_jobs_file')
+
+    op.drop_table('jobs')
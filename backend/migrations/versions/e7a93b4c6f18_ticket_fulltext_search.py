@@ -0,0 +1,55 @@
+"""ticket full-text search
+
+Revision ID: e7a93b4c6f18
+Revises: c51d0e8f3a26
+Create Date: 2025-07-29 11:12:03.661457
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a93b4c6f18'
+down_revision = 'c51d0e8f3a26'
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE tickets_fts USING fts5("
+    "titre, description, demandeur, content='tickets', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER tickets_fts_ai AFTER INSERT ON tickets BEGIN "
+    "INSERT INTO tickets_fts(rowid, titre, description, demandeur) "
+    "VALUES (new.id, new.titre, new.description, new.demandeur); END",
+    "CREATE TRIGGER tickets_fts_ad AFTER DELETE ON tickets BEGIN "
+    "INSERT INTO tickets_fts(tickets_fts, rowid, titre, description, demandeur) "
+    "VALUES ('delete', old.id, old.titre, old.description, old.demandeur); END",
+    "CREATE TRIGGER tickets_fts_au AFTER UPDATE OF titre, description, demandeur ON tickets BEGIN "
+    "INSERT INTO tickets_fts(tickets_fts, rowid, titre, description, demandeur) "
+    "VALUES ('delete', old.id, old.titre, old.description, old.demandeur); "
+    "INSERT INTO tickets_fts(rowid, titre, description, demandeur) "
+    "VALUES (new.id, new.titre, new.description, new.demandeur); END",
+    # indexation des tickets existants
+    "INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for ddl in SQLITE_UPGRADE:
+            op.execute(ddl)
+    elif dialect == 'mysql':
+        op.create_index('ix_tickets_fulltext', 'tickets', ['titre', 'description', 'demandeur'],
+                        unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('tickets_fts_au', 'tickets_fts_ad', 'tickets_fts_ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS tickets_fts')
+    elif dialect == 'mysql':
+        op.drop_index('ix_tickets_fulltext', table_name='tickets')
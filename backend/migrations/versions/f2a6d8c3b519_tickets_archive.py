@@ -0,0 +1,65 @@
+"""tickets_archive, technicien_ticket_archive and ticket_archive_stats
+
+Revision ID: f2a6d8c3b519
+Revises: b7e2c94f1d38
+Create Date: 2025-09-02 09:48:27.316540
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6d8c3b519'
+down_revision = 'b7e2c94f1d38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tickets_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('titre', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('date_d_ouverture', sa.DateTime(), nullable=False),
+    sa.Column('demandeur', sa.String(length=100), nullable=False),
+    sa.Column('categorie_id', sa.Integer(), nullable=False),
+    sa.Column('statut_id', sa.Integer(), nullable=False),
+    sa.Column('type_id', sa.Integer(), nullable=False),
+    sa.Column('departement_demandeur', sa.String(length=100), nullable=True),
+    sa.Column('date_resolution', sa.DateTime(), nullable=True),
+    sa.Column('date_modification', sa.DateTime(), nullable=True),
+    sa.Column('seq_modification', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('date_archivage', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['categorie_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['statut_id'], ['statuts.id'], ),
+    sa.ForeignKeyConstraint(['type_id'], ['types.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tickets_archive_ouverture', 'tickets_archive', ['date_d_ouverture', 'id'], unique=False)
+    op.create_index('ix_tickets_archive_resolution', 'tickets_archive', ['date_resolution', 'date_d_ouverture'], unique=False)
+    op.create_table('technicien_ticket_archive',
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.Column('technicien_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.ForeignKeyConstraint(['ticket_id'], ['tickets_archive.id'], ),
+    sa.PrimaryKeyConstraint('ticket_id', 'technicien_id')
+    )
+    op.create_index('ix_technicien_ticket_archive_technicien', 'technicien_ticket_archive', ['technicien_id', 'ticket_id'], unique=False)
+    op.create_table('ticket_archive_stats',
+    sa.Column('technicien_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('statut_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('categorie_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('nb_tickets', sa.Integer(), nullable=False),
+    sa.Column('nb_avec_resolution', sa.Integer(), nullable=False),
+    sa.Column('duree_resolution_s', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('technicien_id', 'statut_id', 'categorie_id')
+    )
+
+
+def downgrade():
+    op.drop_table('ticket_archive_stats')
+    op.drop_index('ix_technicien_ticket_archive_technicien', table_name='technicien_ticket_archive')
+    op.drop_table('technicien_ticket_archive')
+    op.drop_index('ix_tickets_archive_resolution', table_name='tickets_archive')
+    op.drop_index('ix_tickets_archive_ouverture', table_name='tickets_archive')
+    op.drop_table('tickets_archive')
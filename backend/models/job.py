@@ -0,0 +1,54 @@
+from datetime import datetime
+from extensions import db
+
+# Tâches de fond persistantes : la table sert de file d'attente aux workers (utils/jobs.py)
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    # prochaine tâche à exécuter : statut, priorité décroissante puis ancienneté
+    __table_args__ = (db.Index('ix_jobs_file', 'statut', 'priorite', 'cree_le'),)
+    id = db.Column(db.String(32), primary_key=True)
+    type = db.Column(db.String(30), nullable=False)
+    # en_attente, en_cours, termine, echec, annule
+    statut = db.Column(db.String(20), nullable=False, default='en_attente')
+    priorite = db.Column(db.Integer, nullable=False, default=0)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    cree_par = db.Column(db.Integer, index=True)
+    tentatives = db.Column(db.Integer, nullable=False, default=0)
+    max_tentatives = db.Column(db.Integer, nullable=False, default=1)
+    annulation = db.Column(db.Boolean, nullable=False, default=False)
+    progression = db.Column(db.JSON, nullable=False, default=dict)
+    nb_erreurs = db.Column(db.Integer, nullable=False, default=0)
+    erreurs = db.Column(db.JSON, nullable=False, default=list)
+    message = db.Column(db.Text)
+    # fichier téléchargeable produit par la tâche (JOBS_RESULT_DIR/<id>)
+    resultat_nom = db.Column(db.String(100))
+    resultat_type = db.Column(db.String(100))
+    # worker qui exécute la tâche et dernier signe de vie (reprise si le worker disparaît)
+    worker = db.Column(db.String(100))
+    heartbeat_le = db.Column(db.DateTime)
+    cree_le = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    disponible_le = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    debut_le = db.Column(db.DateTime)
+    termine_le = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.type,
+            'statut': self.statut,
+            'priorite': self.priorite,
+            'tentatives': self.tentatives,
+            'max_tentatives': self.max_tentatives,
+            'annulation': self.annulation,
+            'progression': dict(self.progression or {}),
+            'nb_erreurs': self.nb_erreurs,
+            'erreurs': list(self.erreurs or []),
+            'message': self.message,
+            'resultat': self.resultat_nom,
+            'cree_le': self.cree_le.isoformat(),
+            'debut_le': self.debut_le.isoformat() if self.debut_le else None,
+            'termine_le': self.termine_le.isoformat() if self.termine_le else None
+        }
+
+    def __repr__(self):
+        return f'<Job {self.type} {self.id} {self.statut}>'
@@ -0,0 +1,15 @@
+from sqlalchemy import event, DDL
+from extensions import db
+
+# Compteur de modifications par groupe de tables, incrémenté à chaque écriture
+# (voir utils/change_tracking.py) et partagé par tous les processus via la base
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+    nom = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TableVersion {self.nom}={self.version}>'
+
+event.listen(TableVersion.__table__, 'after_create', DDL(
+    "INSERT INTO table_versions (nom, version) VALUES ('tickets', 0), ('users', 0), ('references', 0)"))
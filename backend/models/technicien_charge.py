@@ -0,0 +1,11 @@
+from extensions import db
+
+# Nombre de tickets ouverts (ni résolus ni datés de résolution) affectés à chaque technicien,
+# maintenu de façon incrémentale par utils/workload.py
+class TechnicienCharge(db.Model):
+    __tablename__ = 'technicien_charges'
+    technicien_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    tickets_ouverts = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TechnicienCharge {self.technicien_id}={self.tickets_ouverts}>'
@@ -1,14 +1,33 @@
+from sqlalchemy import event, DDL
 from extensions import db
 
 # Association table for many-to-many Ticket-Technicien
 technicien_ticket = db.Table(
     'technicien_ticket',
     db.Column('ticket_id', db.Integer, db.ForeignKey('tickets.id'), primary_key=True),
-    db.Column('technicien_id', db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    db.Column('technicien_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    # Accès inverse (tickets d'un technicien)
+    db.Index('ix_technicien_ticket_technicien', 'technicien_id', 'ticket_id')
 )
 
 class Ticket(db.Model):
     __tablename__ = 'tickets'
+    # Index alignés sur les requêtes de routes/tickets.py, routes/stats.py et routes/import_export.py
+    __table_args__ = (
+        # liste paginée triée par (date_d_ouverture, id), filtrée ou non
+        db.Index('ix_tickets_ouverture', 'date_d_ouverture', 'id'),
+        db.Index('ix_tickets_statut_ouverture', 'statut_id', 'date_d_ouverture', 'id'),
+        db.Index('ix_tickets_categorie_ouverture', 'categorie_id', 'date_d_ouverture', 'id'),
+        db.Index('ix_tickets_type_ouverture', 'type_id', 'date_d_ouverture', 'id'),
+        # séries de résolutions par période
+        db.Index('ix_tickets_resolution', 'date_resolution', 'date_d_ouverture'),
+        # agrégats de /stats par (statut, catégorie), couvrant
+        db.Index('ix_tickets_stats', 'statut_id', 'categorie_id', 'date_d_ouverture', 'date_resolution'),
+        # synchronisation incrémentale (GET /tickets/changes)
+        db.Index('ix_tickets_seq_modification', 'seq_modification', 'id'),
+        # SQLite : pas de réutilisation des ids (tickets archivés ou supprimés)
+        {'sqlite_autoincrement': True},
+    )
     id = db.Column(db.Integer, primary_key=True)
     titre = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -20,6 +39,8 @@ class Ticket(db.Model):
     departement_demandeur = db.Column(db.String(100), nullable=True)
     date_resolution = db.Column(db.DateTime, nullable=True)
     date_modification = db.Column(db.DateTime, nullable=True)
+    # Compteur 'tickets' de table_versions au moment de la dernière écriture (ordre des commits)
+    seq_modification = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
 
     # Relations
     techniciens = db.relationship('User', secondary=technicien_ticket, backref='tickets')
@@ -28,4 +49,28 @@ class Ticket(db.Model):
     type = db.relationship('Type')
 
     def __repr__(self):
-        return f'<Ticket {self.titre}>' 
\ No newline at end of file
+        return f'<Ticket {self.titre}>' 
+# Index plein texte sur titre, description et demandeur (voir utils/search.py)
+# SQLite : table FTS5 à contenu externe, tenue à jour par triggers (ORM comme insertions en masse)
+TICKETS_FTS_SQLITE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5("
+    "titre, description, demandeur, content='tickets', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN "
+    "INSERT INTO tickets_fts(rowid, titre, description, demandeur) "
+    "VALUES (new.id, new.titre, new.description, new.demandeur); END",
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN "
+    "INSERT INTO tickets_fts(tickets_fts, rowid, titre, description, demandeur) "
+    "VALUES ('delete', old.id, old.titre, old.description, old.demandeur); END",
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF titre, description, demandeur ON tickets BEGIN "
+    "INSERT INTO tickets_fts(tickets_fts, rowid, titre, description, demandeur) "
+    "VALUES ('delete', old.id, old.titre, old.description, old.demandeur); "
+    "INSERT INTO tickets_fts(rowid, titre, description, demandeur) "
+    "VALUES (new.id, new.titre, new.description, new.demandeur); END",
+)
+for _ddl in TICKETS_FTS_SQLITE:
+    event.listen(Ticket.__table__, 'after_create', DDL(_ddl).execute_if(dialect='sqlite'))
+event.listen(Ticket.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS tickets_fts').execute_if(dialect='sqlite'))
+# MySQL : index FULLTEXT, maintenu par le moteur
+db.Index('ix_tickets_fulltext', Ticket.titre, Ticket.description, Ticket.demandeur,
+         mysql_prefix='FULLTEXT').ddl_if(dialect='mysql')
@@ -0,0 +1,49 @@
+from extensions import db
+
+# Tickets résolus déplacés hors de la table tickets par utils/archive.py ; mêmes colonnes,
+# en lecture seule (GET /tickets/<id>, exports, statistiques)
+technicien_ticket_archive = db.Table(
+    'technicien_ticket_archive',
+    db.Column('ticket_id', db.Integer, db.ForeignKey('tickets_archive.id'), primary_key=True),
+    # historique : pas de clé étrangère, un technicien supprimé disparaît à la jointure sur users
+    db.Column('technicien_id', db.Integer, primary_key=True, autoincrement=False),
+    db.Index('ix_technicien_ticket_archive_technicien', 'technicien_id', 'ticket_id')
+)
+
+class TicketArchive(db.Model):
+    __tablename__ = 'tickets_archive'
+    # exports et filtres par date, séries de /stats/timeseries
+    __table_args__ = (
+        db.Index('ix_tickets_archive_ouverture', 'date_d_ouverture', 'id'),
+        db.Index('ix_tickets_archive_resolution', 'date_resolution', 'date_d_ouverture'),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    titre = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    date_d_ouverture = db.Column(db.DateTime, nullable=False)
+    demandeur = db.Column(db.String(100), nullable=False)
+    categorie_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    statut_id = db.Column(db.Integer, db.ForeignKey('statuts.id'), nullable=False)
+    type_id = db.Column(db.Integer, db.ForeignKey('types.id'), nullable=False)
+    departement_demandeur = db.Column(db.String(100), nullable=True)
+    date_resolution = db.Column(db.DateTime, nullable=True)
+    date_modification = db.Column(db.DateTime, nullable=True)
+    seq_modification = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    date_archivage = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<TicketArchive {self.titre}>'
+
+# Contribution des tickets archivés aux agrégats de GET /stats, par technicien (0 : tous les
+# tickets archivés), statut et catégorie ; alimentée à chaque archivage
+class TicketArchiveStats(db.Model):
+    __tablename__ = 'ticket_archive_stats'
+    technicien_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    statut_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    categorie_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    nb_tickets = db.Column(db.Integer, nullable=False, default=0)
+    nb_avec_resolution = db.Column(db.Integer, nullable=False, default=0)
+    duree_resolution_s = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TicketArchiveStats {self.technicien_id}/{self.statut_id}/{self.categorie_id}>'
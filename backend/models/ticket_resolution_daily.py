@@ -0,0 +1,15 @@
+from extensions import db
+
+# Résolutions journalières (par jour de résolution, catégorie, type et classe de durée
+# de utils/sketch.py), maintenues de façon incrémentale par utils/stats_rollup.py
+class TicketResolutionDaily(db.Model):
+    __tablename__ = 'ticket_resolution_daily'
+    jour = db.Column(db.Date, primary_key=True)
+    categorie_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    type_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    classe = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    nb_resolus = db.Column(db.Integer, nullable=False, default=0)
+    duree_resolution_s = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TicketResolutionDaily {self.jour} {self.categorie_id}/{self.type_id}#{self.classe}>'
@@ -0,0 +1,16 @@
+from extensions import db
+
+# Agrégats journaliers des tickets (par jour d'ouverture, statut, catégorie et type),
+# maintenus de façon incrémentale par utils/stats_rollup.py
+class TicketStatsDaily(db.Model):
+    __tablename__ = 'ticket_stats_daily'
+    jour = db.Column(db.Date, primary_key=True)
+    statut_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    categorie_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    type_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    nb_tickets = db.Column(db.Integer, nullable=False, default=0)
+    nb_avec_resolution = db.Column(db.Integer, nullable=False, default=0)
+    duree_resolution_s = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TicketStatsDaily {self.jour} {self.statut_id}/{self.categorie_id}/{self.type_id}>'
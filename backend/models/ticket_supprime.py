@@ -0,0 +1,21 @@
+from extensions import db
+
+# Trace des tickets supprimés pour la synchronisation incrémentale (GET /tickets/changes)
+class TicketSupprime(db.Model):
+    __tablename__ = 'tickets_supprimes'
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, nullable=False)
+    seq_modification = db.Column(db.BigInteger, nullable=False, index=True)
+    date_suppression = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<TicketSupprime {self.ticket_id}>'
+
+# Techniciens affectés au ticket au moment de sa suppression : suppressions visibles par
+# chacun dans GET /tickets/changes (comme les tickets pour scope_tickets)
+technicien_ticket_supprime = db.Table(
+    'technicien_ticket_supprime',
+    db.Column('ticket_supprime_id', db.Integer, db.ForeignKey('tickets_supprimes.id'), primary_key=True),
+    db.Column('technicien_id', db.Integer, primary_key=True, autoincrement=False),
+    db.Index('ix_technicien_ticket_supprime_technicien', 'technicien_id', 'ticket_supprime_id')
+)
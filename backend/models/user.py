@@ -1,5 +1,12 @@
 from extensions import db
 
+# Compétences des techniciens : catégories de tickets qu'ils traitent (affectation automatique)
+technicien_categorie = db.Table(
+    'technicien_categories',
+    db.Column('technicien_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    db.Column('categorie_id', db.Integer, db.ForeignKey('categories.id'), primary_key=True)
+)
+
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -7,6 +14,7 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     mot_de_passe = db.Column(db.String(128), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # admin, user, technicien
+    categories = db.relationship('Categorie', secondary=technicien_categorie)
     
     def __repr__(self):
         return f'<User {self.email}>' 
\ No newline at end of file
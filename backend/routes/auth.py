@@ -1,25 +1,59 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models.user import User
 from extensions import db
-from utils.auth import check_password
+from utils.auth import check_password, dummy_check, needs_rehash, hash_password, PasswordPoolBusy
+from utils.rate_limit import TokenBucketLimiter
 from flask_jwt_extended import create_access_token
-from schemas.user_schema import user_schema
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+def _limiters():
+    """Limiteurs de tentatives de connexion (par IP et par compte), un jeu par application."""
+    limiters = current_app.extensions.get('login_limiters')
+    if limiters is None:
+        fenetre = current_app.config['LOGIN_WINDOW_S']
+        limiters = current_app.extensions['login_limiters'] = (
+            TokenBucketLimiter(current_app.config['LOGIN_MAX_ATTEMPTS_IP'], fenetre),
+            TokenBucketLimiter(current_app.config['LOGIN_MAX_ATTEMPTS_ACCOUNT'], fenetre)
+        )
+    return limiters
+
+def _trop_de_requetes(msg, retry_after):
+    return jsonify({'msg': msg}), 429, {'Retry-After': str(max(1, round(retry_after)))}
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
     email = data.get('email')
-    password = data.get('password')
+    password = data.get('password') or ''
+    # un jeton par tentative, rendu si elle réussit : seuls les échecs sont limités.
+    # IP du client : request.remote_addr, corrigée par ProxyFix derrière un proxy (PROXY_FIX_X_FOR)
+    cles = tuple(zip(_limiters(), (request.remote_addr, (email or '').lower())))
+    for limiter, cle in cles:
+        autorise, retry_after = limiter.allow(cle)
+        if not autorise:
+            return _trop_de_requetes('Trop de tentatives, réessayez plus tard', retry_after)
     user = User.query.filter_by(email=email).first()
-    if not user or not check_password(password, user.mot_de_passe):
+    try:
+        # même coût bcrypt que l'utilisateur existe ou non
+        valide = check_password(password, user.mot_de_passe) if user else dummy_check(password)
+        if valide and needs_rehash(user.mot_de_passe):
+            user.mot_de_passe = hash_password(password)
+            db.session.commit()
+    except PasswordPoolBusy:
+        for limiter, cle in cles:
+            limiter.refund(cle)
+        return _trop_de_requetes('Serveur occupé, réessayez plus tard', 1)
+    if not valide:
         return jsonify({'msg': 'Identifiants invalides'}), 401
+    for limiter, cle in cles:
+        limiter.refund(cle)
     access_token = create_access_token(identity=str(user.id), additional_claims={
         'role': user.role,
         'user_id': user.id
     })
+    from schemas.user_schema import user_schema
     return jsonify({
         'access_token': access_token,
         'user': user_schema.dump(user)
-    }) 
\ No newline at end of file
+    })
@@ -0,0 +1,91 @@
+import os
+from flask import Blueprint, request, jsonify, g, send_file, url_for
+from sqlalchemy import select
+from models.job import Job
+from extensions import db
+from utils.decorators import role_required
+from utils.jobs import TACHES, submit_job, cancel_job, result_path
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+# Priorités de -10 à 10 ; au-dessus de 0, réservées aux admins
+PRIORITE_MAX = 10
+
+def _job_visible(job_id):
+    """La tâche si elle existe et appartient à l'utilisateur (toutes pour un admin)."""
+    job = db.session.get(Job, job_id)
+    if job is None or (g.role != 'admin' and job.cree_par != g.user_id):
+        return None
+    return job
+
+# POST /jobs {"type": "export"|"stats"|"rollup", "params": {...}, "priorite": 0}
+# (l'import passe par POST /import_export/import, qui reçoit le fichier)
+@jobs_bp.route('', methods=['POST'])
+@role_required(['admin', 'technicien', 'user'])
+def create_job():
+    data = request.get_json(silent=True) or {}
+    tache = TACHES.get(data.get('type'))
+    if tache is None or tache.valider is None:
+        return jsonify({'msg': f"Type de tâche invalide : {data.get('type')}"}), 400
+    if g.role not in tache.roles:
+        return jsonify({'msg': 'Accès interdit : rôle insuffisant'}), 403
+    priorite = data.get('priorite', tache.priorite)
+    if not isinstance(priorite, int) or not -PRIORITE_MAX <= priorite <= PRIORITE_MAX:
+        return jsonify({'msg': f'Priorité invalide (entier de {-PRIORITE_MAX} à {PRIORITE_MAX})'}), 400
+    if priorite > 0 and g.role != 'admin':
+        return jsonify({'msg': 'Priorité haute réservée aux admins'}), 403
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        return jsonify({'msg': 'params doit être un objet'}), 400
+    try:
+        params = tache.valider(params, {'role': g.role, 'user_id': g.user_id})
+    except ValueError as exc:
+        return jsonify({'msg': str(exc)}), 400
+    job = submit_job(data['type'], params, priorite, g.user_id)
+    return jsonify(job.to_dict()), 202, {'Location': url_for('jobs.get_job', job_id=job.id)}
+
+# GET /jobs?statut=&type= : 50 dernières tâches de l'utilisateur (de tous pour un admin)
+@jobs_bp.route('', methods=['GET'])
+@role_required(['admin', 'technicien', 'user'])
+def get_jobs():
+    query = select(Job).order_by(Job.cree_le.desc()).limit(50)
+    if g.role != 'admin':
+        query = query.where(Job.cree_par == g.user_id)
+    for param in ('statut', 'type'):
+        if request.args.get(param):
+            query = query.where(getattr(Job, param) == request.args[param])
+    return jsonify([job.to_dict() for job in db.session.execute(query).scalars()])
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@role_required(['admin', 'technicien', 'user'])
+def get_job(job_id):
+    job = _job_visible(job_id)
+    if job is None:
+        return jsonify({'msg': 'Tâche introuvable'}), 404
+    return jsonify(job.to_dict())
+
+# DELETE /jobs/<id> : annulation (immédiate en attente, au prochain checkpoint en cours)
+@jobs_bp.route('/<job_id>', methods=['DELETE'])
+@role_required(['admin', 'technicien', 'user'])
+def delete_job(job_id):
+    job = _job_visible(job_id)
+    if job is None:
+        return jsonify({'msg': 'Tâche introuvable'}), 404
+    if not cancel_job(job):
+        return jsonify({'msg': f'Tâche déjà terminée ({job.statut})'}), 409
+    db.session.refresh(job)
+    return jsonify(job.to_dict()), 202
+
+@jobs_bp.route('/<job_id>/resultat', methods=['GET'])
+@role_required(['admin', 'technicien', 'user'])
+def get_job_result(job_id):
+    job = _job_visible(job_id)
+    if job is None:
+        return jsonify({'msg': 'Tâche introuvable'}), 404
+    if job.statut != 'termine':
+        return jsonify({'msg': f'Tâche non terminée ({job.statut})'}), 409
+    chemin = result_path(job.id)
+    if job.resultat_nom is None or not os.path.exists(chemin):
+        return jsonify({'msg': 'Pas de résultat pour cette tâche'}), 404
+    return send_file(chemin, mimetype=job.resultat_type, as_attachment=True,
+                     download_name=job.resultat_nom)
@@ -0,0 +1,11 @@
+from flask import Blueprint, jsonify, current_app
+from utils.decorators import role_required
+from utils.database import pool_status
+
+monitoring_bp = Blueprint('monitoring', __name__, url_prefix='/monitoring')
+
+# GET /monitoring/pool : état des pools de connexions (admin)
+@monitoring_bp.route('/pool', methods=['GET'])
+@role_required(['admin'])
+def get_pool_status():
+    return jsonify(pool_status(current_app))
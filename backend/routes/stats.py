@@ -1,44 +1,254 @@
-from flask import Blueprint, jsonify
-from models.ticket import Ticket
+from flask import Blueprint, jsonify, current_app, request
+from models.ticket import Ticket, technicien_ticket
+from models.ticket_stats_daily import TicketStatsDaily
+from models.ticket_resolution_daily import TicketResolutionDaily
+from models.ticket_archive import TicketArchiveStats
+from models.statut import Statut
 from models.user import User
 from extensions import db
 from utils.decorators import role_required
+from utils.database import read_replica
+from utils.response_cache import cached_response
+from utils.reference_cache import reference_cache
+from utils.queries import scope_tickets, apply_ticket_filters, parse_date, parse_ids, sum_over_sources
+from utils.archive import TOUS
+from utils.sketch import classe_sql, quantile
+from utils.sql import duree_secondes, debut_periode, PERIODES
+from utils.jobs import job_task
 from flask_jwt_extended import get_jwt
-from sqlalchemy import func
-from datetime import datetime
+from sqlalchemy import func, select, case, union_all
+from collections import Counter, defaultdict
+from itertools import islice
+from datetime import datetime, timedelta, time
 
 stats_bp = Blueprint('stats', __name__, url_prefix='/stats')
 
-@stats_bp.route('', methods=['GET'])
-@role_required(['admin', 'technicien', 'user'])
-def get_stats():
-    claims = get_jwt()
-    user_id = claims.get('user_id')
-    role = claims.get('role')
-    query = Ticket.query
-    if role == 'technicien':
-        query = query.join(Ticket.techniciens).filter(User.id == user_id)
-    total = query.count()
-    resolus = query.filter(Ticket.statut.has(nom='Résolu')).count()
+def agregats_select(claims):
+    """Une seule requête GROUP BY (statut, catégorie) : nombre de tickets, nombre de tickets
+    avec date de résolution et somme des durées de résolution en secondes. Sans tables
+    d'agrégats, les tickets archivés sont lus dans ticket_archive_stats (lignes ajoutées
+    par UNION ALL, sommées par stats_payload)."""
+    if current_app.config.get('STATS_ROLLUP_ENABLED') and claims.get('role') != 'technicien':
+        t = TicketStatsDaily
+        return select(
+            t.statut_id, t.categorie_id,
+            func.sum(t.nb_tickets), func.sum(t.nb_avec_resolution), func.sum(t.duree_resolution_s)
+        ).group_by(t.statut_id, t.categorie_id)
+    courants = scope_tickets(select(
+        Ticket.statut_id, Ticket.categorie_id,
+        func.count(Ticket.id),
+        func.count(Ticket.date_resolution),
+        func.sum(duree_secondes(Ticket.date_d_ouverture, Ticket.date_resolution))
+    ), claims).group_by(Ticket.statut_id, Ticket.categorie_id)
+    a = TicketArchiveStats
+    archives = select(a.statut_id, a.categorie_id, a.nb_tickets, a.nb_avec_resolution, a.duree_resolution_s) \
+        .where(a.technicien_id == (claims.get('user_id') if claims.get('role') == 'technicien' else TOUS))
+    return union_all(courants, archives)
+
+def repartition_technicien_select(claims):
+    """Répartition par technicien (tables d'association et ticket_archive_stats)."""
+    a = TicketArchiveStats
+    comptes = union_all(
+        select(technicien_ticket.c.technicien_id.label('technicien_id'), func.count().label('nb'))
+        .group_by(technicien_ticket.c.technicien_id),
+        select(a.technicien_id, func.sum(a.nb_tickets)).where(a.technicien_id != TOUS).group_by(a.technicien_id)
+    ).subquery()
+    stmt = select(func.sum(comptes.c.nb), User.nom) \
+        .join(comptes, comptes.c.technicien_id == User.id) \
+        .group_by(User.nom)
+    if claims.get('role') == 'technicien':
+        stmt = stmt.filter(User.id == claims.get('user_id'))
+    return stmt
+
+def stats_payload(agregats, repartition_technicien):
+    """Corps de GET /stats à partir des lignes des deux requêtes ci-dessus."""
+    resolu_id = reference_cache.id_for(Statut, 'Résolu')
+    total = resolus = nb_delais = 0
+    somme_delais = 0.0
+    par_statut, par_categorie = Counter(), Counter()
+    for statut_id, categorie_id, nb, nb_res, duree in agregats:
+        nb = int(nb or 0)
+        total += nb
+        if statut_id == resolu_id:
+            resolus += nb
+        nb_delais += int(nb_res or 0)
+        somme_delais += float(duree or 0)
+        par_statut[statut_id] += nb
+        par_categorie[categorie_id] += nb
     # Temps moyen de résolution
-    delais = []
-    for t in query.filter(Ticket.date_resolution.isnot(None)).all():
-        if t.date_resolution and t.date_d_ouverture:
-            delais.append((t.date_resolution - t.date_d_ouverture).total_seconds())
-    temps_moyen = sum(delais) / len(delais) / 3600 if delais else 0
+    temps_moyen = somme_delais / nb_delais / 3600 if nb_delais else 0
     taux_resolution = (resolus / total * 100) if total else 0
-    # Répartition par statut
-    repartition_statut = db.session.query(func.count(Ticket.id), Ticket.statut_id).group_by(Ticket.statut_id).all()
-    # Répartition par catégorie
-    repartition_categorie = db.session.query(func.count(Ticket.id), Ticket.categorie_id).group_by(Ticket.categorie_id).all()
-    # Répartition par technicien
-    repartition_technicien = db.session.query(func.count(Ticket.id), User.nom).join(Ticket.techniciens).group_by(User.nom).all()
-    return jsonify({
+    return {
         'total_tickets': total,
         'tickets_resolus': resolus,
         'temps_moyen_resolution_h': round(temps_moyen, 2),
         'taux_resolution': round(taux_resolution, 2),
-        'repartition_statut': [{'statut_id': s[1], 'count': s[0]} for s in repartition_statut],
-        'repartition_categorie': [{'categorie_id': c[1], 'count': c[0]} for c in repartition_categorie],
-        'repartition_technicien': [{'technicien': t[1], 'count': t[0]} for t in repartition_technicien]
-    }) 
\ No newline at end of file
+        'repartition_statut': [{'statut_id': s, 'count': c} for s, c in sorted(par_statut.items()) if c],
+        'repartition_categorie': [{'categorie_id': s, 'count': c} for s, c in sorted(par_categorie.items()) if c],
+        'repartition_technicien': [{'technicien': t[1], 'count': int(t[0])} for t in repartition_technicien]
+    }
+
+@stats_bp.route('', methods=['GET'])
+@role_required(['admin', 'technicien', 'user'])
+@read_replica
+@cached_response('tickets', 'users', 'references')
+def get_stats():
+    claims = get_jwt()
+    return jsonify(stats_payload(
+        db.session.execute(agregats_select(claims)).all(),
+        db.session.execute(repartition_technicien_select(claims)).all()
+    ))
+
+# POST /jobs {"type": "stats"} : même calcul en tâche de fond, résultat JSON téléchargeable
+@job_task('stats', roles=('admin', 'technicien', 'user'), max_tentatives=3,
+          valider=lambda params, claims: {'claims': claims})
+def stats_job(job, claims):
+    payload = stats_payload(
+        db.session.execute(agregats_select(claims)).all(),
+        db.session.execute(repartition_technicien_select(claims)).all()
+    )
+    with job.fichier_resultat('stats.json', 'application/json') as sortie:
+        sortie.write(current_app.json.dumps(payload).encode('utf-8'))
+
+
+def _debuts_periodes(debut, fin, periode):
+    """Débuts des périodes couvrant [debut, fin], alignés comme debut_periode."""
+    if periode == 'semaine':
+        courant = debut - timedelta(days=debut.weekday())
+    elif periode == 'mois':
+        courant = debut.replace(day=1)
+    else:
+        courant = debut
+    while courant <= fin:
+        yield courant
+        if periode == 'jour':
+            courant += timedelta(days=1)
+        elif periode == 'semaine':
+            courant += timedelta(days=7)
+        else:
+            courant = (courant.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def _series_rollup(periode, debut, fin):
+    """Ouvertures, résolutions par classe de durée et backlog initial lus dans les tables d'agrégats."""
+    o, r = TicketStatsDaily, TicketResolutionDaily
+    filtres_o, filtres_r = [], []
+    for param in ('categorie_id', 'type_id'):
+        ids = parse_ids(request.args, param)
+        if ids:
+            filtres_o.append(getattr(o, param).in_(ids))
+            filtres_r.append(getattr(r, param).in_(ids))
+    periode_o = debut_periode(o.jour, periode)
+    ouvertures = db.session.execute(
+        select(periode_o, func.sum(o.nb_tickets))
+        .where(o.jour >= debut, o.jour <= fin, *filtres_o)
+        .group_by(periode_o)
+    ).all()
+    periode_r = debut_periode(r.jour, periode)
+    resolutions = db.session.execute(
+        select(periode_r, r.classe, func.sum(r.nb_resolus), func.sum(r.duree_resolution_s))
+        .where(r.jour >= debut, r.jour <= fin, *filtres_r)
+        .group_by(periode_r, r.classe)
+    ).all()
+    ouverts_avant = db.session.execute(
+        select(func.sum(o.nb_tickets)).where(o.jour < debut, *filtres_o)).scalar()
+    resolus_avant = db.session.execute(
+        select(func.sum(r.nb_resolus)).where(r.jour < debut, *filtres_r)).scalar()
+    return ouvertures, resolutions, int(ouverts_avant or 0) - int(resolus_avant or 0)
+
+def _series_tickets(claims, periode, debut, fin):
+    """Mêmes séries calculées directement sur les tickets courants et archivés (GROUP BY par
+    période sur chaque table, sommés)."""
+    borne_debut = datetime.combine(debut, time.min)
+    borne_fin = datetime.combine(fin + timedelta(days=1), time.min)
+
+    def filtres(stmt, source):
+        return apply_ticket_filters(scope_tickets(stmt, claims, source), request.args, dates=False, source=source)
+
+    def ouvertures(source):
+        modele = source[0]
+        periode_o = debut_periode(modele.date_d_ouverture, periode)
+        return filtres(
+            select(periode_o, func.count(modele.id))
+            .where(modele.date_d_ouverture >= borne_debut, modele.date_d_ouverture < borne_fin), source
+        ).group_by(periode_o)
+
+    def resolutions(source):
+        modele = source[0]
+        periode_r = debut_periode(modele.date_resolution, periode)
+        duree = duree_secondes(modele.date_d_ouverture, modele.date_resolution)
+        classe_duree = classe_sql(duree)
+        return filtres(
+            select(periode_r, classe_duree, func.count(modele.id), func.sum(duree))
+            .where(modele.date_resolution >= borne_debut, modele.date_resolution < borne_fin), source
+        ).group_by(periode_r, classe_duree)
+
+    def backlog(source):
+        modele = source[0]
+        return filtres(
+            select(func.count(modele.id) - func.count(case((modele.date_resolution < borne_debut, 1))))
+            .where(modele.date_d_ouverture < borne_debut), source
+        )
+
+    return (db.session.execute(sum_over_sources(ouvertures, 1)).all(),
+            db.session.execute(sum_over_sources(resolutions, 2)).all(),
+            int(db.session.execute(sum_over_sources(backlog, 0)).scalar() or 0))
+
+def _heures(secondes):
+    return round(secondes / 3600, 2) if secondes is not None else None
+
+# GET /stats/timeseries?periode=jour|semaine|mois&date_debut=&date_fin=
+# Filtres : categorie_id, type_id, technicien_id (répétables)
+@stats_bp.route('/timeseries', methods=['GET'])
+@role_required(['admin', 'technicien', 'user'])
+def get_timeseries():
+    claims = get_jwt()
+    periode = request.args.get('periode', 'jour')
+    if periode not in PERIODES:
+        return jsonify({'msg': f'Période invalide : {periode}'}), 400
+    try:
+        fin = parse_date(request.args['date_fin']).date() if request.args.get('date_fin') else datetime.utcnow().date()
+        debut = parse_date(request.args['date_debut']).date() if request.args.get('date_debut') else fin - timedelta(days=90)
+    except ValueError as exc:
+        return jsonify({'msg': str(exc)}), 400
+    max_periodes = current_app.config['STATS_TIMESERIES_MAX_PERIODS']
+    debuts = list(islice(_debuts_periodes(debut, fin, periode), max_periodes + 1))
+    if len(debuts) > max_periodes:
+        return jsonify({'msg': f'Intervalle trop long : {max_periodes} périodes au plus'}), 400
+    debut = debuts[0] if debuts else debut
+    rollup = current_app.config.get('STATS_ROLLUP_ENABLED') and claims.get('role') != 'technicien' \
+        and not any(request.args.get(k) for k in ('technicien_id', 'statut_id', 'demandeur'))
+    try:
+        if rollup:
+            ouvertures, resolutions, backlog = _series_rollup(periode, debut, fin)
+        else:
+            ouvertures, resolutions, backlog = _series_tickets(claims, periode, debut, fin)
+    except ValueError as exc:
+        return jsonify({'msg': str(exc)}), 400
+    nb_ouvertures = {str(p)[:10]: int(nb or 0) for p, nb in ouvertures}
+    histogrammes = defaultdict(Counter)
+    durees = Counter()
+    for p, indice, nb, duree in resolutions:
+        cle = str(p)[:10]
+        histogrammes[cle][int(indice)] += int(nb or 0)
+        durees[cle] += float(duree or 0)
+    series = []
+    for d in debuts:
+        cle = d.isoformat()
+        histogramme = histogrammes.get(cle, Counter())
+        nb_resolutions = sum(histogramme.values())
+        backlog += nb_ouvertures.get(cle, 0) - nb_resolutions
+        series.append({
+            'periode': cle,
+            'ouvertures': nb_ouvertures.get(cle, 0),
+            'resolutions': nb_resolutions,
+            'backlog': backlog,
+            'temps_moyen_resolution_h': _heures(durees[cle] / nb_resolutions) if nb_resolutions else None,
+            'temps_median_resolution_h': _heures(quantile(histogramme, 0.5)),
+            'temps_p90_resolution_h': _heures(quantile(histogramme, 0.9))
+        })
+    return jsonify({
+        'periode': periode,
+        'date_debut': debut.isoformat(),
+        'date_fin': fin.isoformat(),
+        'series': series
+    })
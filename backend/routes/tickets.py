@@ -1,44 +1,195 @@
-from flask import Blueprint, request, jsonify, abort
-from models.ticket import Ticket
+import queue
+from flask import Blueprint, Response, current_app, request, jsonify, abort, g
+from models.ticket import Ticket, technicien_ticket
+from models.ticket_archive import technicien_ticket_archive
+from models.ticket_supprime import TicketSupprime
 from models.user import User
 from models.categorie import Categorie
 from models.statut import Statut
 from models.type import Type
 from extensions import db
-from schemas.ticket_schema import ticket_schema, tickets_schema
+from schemas.ticket_serializer import Projection, colonnes_ticket, serialize_ticket_rows
 from utils.decorators import role_required
+from utils.database import read_replica
+from utils.response_cache import cached_response
+from utils.representation import tickets_response
+from utils.pagination import encode_cursor, decode_cursor, parse_limit, MAX_PAGE_SIZE, \
+    encode_sync_cursor, decode_sync_cursor
+from utils.change_tracking import current_versions
+from utils.queries import scope_tickets, scope_deletions, apply_ticket_filters, union_tickets, colonnes_source, ARCHIVES
+from utils.search import termes, search_select
+from utils.events import get_hub, publish_event, event_filter, format_sse, DECONNECTE
+from utils.ticket_batch import parse_operations, apply_batch
+from utils.workload import least_loaded
 from flask_jwt_extended import get_jwt_identity, get_jwt
+from sqlalchemy import select, func, or_, and_, literal_column, literal
 from datetime import datetime
 
 tickets_bp = Blueprint('tickets', __name__, url_prefix='/tickets')
 
 # GET /tickets : selon le rôle
+# Filtres : statut_id, categorie_id, type_id, technicien_id (répétables), date_debut, date_fin, demandeur
+# Pagination par curseur sur (date_d_ouverture, id) dès que `limit` ou `cursor` est fourni ;
+# le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor
+# `fields=id,titre,statut.nom,techniciens.nom` : champs renvoyés (et seules colonnes lues) ;
+# accepté aussi par /search, /changes et /tickets/<id>
 @tickets_bp.route('', methods=['GET'])
 @role_required(['admin', 'technicien', 'user'])
+@read_replica
+@cached_response('tickets', 'users', 'references')
 def get_tickets():
     claims = get_jwt()
-    user_id = claims.get('user_id')
-    role = claims.get('role')
-    if role == 'admin' or role == 'user':
-        tickets = Ticket.query.all()
-    elif role == 'technicien':
-        tickets = Ticket.query.join(Ticket.techniciens).filter(User.id == user_id).all()
+    try:
+        projection = Projection.parse(request.args.get('fields'))
+        query = scope_tickets(select(*colonnes_ticket(projection, Ticket.date_d_ouverture)), claims)
+        query = apply_ticket_filters(query, request.args)
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as exc:
+        return jsonify({'msg': str(exc)}), 400
+    query = query.order_by(Ticket.date_d_ouverture.desc(), Ticket.id.desc())
+    if cursor is None and 'limit' not in request.args:
+        return tickets_response(serialize_ticket_rows(db.session.execute(query).all(), projection))
+    if cursor is not None:
+        date_curseur, id_curseur = cursor
+        query = query.filter(or_(
+            Ticket.date_d_ouverture < date_curseur,
+            and_(Ticket.date_d_ouverture == date_curseur, Ticket.id < id_curseur)
+        ))
+    tickets = db.session.execute(query.limit(limit + 1)).all()
+    response = tickets_response(serialize_ticket_rows(tickets[:limit], projection))
+    if len(tickets) > limit:
+        dernier = tickets[limit - 1]
+        response.headers['X-Next-Cursor'] = encode_cursor(dernier.date_d_ouverture, dernier.id)
+    return response
+
+# GET /tickets/search?q= : recherche plein texte classée (titre, description, demandeur)
+# Mêmes filtres et même restriction par rôle que GET /tickets ; pagination par `limit`/`offset`
+@tickets_bp.route('/search', methods=['GET'])
+@role_required(['admin', 'technicien', 'user'])
+def search_tickets():
+    claims = get_jwt()
+    mots = termes(request.args.get('q'))
+    if not mots:
+        return jsonify({'msg': 'Paramètre q manquant'}), 400
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        offset = max(0, int(request.args.get('offset', 0)))
+        projection = Projection.parse(request.args.get('fields'))
+        query = search_select(db.engine.dialect.name, mots, colonnes_ticket(projection))
+        query = apply_ticket_filters(scope_tickets(query, claims), request.args)
+    except ValueError as exc:
+        return jsonify({'msg': str(exc)}), 400
+    query = query.order_by(literal_column('score').desc(), Ticket.id.desc()).limit(limit).offset(offset)
+    lignes = db.session.execute(query).all()
+    resultats = serialize_ticket_rows(lignes, projection)
+    for resultat, ligne in zip(resultats, lignes):
+        resultat['score'] = round(float(ligne.score), 4)
+    return tickets_response(resultats)
+
+# GET /tickets/changes?since=<curseur> : tickets créés ou modifiés depuis le curseur et ids des
+# tickets supprimés, dans l'ordre des commits. Sans `since`, renvoie tous les tickets.
+# Tant que `complet` est faux, rappeler avec le `cursor` renvoyé. Appliquer `supprimes` après `tickets`.
+@tickets_bp.route('/changes', methods=['GET'])
+@role_required(['admin', 'technicien', 'user'])
+def get_ticket_changes():
+    claims = get_jwt()
+    try:
+        seq, dernier_id = decode_sync_cursor(request.args.get('since'))
+        limit = parse_limit(request.args.get('limit'), default=MAX_PAGE_SIZE)
+        projection = Projection.parse(request.args.get('fields'))
+    except ValueError as exc:
+        return jsonify({'msg': str(exc)}), 400
+    version = current_versions('tickets')['tickets']
+    query = scope_tickets(select(*colonnes_ticket(projection, Ticket.seq_modification)), claims)
+    if dernier_id is None:
+        query = query.filter(Ticket.seq_modification > seq)
     else:
-        return abort(403)
-    return jsonify(tickets_schema.dump(tickets))
+        query = query.filter(or_(
+            Ticket.seq_modification > seq,
+            and_(Ticket.seq_modification == seq, Ticket.id > dernier_id)
+        ))
+    lignes = db.session.execute(
+        query.order_by(Ticket.seq_modification, Ticket.id).limit(limit + 1)).all()
+    complet = len(lignes) <= limit
+    lignes = lignes[:limit]
+    supprimes = scope_deletions(select(TicketSupprime.ticket_id), claims).where(TicketSupprime.seq_modification > seq)
+    if complet:
+        curseur = encode_sync_cursor(max([version, seq] + [l.seq_modification for l in lignes]))
+    else:
+        curseur = encode_sync_cursor(lignes[-1].seq_modification, lignes[-1].id)
+        supprimes = supprimes.where(TicketSupprime.seq_modification <= lignes[-1].seq_modification)
+    return tickets_response({
+        'tickets': serialize_ticket_rows(lignes, projection),
+        'supprimes': list(db.session.execute(supprimes.order_by(TicketSupprime.id)).scalars()),
+        'cursor': curseur,
+        'complet': complet
+    }, 'tickets')
+
+# GET /tickets/stream : flux SSE des créations, modifications, affectations et suppressions de tickets
+# (un technicien ne reçoit que les événements de ses tickets). Le jeton peut être passé en ?jwt=,
+# EventSource ne permettant pas d'en-tête Authorization. Sur événement `resync` (client trop lent)
+# ou après reconnexion, rattraper via GET /tickets/changes.
+@tickets_bp.route('/stream', methods=['GET'])
+@role_required(['admin', 'technicien', 'user'], locations=['headers', 'query_string'])
+def stream_tickets():
+    hub = get_hub()
+    subscription = hub.subscribe(event_filter(get_jwt()))
+    heartbeat = current_app.config.get('EVENTS_HEARTBEAT_S', 15)
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = subscription.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': ping\n\n'
+                    continue
+                if event is DECONNECTE:
+                    yield 'event: resync\ndata: {}\n\n'
+                    return
+                yield format_sse(event)
+        finally:
+            hub.unsubscribe(subscription)
 
-# GET /tickets/<id>
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# GET /tickets/<id> : ticket courant ou archivé (utils/archive.py)
 @tickets_bp.route('/<int:ticket_id>', methods=['GET'])
 @role_required(['admin', 'technicien', 'user'])
+@cached_response('tickets', 'users', 'references')
 def get_ticket(ticket_id):
-    ticket = Ticket.query.get_or_404(ticket_id)
-    return ticket_schema.dump(ticket)
+    try:
+        projection = Projection.parse(request.args.get('fields'))
+    except ValueError as exc:
+        return jsonify({'msg': str(exc)}), 400
+    colonnes = colonnes_ticket(projection)
+    ticket = db.session.execute(union_tickets(lambda source: select(
+        *colonnes_source(colonnes, source), literal(source is ARCHIVES).label('archive')
+    ).where(source[0].id == ticket_id))).first()
+    if ticket is None:
+        return abort(404)
+    association = technicien_ticket_archive if ticket.archive else technicien_ticket
+    return serialize_ticket_rows([ticket], projection, association)[0]
+
+def _techniciens(technicien_ids, categorie_id):
+    """Techniciens à affecter : les ids donnés, ou "auto" pour le technicien compétent
+    dans `categorie_id` ayant le moins de tickets ouverts (utils/workload.py)."""
+    if technicien_ids == 'auto':
+        technicien_id = least_loaded(categorie_id)
+        technicien_ids = [technicien_id] if technicien_id is not None else []
+    return User.query.filter(User.id.in_(technicien_ids)).all()
 
 # POST /tickets
+# "technicien_ids": [...] ou "auto"
 @tickets_bp.route('', methods=['POST'])
 @role_required(['admin'])
 def create_ticket():
     data = request.get_json()
+    # Choix du technicien avant toute modification de la session
+    techniciens = _techniciens(data['technicien_ids'], data['categorie_id']) if 'technicien_ids' in data else None
     ticket = Ticket(
         titre=data['titre'],
         description=data.get('description'),
@@ -51,24 +202,29 @@ def create_ticket():
         date_modification=datetime.utcnow()
     )
     # Ajout des techniciens
-    if 'technicien_ids' in data:
-        ticket.techniciens = User.query.filter(User.id.in_(data['technicien_ids'])).all()
+    if techniciens is not None:
+        ticket.techniciens = techniciens
     db.session.add(ticket)
     db.session.commit()
+    publish_event('ticket_cree', ticket_id=ticket.id, techniciens=[t.id for t in ticket.techniciens],
+                  seq=ticket.seq_modification)
+    from schemas.ticket_schema import ticket_schema
     return ticket_schema.dump(ticket), 201
 
-# PUT /tickets/<id>
+# PUT /tickets/<id> ("technicien_ids": "auto" comme pour la création)
 @tickets_bp.route('/<int:ticket_id>', methods=['PUT'])
 @role_required(['admin', 'technicien'])
 def update_ticket(ticket_id):
     ticket = Ticket.query.get_or_404(ticket_id)
     data = request.get_json()
-    claims = get_jwt()
-    role = claims.get('role')
-    user_id = claims.get('user_id')
+    role, user_id = g.role, g.user_id
     # Technicien ne peut modifier que le statut de ses tickets
-    if role == 'technicien' and user_id not in [t.id for t in ticket.techniciens]:
+    anciens = [t.id for t in ticket.techniciens]
+    if role == 'technicien' and user_id not in anciens:
         return abort(403)
+    techniciens = None
+    if 'technicien_ids' in data and role == 'admin':
+        techniciens = _techniciens(data['technicien_ids'], data.get('categorie_id', ticket.categorie_id))
     if 'titre' in data:
         ticket.titre = data['titre']
     if 'description' in data:
@@ -83,17 +239,53 @@ def update_ticket(ticket_id):
         ticket.departement_demandeur = data['departement_demandeur']
     if 'date_resolution' in data:
         ticket.date_resolution = data['date_resolution']
-    if 'technicien_ids' in data and role == 'admin':
-        ticket.techniciens = User.query.filter(User.id.in_(data['technicien_ids'])).all()
+    if techniciens is not None:
+        ticket.techniciens = techniciens
     ticket.date_modification = datetime.utcnow()
     db.session.commit()
+    nouveaux = [t.id for t in ticket.techniciens]
+    # une réaffectation est aussi notifiée aux techniciens retirés du ticket
+    publish_event('ticket_assigne' if set(nouveaux) != set(anciens) else 'ticket_modifie',
+                  ticket_id=ticket.id, techniciens=sorted(set(anciens) | set(nouveaux)),
+                  seq=ticket.seq_modification)
+    from schemas.ticket_schema import ticket_schema
     return ticket_schema.dump(ticket)
 
+# POST /tickets/batch : opérations groupées en une transaction, appliquées dans l'ordre
+# {"operations": [{"action": "statut", "ids": [...], "statut_id": 4},
+#                 {"action": "resolution", "ids": [...], "date_resolution": "2025-01-01T10:00:00" | null},
+#                 {"action": "techniciens", "ids": [...], "technicien_ids": [...]},   (admin)
+#                 {"action": "suppression", "ids": [...]}]}                          (admin)
+# Un technicien n'agit que sur ses tickets ; les autres sont renvoyés dans `interdits`
+@tickets_bp.route('/batch', methods=['POST'])
+@role_required(['admin', 'technicien'])
+def batch_tickets():
+    claims = get_jwt()
+    try:
+        operations = parse_operations(request.get_json(silent=True), g.role)
+    except ValueError as exc:
+        return jsonify({'msg': str(exc)}), 400
+    except PermissionError as exc:
+        return jsonify({'msg': str(exc)}), 403
+    try:
+        resultats, evenements = apply_batch(operations, claims, current_app.config.get('STATS_ROLLUP_ENABLED'))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    for type, ticket_id, techniciens, seq in evenements:
+        publish_event(type, ticket_id=ticket_id, techniciens=techniciens, seq=seq)
+    return jsonify({'resultats': resultats})
+
 # DELETE /tickets/<id>
 @tickets_bp.route('/<int:ticket_id>', methods=['DELETE'])
 @role_required(['admin'])
 def delete_ticket(ticket_id):
     ticket = Ticket.query.get_or_404(ticket_id)
+    techniciens = [t.id for t in ticket.techniciens]
     db.session.delete(ticket)
     db.session.commit()
+    seq = db.session.execute(select(func.max(TicketSupprime.seq_modification))
+                             .where(TicketSupprime.ticket_id == ticket_id)).scalar()
+    publish_event('ticket_supprime', ticket_id=ticket_id, techniciens=techniciens, seq=seq)
     return '', 204 
\ No newline at end of file
@@ -1,18 +1,44 @@
 from flask import Blueprint, request, jsonify, abort
+from sqlalchemy.orm import selectinload
 from models.user import User
+from models.categorie import Categorie
 from extensions import db
-from schemas.user_schema import user_schema, users_schema
 from utils.decorators import role_required
-from utils.auth import hash_password
+from utils.auth import hash_password, PasswordPoolBusy
+from utils.token_cache import revoke_user
+from utils.reference_cache import reference_cache
+from utils.workload import technician_loads
 
 users_bp = Blueprint('users', __name__, url_prefix='/users')
 
 @users_bp.route('', methods=['GET'])
 @role_required(['admin'])
 def get_users():
-    users = User.query.all()
+    users = User.query.options(selectinload(User.categories)).all()
+    from schemas.user_schema import users_schema
     return jsonify(users_schema.dump(users))
 
+def _categories(categorie_ids):
+    """Catégories de `categorie_ids` ; ValueError si l'une n'existe pas."""
+    if not isinstance(categorie_ids, list):
+        raise ValueError('categorie_ids doit être une liste')
+    connues = reference_cache.ids(Categorie)
+    for categorie_id in categorie_ids:
+        if categorie_id not in connues:
+            raise ValueError(f'Catégorie inconnue : {categorie_id}')
+    return Categorie.query.filter(Categorie.id.in_(categorie_ids)).all()
+
+# GET /users/technicians/load?categorie_id= : techniciens du moins au plus chargé (tickets
+# ouverts), limités à ceux compétents pour la catégorie si elle est donnée
+@users_bp.route('/technicians/load', methods=['GET'])
+@role_required(['admin'])
+def get_technician_loads():
+    categorie_id = request.args.get('categorie_id', type=int)
+    return jsonify(technician_loads(categorie_id))
+
+def _serveur_occupe():
+    return jsonify({'msg': 'Serveur occupé, réessayez plus tard'}), 429, {'Retry-After': '1'}
+
 @users_bp.route('', methods=['POST'])
 @role_required(['admin'])
 def create_user():
@@ -24,14 +50,24 @@ def create_user():
     password = data.get('mot_de_passe') or data.get('password')
     if not password:
         return jsonify({'msg': 'Le mot de passe est requis'}), 400
+    try:
+        mot_de_passe = hash_password(password)
+    except PasswordPoolBusy:
+        return _serveur_occupe()
     user = User(
         nom=data['nom'],
         email=data['email'],
-        mot_de_passe=hash_password(password),
+        mot_de_passe=mot_de_passe,
         role=data['role']
     )
+    if 'categorie_ids' in data:
+        try:
+            user.categories = _categories(data['categorie_ids'])
+        except ValueError as e:
+            return jsonify({'msg': str(e)}), 400
     db.session.add(user)
     db.session.commit()
+    from schemas.user_schema import user_schema
     return user_schema.dump(user), 201
 
 @users_bp.route('/<int:user_id>', methods=['PUT'])
@@ -42,9 +78,24 @@ def update_user(user_id):
     user.nom = data.get('nom', user.nom)
     user.email = data.get('email', user.email)
     if 'mot_de_passe' in data:
-        user.mot_de_passe = hash_password(data['mot_de_passe'])
+        try:
+            user.mot_de_passe = hash_password(data['mot_de_passe'])
+        except PasswordPoolBusy:
+            db.session.rollback()
+            return _serveur_occupe()
+    ancien_role = user.role
     user.role = data.get('role', user.role)
+    if 'categorie_ids' in data:
+        try:
+            user.categories = _categories(data['categorie_ids'])
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'msg': str(e)}), 400
     db.session.commit()
+    # les jetons émis portent l'ancien rôle
+    if user.role != ancien_role:
+        revoke_user(user.id)
+    from schemas.user_schema import user_schema
     return user_schema.dump(user)
 
 @users_bp.route('/<int:user_id>', methods=['DELETE'])
@@ -53,4 +104,5 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    revoke_user(user_id)
     return '', 204 
\ No newline at end of file
@@ -1,6 +1,8 @@
-from app import create_app
+from app import create_app, preload
 
 app = create_app()
+if app.config['APP_PRELOAD']:
+    preload(app)
 
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -4,19 +4,19 @@ from models.user import User
 from models.categorie import Categorie
 from models.statut import Statut
 from models.type import Type
-from schemas.categorie_schema import CategorieSchema
-from schemas.statut_schema import StatutSchema
-from schemas.type_schema import TypeSchema
 from schemas.user_schema import UserSchema
+from utils.reference_cache import reference_cache
 
 class TicketSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Ticket
         load_instance = True
         include_fk = True
-    categorie = ma.Nested(CategorieSchema, only=("id", "nom"))
-    statut = ma.Nested(StatutSchema, only=("id", "nom"))
-    type = ma.Nested(TypeSchema, only=("id", "nom"))
+        exclude = ("seq_modification",)
+    # Statut, catégorie et type servis par le cache de référence (ni jointure ni lazy load)
+    categorie = ma.Function(lambda ticket: reference_cache.get(Categorie, ticket.categorie_id))
+    statut = ma.Function(lambda ticket: reference_cache.get(Statut, ticket.statut_id))
+    type = ma.Function(lambda ticket: reference_cache.get(Type, ticket.type_id))
     techniciens = ma.Nested(UserSchema, only=("id", "nom", "email", "role"), many=True)
 
 ticket_schema = TicketSchema()
@@ -0,0 +1,158 @@
+from sqlalchemy import select
+from extensions import db
+from models.ticket import Ticket, technicien_ticket
+from models.user import User
+from models.categorie import Categorie
+from models.statut import Statut
+from models.type import Type
+from utils.reference_cache import reference_cache
+from utils.instrumentation import timed
+
+# Sérialisation directe des tickets, produisant exactement le même dictionnaire que
+# ticket_schema.dump() sans passer par marshmallow. Toute évolution de TicketSchema
+# doit être reportée ici.
+
+# Colonnes lues pour construire un ticket à partir d'une ligne SQL
+COLONNES = (
+    Ticket.id, Ticket.titre, Ticket.description, Ticket.date_d_ouverture, Ticket.demandeur,
+    Ticket.categorie_id, Ticket.statut_id, Ticket.type_id, Ticket.departement_demandeur,
+    Ticket.date_resolution, Ticket.date_modification
+)
+
+# Taille des lots d'ids pour le chargement des techniciens (limite de paramètres SQLite)
+IN_BATCH_SIZE = 500
+
+def _date(value):
+    return value.isoformat() if value is not None else None
+
+def serialize_technicien(user):
+    return {'email': user.email, 'id': user.id, 'nom': user.nom, 'role': user.role}
+
+def serialize_ticket(ticket, techniciens=None):
+    """Ticket (objet ORM ou ligne SELECT sur COLONNES) vers dict.
+    `techniciens` : liste déjà sérialisée ; par défaut lue sur ticket.techniciens."""
+    if techniciens is None:
+        techniciens = [serialize_technicien(u) for u in ticket.techniciens]
+    return {
+        'categorie': reference_cache.get(Categorie, ticket.categorie_id),
+        'categorie_id': ticket.categorie_id,
+        'date_d_ouverture': _date(ticket.date_d_ouverture),
+        'date_modification': _date(ticket.date_modification),
+        'date_resolution': _date(ticket.date_resolution),
+        'demandeur': ticket.demandeur,
+        'departement_demandeur': ticket.departement_demandeur,
+        'description': ticket.description,
+        'id': ticket.id,
+        'statut': reference_cache.get(Statut, ticket.statut_id),
+        'statut_id': ticket.statut_id,
+        'techniciens': techniciens,
+        'titre': ticket.titre,
+        'type': reference_cache.get(Type, ticket.type_id),
+        'type_id': ticket.type_id
+    }
+
+def techniciens_par_ticket(ticket_ids, association=technicien_ticket):
+    """{ticket_id: [technicien sérialisé, ...]} en une requête par lot d'ids (`association` :
+    technicien_ticket_archive pour des tickets archivés)."""
+    resultat = {}
+    for debut in range(0, len(ticket_ids), IN_BATCH_SIZE):
+        lot = ticket_ids[debut:debut + IN_BATCH_SIZE]
+        lignes = db.session.execute(
+            select(association.c.ticket_id, User.id, User.nom, User.email, User.role)
+            .join(User, User.id == association.c.technicien_id)
+            .where(association.c.ticket_id.in_(lot))
+            .order_by(association.c.ticket_id, User.id)
+        )
+        for ticket_id, id, nom, email, role in lignes:
+            resultat.setdefault(ticket_id, []).append({'email': email, 'id': id, 'nom': nom, 'role': role})
+    return resultat
+
+@timed('serialisation')
+def serialize_ticket_rows(rows, projection=None, association=technicien_ticket):
+    """Lignes SELECT sur colonnes_ticket(projection) vers liste de dicts, techniciens
+    chargés par lots."""
+    if projection is not None:
+        return projection.serialize(rows, association)
+    techniciens = techniciens_par_ticket([row.id for row in rows], association)
+    return [serialize_ticket(row, techniciens.get(row.id, [])) for row in rows]
+
+# Projection (`fields=`) : champ -> colonne lue pour le produire (techniciens : requête à part)
+_SOURCES = {
+    'categorie': Ticket.categorie_id, 'categorie_id': Ticket.categorie_id,
+    'date_d_ouverture': Ticket.date_d_ouverture, 'date_modification': Ticket.date_modification,
+    'date_resolution': Ticket.date_resolution, 'demandeur': Ticket.demandeur,
+    'departement_demandeur': Ticket.departement_demandeur, 'description': Ticket.description,
+    'id': Ticket.id, 'statut': Ticket.statut_id, 'statut_id': Ticket.statut_id,
+    'techniciens': None, 'titre': Ticket.titre, 'type': Ticket.type_id, 'type_id': Ticket.type_id
+}
+_REFERENCES = {'categorie': Categorie, 'statut': Statut, 'type': Type}
+# Sous-champs des objets imbriqués (`statut.nom`, `techniciens.nom`...)
+_SOUS_CHAMPS = {'categorie': ('id', 'nom'), 'statut': ('id', 'nom'), 'type': ('id', 'nom'),
+                'techniciens': ('email', 'id', 'nom', 'role')}
+
+def _sous_objet(objet, sous_champs):
+    return {cle: objet[cle] for cle in sous_champs} if objet is not None else None
+
+def _extracteur(nom, sous_champs):
+    """Fonction (ligne, techniciens par ticket) -> valeur du champ `nom`."""
+    if nom in _REFERENCES:
+        model, colonne = _REFERENCES[nom], _SOURCES[nom].key
+        if sous_champs is None:
+            return lambda row, techniciens: reference_cache.get(model, getattr(row, colonne))
+        return lambda row, techniciens: _sous_objet(reference_cache.get(model, getattr(row, colonne)), sous_champs)
+    if nom == 'techniciens':
+        if sous_champs is None:
+            return lambda row, techniciens: techniciens.get(row.id, [])
+        return lambda row, techniciens: [_sous_objet(u, sous_champs) for u in techniciens.get(row.id, [])]
+    if nom.startswith('date_'):
+        return lambda row, techniciens: _date(getattr(row, nom))
+    return lambda row, techniciens: getattr(row, nom)
+
+class Projection:
+    """Champs demandés par `fields=id,titre,statut.nom,...` : colonnes à lire et
+    sérialisation réduite à ces champs (id toujours inclus). Sans `fields`, les vues
+    gardent COLONNES et serialize_ticket_rows complet."""
+
+    def __init__(self, champs):
+        # {champ: None (objet complet) ou tuple de sous-champs}
+        self.champs = champs
+        self.extracteurs = [(nom, _extracteur(nom, sous_champs)) for nom, sous_champs in champs.items()]
+
+    @classmethod
+    def parse(cls, valeur):
+        """Projection de la valeur de `fields`, None si absente ; ValueError sur un champ inconnu."""
+        if not valeur:
+            return None
+        champs = {'id': None}
+        for element in valeur.split(','):
+            element = element.strip()
+            nom, _, sous_champ = element.partition('.')
+            if nom not in _SOURCES or (sous_champ and sous_champ not in _SOUS_CHAMPS.get(nom, ())):
+                raise ValueError(f'Champ inconnu : {element}')
+            if not sous_champ:
+                champs[nom] = None
+            elif champs.get(nom, ()) is not None and sous_champ not in champs.get(nom, ()):
+                champs[nom] = champs.get(nom, ()) + (sous_champ,)
+        return cls(champs)
+
+    def colonnes(self, *requises):
+        """Colonnes du SELECT : celles des champs demandés plus `requises` (tri, curseur)."""
+        return _sans_doublons([_SOURCES[nom] for nom in self.champs] + list(requises))
+
+    def serialize(self, rows, association=technicien_ticket):
+        techniciens = techniciens_par_ticket([row.id for row in rows], association) \
+            if 'techniciens' in self.champs else {}
+        return [{nom: extracteur(row, techniciens) for nom, extracteur in self.extracteurs} for row in rows]
+
+def _sans_doublons(colonnes):
+    resultat = []
+    for colonne in colonnes:
+        if colonne is not None and not any(colonne is c for c in resultat):
+            resultat.append(colonne)
+    return tuple(resultat)
+
+def colonnes_ticket(projection, *requises):
+    """Colonnes à lire pour `projection` (COLONNES si None) plus `requises`."""
+    if projection is None:
+        return _sans_doublons(COLONNES + requises)
+    return projection.colonnes(*requises)
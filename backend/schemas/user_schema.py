@@ -6,6 +6,8 @@ class UserSchema(ma.SQLAlchemyAutoSchema):
         model = User
         load_instance = True
         exclude = ("mot_de_passe",)
+    # Compétences (affectation automatique des tickets)
+    categorie_ids = ma.Function(lambda user: sorted(c.id for c in user.categories))
 
 user_schema = UserSchema()
 users_schema = UserSchema(many=True) 
\ No newline at end of file
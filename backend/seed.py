@@ -1,3 +1,4 @@
+import sys
 from app import create_app
 from extensions import db
 from models.user import User
@@ -47,4 +48,9 @@ with app.app_context():
     t1.techniciens.append(tech)
     db.session.add(t1)
     db.session.commit()
+
+    # python seed.py 100k : ajoute des tickets synthétiques (voir benchmarks/dataset.py)
+    if len(sys.argv) > 1:
+        from benchmarks.dataset import taille, inserer_tickets
+        inserer_tickets(taille(sys.argv[1]))
     print('Base de test initialisée.') 
\ No newline at end of file
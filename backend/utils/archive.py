@@ -0,0 +1,119 @@
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, insert, delete, func, literal
+from extensions import db
+from models.ticket import Ticket, technicien_ticket
+from models.ticket_archive import TicketArchive, technicien_ticket_archive, TicketArchiveStats
+from models.statut import Statut
+from utils.reference_cache import reference_cache
+from utils.change_tracking import bump_versions, record_deletions
+from utils.stats_rollup import _upsert
+from utils.sql import duree_secondes
+from utils.jobs import job_task
+
+# Archivage des tickets résolus depuis plus de ARCHIVE_AGE_DAYS : déplacés par lots (une
+# transaction par lot) de tickets / technicien_ticket vers tickets_archive /
+# technicien_ticket_archive. Ils restent lisibles par GET /tickets/<id> et les exports
+# (utils/queries.py:union_tickets) ; leur contribution à GET /stats est reportée dans
+# ticket_archive_stats, celle aux tables d'agrégats journaliers y reste telle quelle.
+# Pour GET /tickets/changes, un ticket archivé sort des tickets courants comme un ticket
+# supprimé.
+
+# Colonnes communes à tickets et tickets_archive
+COLONNES = tuple(c.key for c in Ticket.__table__.columns)
+COMPTEURS = ('nb_tickets', 'nb_avec_resolution', 'duree_resolution_s')
+_CLE = ('technicien_id', 'statut_id', 'categorie_id')
+# technicien_id des lignes de ticket_archive_stats comptant tous les tickets archivés
+TOUS = 0
+
+def archivables_select(avant, taille_lot):
+    """Ids du prochain lot de tickets résolus avant `avant`."""
+    resolu_id = reference_cache.id_for(Statut, 'Résolu')
+    return select(Ticket.id).where(
+        Ticket.statut_id == resolu_id, Ticket.date_resolution < avant
+    ).order_by(Ticket.date_resolution, Ticket.id).limit(taille_lot).with_for_update()
+
+def _agregats(ids, *cles):
+    duree = duree_secondes(Ticket.date_d_ouverture, Ticket.date_resolution)
+    stmt = select(*cles, Ticket.statut_id, Ticket.categorie_id, func.count(Ticket.id),
+                  func.count(Ticket.date_resolution), func.coalesce(func.sum(duree), 0))
+    if cles:
+        stmt = stmt.join(technicien_ticket, technicien_ticket.c.ticket_id == Ticket.id)
+    return stmt.where(Ticket.id.in_(ids)).group_by(*cles, Ticket.statut_id, Ticket.categorie_id)
+
+def move_tickets(connection, ids):
+    """Déplace les tickets `ids` (et leurs affectations) vers les tables d'archive, dans la
+    transaction de `connection`."""
+    lignes = [(TOUS,) + tuple(ligne) for ligne in connection.execute(_agregats(ids))]
+    lignes += connection.execute(_agregats(ids, technicien_ticket.c.technicien_id)).all()
+    _upsert(connection, TicketArchiveStats.__table__, _CLE, COMPTEURS,
+            [dict(zip(_CLE + COMPTEURS, ligne)) for ligne in lignes])
+    connection.execute(insert(TicketArchive.__table__).from_select(
+        COLONNES + ('date_archivage',),
+        select(*(Ticket.__table__.c[nom] for nom in COLONNES), literal(datetime.utcnow(), db.DateTime))
+        .where(Ticket.id.in_(ids))))
+    connection.execute(insert(technicien_ticket_archive).from_select(
+        ['ticket_id', 'technicien_id'],
+        select(technicien_ticket.c.ticket_id, technicien_ticket.c.technicien_id)
+        .where(technicien_ticket.c.ticket_id.in_(ids))))
+    record_deletions(connection, ids, bump_versions(connection, 'tickets')['tickets'])
+    connection.execute(delete(technicien_ticket).where(technicien_ticket.c.ticket_id.in_(ids)))
+    connection.execute(delete(Ticket.__table__).where(Ticket.id.in_(ids)))
+
+def archive_tickets(age_jours, taille_lot):
+    """Archive les tickets résolus depuis plus de `age_jours` jours, `taille_lot` par
+    transaction ; génère le nombre de tickets de chaque lot commité."""
+    avant = datetime.utcnow() - timedelta(days=age_jours)
+    while True:
+        connection = db.session.connection()
+        ids = connection.execute(archivables_select(avant, taille_lot)).scalars().all()
+        if not ids:
+            db.session.rollback()
+            return
+        move_tickets(connection, ids)
+        db.session.commit()
+        yield len(ids)
+
+def rebuild_archive_stats():
+    """Reconstruit ticket_archive_stats depuis les tables d'archive."""
+    t, a = TicketArchive, technicien_ticket_archive
+    duree = func.coalesce(func.sum(duree_secondes(t.date_d_ouverture, t.date_resolution)), 0)
+    compteurs = (func.count(t.id), func.count(t.date_resolution), duree)
+    table = TicketArchiveStats.__table__
+    db.session.execute(delete(table))
+    db.session.execute(insert(table).from_select(list(_CLE) + list(COMPTEURS), select(
+        literal(TOUS), t.statut_id, t.categorie_id, *compteurs).group_by(t.statut_id, t.categorie_id)))
+    db.session.execute(insert(table).from_select(list(_CLE) + list(COMPTEURS), select(
+        a.c.technicien_id, t.statut_id, t.categorie_id, *compteurs)
+        .join(a, a.c.ticket_id == t.id).group_by(a.c.technicien_id, t.statut_id, t.categorie_id)))
+    db.session.commit()
+
+def _valider_archivage(params, claims):
+    age_jours = params.get('age_jours', current_app.config['ARCHIVE_AGE_DAYS'])
+    if not isinstance(age_jours, int) or age_jours < 0:
+        raise ValueError('age_jours doit être un entier positif')
+    return {'age_jours': age_jours}
+
+# POST /jobs {"type": "archivage", "params": {"age_jours": 365}} (admin)
+@job_task('archivage', max_tentatives=3, priorite=-5, valider=_valider_archivage)
+def archive_job(job, age_jours):
+    job.progression = {'tickets': 0}
+    for nb in archive_tickets(age_jours, current_app.config['ARCHIVE_BATCH_SIZE']):
+        job.progression['tickets'] += nb
+        job.checkpoint()
+
+def init_archive(app):
+    @app.cli.command('archive-tickets')
+    @click.option('--age-jours', type=int, default=None, help='Âge minimal de la résolution (ARCHIVE_AGE_DAYS)')
+    def archive_tickets_command(age_jours):
+        """Archive les tickets résolus anciens."""
+        age_jours = app.config['ARCHIVE_AGE_DAYS'] if age_jours is None else age_jours
+        total = sum(archive_tickets(age_jours, app.config['ARCHIVE_BATCH_SIZE']))
+        print(f'{total} tickets archivés.')
+
+    @app.cli.command('rebuild-archive-stats')
+    def rebuild_archive_stats_command():
+        """Reconstruit la table ticket_archive_stats."""
+        rebuild_archive_stats()
+        print('Agrégats des tickets archivés reconstruits.')
@@ -1,7 +1,70 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import bcrypt
+from flask import current_app, has_app_context
+from utils.instrumentation import section
+
+# bcrypt est exécuté dans un pool borné : au plus BCRYPT_WORKERS calculs simultanés et
+# BCRYPT_MAX_QUEUE demandes en attente, au-delà PasswordPoolBusy est levée (429 côté route)
+DEFAULT_ROUNDS = 12
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_QUEUE = 32
+
+class PasswordPoolBusy(Exception):
+    pass
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+_dummy_hashes = {}
+
+def _config(key, default):
+    return current_app.config.get(key, default) if has_app_context() else default
+
+def _get_pool():
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = _config('BCRYPT_WORKERS', DEFAULT_WORKERS)
+                _slots = threading.BoundedSemaphore(workers + _config('BCRYPT_MAX_QUEUE', DEFAULT_MAX_QUEUE))
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+    return _pool, _slots
+
+def _run(fn, *args):
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordPoolBusy()
+    try:
+        with section('bcrypt'):
+            return pool.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+def rounds() -> int:
+    return _config('BCRYPT_ROUNDS', DEFAULT_ROUNDS)
 
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    salt = bcrypt.gensalt(rounds())
+    return _run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
 
 def check_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8')) 
\ No newline at end of file
+    return _run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+def dummy_check(password: str) -> bool:
+    """Vérification factice au coût configuré, pour qu'un email inconnu prenne le même
+    temps qu'un mot de passe erroné. Renvoie toujours False."""
+    cout = rounds()
+    if cout not in _dummy_hashes:
+        # sel aléatoire et empreinte arbitraire : hash bien formé, vérifié au coût `cout`
+        # comme un vrai, sans avoir à en calculer un (aucun bcrypt hors du pool)
+        _dummy_hashes[cout] = bcrypt.gensalt(cout) + b'.' * 31
+    _run(bcrypt.checkpw, password.encode('utf-8'), _dummy_hashes[cout])
+    return False
+
+def needs_rehash(hashed: str) -> bool:
+    """Vrai si le hash a été calculé avec un coût différent de BCRYPT_ROUNDS."""
+    try:
+        return int(hashed.split('$')[2]) != rounds()
+    except (IndexError, ValueError):
+        return True
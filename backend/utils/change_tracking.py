@@ -0,0 +1,102 @@
+from datetime import datetime
+from sqlalchemy import event, select, update, insert
+from extensions import db
+from models.ticket import Ticket, technicien_ticket
+from models.user import User
+from models.statut import Statut
+from models.categorie import Categorie
+from models.type import Type
+from models.table_version import TableVersion
+from models.ticket_supprime import TicketSupprime, technicien_ticket_supprime
+
+# Groupe de tables incrémenté pour chaque modèle écrit via l'ORM
+GROUPES = {
+    Ticket: 'tickets',
+    User: 'users',
+    Statut: 'references',
+    Categorie: 'references',
+    Type: 'references',
+}
+
+def bump_versions(connection, *noms):
+    """Incrémente les compteurs `noms` dans la transaction de `connection` et renvoie
+    {nom: nouvelle version}. À appeler pour toute écriture hors ORM (insertions ou mises
+    à jour en masse). La ligne du compteur reste verrouillée jusqu'au commit, ce qui
+    ordonne les versions comme les commits."""
+    table = TableVersion.__table__
+    versions = {}
+    for nom in sorted(set(noms)):
+        result = connection.execute(
+            update(table).where(table.c.nom == nom).values(version=table.c.version + 1))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(nom=nom, version=1))
+        versions[nom] = connection.execute(select(table.c.version).where(table.c.nom == nom)).scalar()
+    return versions
+
+# Taille des lots d'ids dans les clauses IN (limite de paramètres SQLite)
+IN_BATCH_SIZE = 500
+
+def record_deletions(connection, ticket_ids, seq):
+    """Trace la suppression des tickets `ticket_ids` à la version `seq`, avec leurs
+    techniciens : à appeler avant de supprimer les lignes de technicien_ticket."""
+    maintenant = datetime.utcnow()
+    connection.execute(insert(TicketSupprime.__table__), [
+        {'ticket_id': ticket_id, 'seq_modification': seq, 'date_suppression': maintenant}
+        for ticket_id in ticket_ids
+    ])
+    for debut in range(0, len(ticket_ids), IN_BATCH_SIZE):
+        lot = ticket_ids[debut:debut + IN_BATCH_SIZE]
+        connection.execute(insert(technicien_ticket_supprime).from_select(
+            ['ticket_supprime_id', 'technicien_id'],
+            select(TicketSupprime.id, technicien_ticket.c.technicien_id)
+            .join(technicien_ticket, technicien_ticket.c.ticket_id == TicketSupprime.ticket_id)
+            .where(TicketSupprime.seq_modification == seq, TicketSupprime.ticket_id.in_(lot))))
+
+def _versions_select(noms):
+    return select(TableVersion.nom, TableVersion.version).where(TableVersion.nom.in_(noms))
+
+def current_versions(*noms):
+    """{nom: version} des groupes demandés (0 si jamais modifié), en une requête."""
+    versions = dict.fromkeys(noms, 0)
+    versions.update(db.session.execute(_versions_select(noms)).all())
+    return versions
+
+async def current_versions_async(connection, *noms):
+    """current_versions sur une AsyncConnection."""
+    versions = dict.fromkeys(noms, 0)
+    versions.update((await connection.execute(_versions_select(noms))).all())
+    return versions
+
+def _before_flush(session, flush_context, instances):
+    noms = set()
+    tickets_ecrits, tickets_supprimes = [], []
+    for obj in session.new:
+        nom = GROUPES.get(type(obj))
+        if nom:
+            noms.add(nom)
+            if nom == 'tickets':
+                tickets_ecrits.append(obj)
+    for obj in session.dirty:
+        nom = GROUPES.get(type(obj))
+        if nom and session.is_modified(obj):
+            noms.add(nom)
+            if nom == 'tickets':
+                tickets_ecrits.append(obj)
+    for obj in session.deleted:
+        nom = GROUPES.get(type(obj))
+        if nom:
+            noms.add(nom)
+            if nom == 'tickets':
+                tickets_supprimes.append(obj.id)
+    if not noms:
+        return
+    connection = session.connection()
+    versions = bump_versions(connection, *noms)
+    for ticket in tickets_ecrits:
+        ticket.seq_modification = versions['tickets']
+    if tickets_supprimes:
+        record_deletions(connection, tickets_supprimes, versions['tickets'])
+
+def init_change_tracking(app):
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
@@ -0,0 +1,133 @@
+import importlib
+import zlib
+from flask import current_app, request
+from werkzeug.http import parse_accept_header
+
+# Compression des réponses négociée par Accept-Encoding : zstd et br si les paquets optionnels
+# `zstandard` et `brotli` sont installés, gzip sinon. Les réponses en flux (export) sont
+# compressées morceau par morceau, chaque morceau étant vidé pour rester décodable aussitôt.
+
+# Préférence du serveur à qualité égale dans Accept-Encoding
+ORDRE = ('zstd', 'br', 'gzip')
+# Niveaux adaptés à du contenu dynamique (compression à chaque requête)
+NIVEAUX = {'zstd': 3, 'br': 4, 'gzip': 6}
+MODULES = {'zstd': 'zstandard', 'br': 'brotli'}
+# Flux SSE (un événement doit partir dès qu'il est émis) et formats déjà compressés
+EXCLUS = {'text/event-stream', 'application/vnd.apache.parquet', 'application/zip', 'application/gzip'}
+
+_disponibles = None
+
+def disponibles():
+    """Encodages utilisables dans ce processus, par ordre de préférence."""
+    global _disponibles
+    if _disponibles is None:
+        encodages = []
+        for encodage in ORDRE:
+            try:
+                if encodage in MODULES:
+                    importlib.import_module(MODULES[encodage])
+                encodages.append(encodage)
+            except ImportError:
+                pass
+        _disponibles = tuple(encodages)
+    return _disponibles
+
+def choose_encoding(accept_encoding):
+    """Encodage à utiliser pour cette valeur d'Accept-Encoding, None pour identity."""
+    acceptes = parse_accept_header(accept_encoding)
+    candidats = [(acceptes[encodage], -rang, encodage)
+                 for rang, encodage in enumerate(disponibles()) if acceptes[encodage] > 0]
+    return max(candidats)[2] if candidats else None
+
+def negotiated_encoding():
+    """Encodage de la réponse à la requête courante (None si compression désactivée)."""
+    if not current_app.config.get('COMPRESSION_ENABLED'):
+        return None
+    return choose_encoding(request.headers.get('Accept-Encoding', ''))
+
+class Compresseur:
+    """Compression incrémentale : `morceau()` renvoie des octets que le client peut décoder
+    immédiatement, `fin()` termine le flux."""
+
+    def __init__(self, encodage):
+        niveau = NIVEAUX[encodage]
+        if encodage == 'gzip':
+            objet = zlib.compressobj(niveau, zlib.DEFLATED, 31)
+            self._compresser, self._finir = objet.compress, objet.flush
+            self._vider = lambda: objet.flush(zlib.Z_SYNC_FLUSH)
+        elif encodage == 'br':
+            import brotli
+            objet = brotli.Compressor(quality=niveau)
+            self._compresser, self._vider, self._finir = objet.process, objet.flush, objet.finish
+        else:
+            import zstandard
+            objet = zstandard.ZstdCompressor(level=niveau).compressobj()
+            self._compresser, self._finir = objet.compress, objet.flush
+            self._vider = lambda: objet.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def morceau(self, donnees):
+        return self._compresser(donnees) + self._vider()
+
+    def fin(self):
+        return self._finir()
+
+    def tout(self, donnees):
+        return self._compresser(donnees) + self._finir()
+
+def compress_stream(morceaux, encodage):
+    """Flux compressé de `morceaux` (bytes ou str) ; ferme le flux d'origine."""
+    compresseur = Compresseur(encodage)
+    try:
+        for donnees in morceaux:
+            if isinstance(donnees, str):
+                donnees = donnees.encode('utf-8')
+            if donnees:
+                yield compresseur.morceau(donnees)
+        yield compresseur.fin()
+    finally:
+        if hasattr(morceaux, 'close'):
+            morceaux.close()
+
+async def compress_stream_async(morceaux, encodage):
+    compresseur = Compresseur(encodage)
+    async for donnees in morceaux:
+        if isinstance(donnees, str):
+            donnees = donnees.encode('utf-8')
+        if donnees:
+            yield compresseur.morceau(donnees)
+    yield compresseur.fin()
+
+def _compressible(response):
+    return (200 <= response.status_code < 300 and response.status_code != 204
+            and not response.direct_passthrough and 'Content-Encoding' not in response.headers
+            and response.mimetype not in EXCLUS)
+
+def compress_response(response, encodage):
+    """Compresse `response` sur place avec `encodage` si elle s'y prête (corps d'au moins
+    COMPRESSION_MIN_BYTES, ou flux) ; renvoie True si elle a été compressée."""
+    if not _compressible(response):
+        return False
+    if current_app.config.get('COMPRESSION_ENABLED'):
+        response.vary.add('Accept-Encoding')
+    if encodage is None:
+        return False
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encodage)
+        response.headers.pop('Content-Length', None)
+    else:
+        corps = response.get_data()
+        if len(corps) < current_app.config.get('COMPRESSION_MIN_BYTES', 1024):
+            return False
+        response.set_data(Compresseur(encodage).tout(corps))
+    response.headers['Content-Encoding'] = encodage
+    return True
+
+def init_compression(app):
+    if not app.config.get('COMPRESSION_ENABLED'):
+        return
+
+    @app.after_request
+    def _compresser(response):
+        # les réponses du cache (utils/response_cache.py) arrivent déjà compressées
+        compress_response(response, negotiated_encoding())
+        return response
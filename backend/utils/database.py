@@ -0,0 +1,132 @@
+from functools import wraps
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Réglages des moteurs SQLAlchemy : pool, pragmas SQLite, réplique de lecture, métriques du pool
+
+REPLICA = 'replica'
+# Pilotes asynchrones (point d'entrée ASGI) par dialecte
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'mysql': 'mysql+asyncmy'}
+# Options de QueuePool, sans effet (et refusées) avec le StaticPool d'une base SQLite en mémoire
+_OPTIONS_POOL = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle')
+
+class RoutingSession(Session):
+    """Session qui envoie les SELECT vers la réplique de lecture pendant les requêtes
+    décorées par @read_replica. Les flush et les écritures Core restent sur le primaire."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context() and g.get('read_replica')
+                and getattr(clause, 'is_select', False) and REPLICA in self._db.engines):
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def read_replica(fn):
+    """Route les lectures de la vue vers la réplique (DATABASE_REPLICA_URI) si elle est
+    configurée. La réplique peut être en retard : réserver aux vues en lecture seule."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.read_replica = True
+        return fn(*args, **kwargs)
+    return wrapper
+
+def is_memory_database(uri):
+    """Vrai pour une base SQLite en mémoire, propre au processus qui l'ouvre."""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def _options(uri, options):
+    options = dict(options)
+    if is_memory_database(uri):
+        for option in _OPTIONS_POOL:
+            options.pop(option, None)
+    return options
+
+def prepare_engine_options(app):
+    """Ajoute la réplique aux binds avec les mêmes options de pool que le primaire et retire
+    les options inapplicables ; à appeler avant db.init_app."""
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    replica = app.config.get('DATABASE_REPLICA_URI')
+    if replica:
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        binds.setdefault(REPLICA, dict(_options(replica, options), url=replica))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _options(app.config['SQLALCHEMY_DATABASE_URI'], options)
+
+def _pragmas(config):
+    pragmas = [
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE', 'WAL')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        # valeur négative : taille en Kio plutôt qu'en pages
+        ('cache_size', -config.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+    ]
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nom, valeur in pragmas:
+            cursor.execute(f'PRAGMA {nom}={valeur}')
+        cursor.close()
+    return on_connect
+
+class PoolMetrics:
+    """Compteurs cumulés d'un pool, alimentés par ses événements."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.compteurs = {'connexions': 0, 'checkouts': 0, 'checkins': 0, 'invalidations': 0}
+        for nom, compteur in (('connect', 'connexions'), ('checkout', 'checkouts'),
+                              ('checkin', 'checkins'), ('invalidate', 'invalidations')):
+            event.listen(engine.pool, nom, self._compter(compteur))
+
+    def _compter(self, compteur):
+        def listener(*args):
+            self.compteurs[compteur] += 1
+        return listener
+
+    def snapshot(self):
+        pool = self.engine.pool
+        etat = {'pool': type(pool).__name__, **self.compteurs}
+        for nom in ('size', 'checkedin', 'checkedout', 'overflow'):
+            if hasattr(pool, nom):
+                etat[nom] = getattr(pool, nom)()
+        return etat
+
+def init_database(app, db):
+    """Pragmas SQLite et métriques sur chaque moteur ; à appeler après db.init_app."""
+    with app.app_context():
+        engines = dict(db.engines)
+    metrics = {}
+    for cle, engine in engines.items():
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _pragmas(app.config))
+        metrics[cle or 'default'] = PoolMetrics(engine)
+    app.extensions['pool_metrics'] = metrics
+
+def async_url(uri):
+    """URI équivalente avec le pilote asynchrone du dialecte."""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f'Pas de pilote asynchrone pour {backend}')
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == 'mysql' and 'charset' not in url.query:
+        url = url.update_query_dict({'charset': 'utf8mb4'})
+    return url
+
+def create_async_engine_for(app):
+    """Moteur asynchrone des vues ASGI, qui sont en lecture seule : il pointe sur la
+    réplique si elle est configurée (ASYNC_DATABASE_URI pour le forcer)."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    uri = app.config.get('DATABASE_REPLICA_URI') or app.config['SQLALCHEMY_DATABASE_URI']
+    url = make_url(app.config['ASYNC_DATABASE_URI']) if app.config.get('ASYNC_DATABASE_URI') else async_url(uri)
+    engine = create_async_engine(url, **_options(url, app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})))
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine.sync_engine, 'connect', _pragmas(app.config))
+    app.extensions.setdefault('pool_metrics', {})['async'] = PoolMetrics(engine.sync_engine)
+    return engine
+
+def pool_status(app):
+    """{bind: état du pool} pour la supervision."""
+    return {cle: m.snapshot() for cle, m in app.extensions.get('pool_metrics', {}).items()}
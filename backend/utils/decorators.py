@@ -1,15 +1,18 @@
 from functools import wraps
-from flask_jwt_extended import verify_jwt_in_request, get_jwt
-from flask import abort
+from flask import abort, g
+from utils.token_cache import verify_jwt
 
-def role_required(roles):
+def role_required(roles, locations=None):
+    """Vérifie le JWT (cache des jetons déjà vérifiés, révocation) et le rôle ; le rôle et
+    l'identifiant de l'utilisateur sont ensuite disponibles dans g.role et g.user_id."""
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
+            claims = verify_jwt(locations)
             if claims.get('role') not in roles:
                 abort(403, description="Accès interdit : rôle insuffisant")
+            g.role = claims.get('role')
+            g.user_id = claims.get('user_id')
             return fn(*args, **kwargs)
         return wrapper
-    return decorator 
\ No newline at end of file
+    return decorator 
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+import queue
+import socket
+import threading
+import traceback
+from flask import current_app
+from utils.database import is_memory_database
+
+# Diffusion des événements tickets aux clients SSE (GET /tickets/stream).
+# Chaque processus a un EventHub ; un Broker relaie les événements entre processus.
+
+DEFAULT_QUEUE_SIZE = 100
+# Marqueur placé dans la file d'un abonné trop lent avant sa déconnexion
+DECONNECTE = object()
+# Événements entre processus (ex. révocation de jetons) : remis aux écouteurs, jamais aux abonnés
+INTERNES = {'jetons_revoques'}
+
+class Subscription:
+    def __init__(self, predicate, maxsize):
+        self.predicate = predicate
+        self.queue = queue.Queue(maxsize)
+
+    def get(self, timeout):
+        return self.queue.get(timeout=timeout)
+
+    def offer(self, event, hub):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            hub.unsubscribe(self)
+            # libère une place pour signaler la déconnexion
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(DECONNECTE)
+
+class AsyncSubscription:
+    """Abonnement consommé depuis une boucle asyncio (point d'entrée ASGI) ; les
+    événements publiés depuis d'autres threads y sont transférés par call_soon_threadsafe."""
+
+    def __init__(self, predicate, maxsize, loop):
+        self.predicate = predicate
+        self.queue = asyncio.Queue(maxsize)
+        self.loop = loop
+        self.ferme = False
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def offer(self, event, hub):
+        self.loop.call_soon_threadsafe(self._offer, event, hub)
+
+    def _offer(self, event, hub):
+        if self.ferme:
+            return
+        if self.queue.full():
+            self.ferme = True
+            hub.unsubscribe(self)
+            self.queue.get_nowait()
+            self.queue.put_nowait(DECONNECTE)
+        else:
+            self.queue.put_nowait(event)
+
+class EventHub:
+    """Publication/abonnement en mémoire. Chaque abonné a une file bornée ; s'il ne la
+    vide pas assez vite, il est déconnecté plutôt que de ralentir la publication."""
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._abonnes = set()
+        self._ecouteurs = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, predicate):
+        return self._ajouter(Subscription(predicate, self.queue_size))
+
+    def subscribe_async(self, predicate):
+        return self._ajouter(AsyncSubscription(predicate, self.queue_size, asyncio.get_running_loop()))
+
+    def _ajouter(self, subscription):
+        with self._lock:
+            self._abonnes.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._abonnes.discard(subscription)
+
+    def listen(self, type, callback):
+        """Appelle `callback(event)` pour chaque événement `type` reçu par ce processus."""
+        with self._lock:
+            self._ecouteurs.setdefault(type, []).append(callback)
+
+    def dispatch(self, event):
+        with self._lock:
+            ecouteurs = list(self._ecouteurs.get(event['type'], ()))
+            abonnes = list(self._abonnes)
+        for callback in ecouteurs:
+            callback(event)
+        if event['type'] in INTERNES:
+            return
+        for subscription in abonnes:
+            if subscription.predicate(event):
+                subscription.offer(event, self)
+
+class Broker:
+    """Transport des événements entre processus. `publish` doit livrer l'événement à
+    tous les processus, y compris l'appelant, en appelant `deliver` de chacun."""
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, event):
+        raise NotImplementedError
+
+class LocalBroker(Broker):
+    """Processus unique : livraison directe."""
+
+    def publish(self, event):
+        self.deliver(event)
+
+class SocketDirBroker(Broker):
+    """Broker de substitution pour plusieurs workers sur une même machine, sans service
+    externe : chaque processus écoute sur une socket Unix datagramme de `directory` et
+    publier revient à envoyer l'événement à toutes les sockets du répertoire."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'{os.getpid()}.sock')
+
+    def start(self, deliver):
+        super().start(deliver)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._recv = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._recv.bind(self.path)
+        self._send = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        threading.Thread(target=self._ecouter, name='event-broker', daemon=True).start()
+
+    def _ecouter(self):
+        while True:
+            data = self._recv.recv(65536)
+            try:
+                self.deliver(json.loads(data))
+            except Exception:
+                # un événement invalide ou un écouteur en échec ne doit pas arrêter l'écoute
+                traceback.print_exc()
+
+    def publish(self, event):
+        self.deliver(event)
+        data = json.dumps(event).encode('utf-8')
+        for nom in os.listdir(self.directory):
+            chemin = os.path.join(self.directory, nom)
+            if not nom.endswith('.sock') or chemin == self.path:
+                continue
+            try:
+                self._send.sendto(data, chemin)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # processus arrêté : socket orpheline
+                try:
+                    os.remove(chemin)
+                except OSError:
+                    pass
+            except OSError:
+                # file de réception pleine chez ce processus : l'événement est perdu pour lui
+                pass
+
+def broker_directory(app):
+    """Répertoire du SocketDirBroker : EVENTS_BROKER_DIR, ou à défaut un répertoire de
+    l'instance lorsque les tâches de fond tournent dans des processus worker.py (lancés par
+    start_workers), dont les événements (tickets_importes) doivent atteindre les abonnés de
+    l'API. None : LocalBroker."""
+    directory = app.config.get('EVENTS_BROKER_DIR')
+    if directory:
+        return directory
+    if os.environ.get('JOBS_PARENT_PID') or (
+            app.config.get('JOBS_WORKERS', 0) > 0
+            and not is_memory_database(app.config['SQLALCHEMY_DATABASE_URI'])):
+        return os.path.join(app.instance_path, 'events')
+    return None
+
+_hub = None
+_hub_pid = None
+_hub_lock = threading.Lock()
+
+def get_hub():
+    """EventHub du processus courant, créé au premier appel (et après un fork)."""
+    global _hub, _hub_pid
+    if _hub is None or _hub_pid != os.getpid():
+        with _hub_lock:
+            if _hub is None or _hub_pid != os.getpid():
+                hub = EventHub(current_app.config.get('EVENTS_QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+                directory = broker_directory(current_app)
+                hub.broker = SocketDirBroker(directory) if directory else LocalBroker()
+                hub.broker.start(hub.dispatch)
+                _hub, _hub_pid = hub, os.getpid()
+    return _hub
+
+def publish_event(type, **data):
+    """Publie un événement {'type': ..., **data} ; à appeler après le commit."""
+    get_hub().broker.publish(dict(data, type=type))
+
+def event_filter(claims):
+    """Prédicat des événements visibles pour le JWT : un technicien ne reçoit que ceux
+    des tickets qui lui sont (ou lui étaient) affectés."""
+    if claims.get('role') == 'technicien':
+        user_id = claims.get('user_id')
+        return lambda event: user_id in event.get('techniciens', ())
+    return lambda event: True
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
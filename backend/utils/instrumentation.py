@@ -0,0 +1,280 @@
+import hmac
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, request, has_request_context, jsonify, Response
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from utils.decorators import role_required
+
+# Instrumentation optionnelle (INSTRUMENTATION_ENABLED) : latence par endpoint, requêtes SQL
+# par requête HTTP (nombre, durée, N+1), temps de sérialisation et de bcrypt, exposés en
+# format Prometheus sur /metrics. Les métriques sont propres à chaque processus. /metrics
+# exige le jeton METRICS_TOKEN (Authorization: Bearer, pour le collecteur) ou, sans jeton
+# configuré, le JWT d'un admin.
+
+BUCKETS_SECONDES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_REQUETES = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_actif = False
+
+class Histogram:
+    def __init__(self, nom, aide, buckets):
+        self.nom, self.aide, self.buckets = nom, aide, buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, valeur, **labels):
+        cle = tuple(sorted(labels.items()))
+        with self._lock:
+            serie = self._series.get(cle)
+            if serie is None:
+                serie = self._series[cle] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, valeur)
+            if index < len(self.buckets):
+                serie[0][index] += 1
+            serie[1] += valeur
+            serie[2] += 1
+
+    def exposition(self):
+        lignes = [f'# HELP {self.nom} {self.aide}', f'# TYPE {self.nom} histogram']
+        with self._lock:
+            series = [(cle, list(c), s, n) for cle, (c, s, n) in self._series.items()]
+        for cle, compteurs, somme, nb in sorted(series):
+            cumul = 0
+            for borne, compteur in zip(self.buckets, compteurs):
+                cumul += compteur
+                lignes.append(f'{self.nom}_bucket{_labels(cle, le=borne)} {cumul}')
+            lignes.append(f'{self.nom}_bucket{_labels(cle, le="+Inf")} {nb}')
+            lignes.append(f'{self.nom}_sum{_labels(cle)} {somme}')
+            lignes.append(f'{self.nom}_count{_labels(cle)} {nb}')
+        return lignes
+
+class CounterMetric:
+    def __init__(self, nom, aide):
+        self.nom, self.aide = nom, aide
+        self._series = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, valeur=1, **labels):
+        with self._lock:
+            self._series[tuple(sorted(labels.items()))] += valeur
+
+    def exposition(self):
+        lignes = [f'# HELP {self.nom} {self.aide}', f'# TYPE {self.nom} counter']
+        with self._lock:
+            series = sorted(self._series.items())
+        lignes.extend(f'{self.nom}{_labels(cle)} {valeur}' for cle, valeur in series)
+        return lignes
+
+def _labels(cle, **extra):
+    paires = list(cle) + list(extra.items())
+    if not paires:
+        return ''
+    texte = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in paires)
+    return '{' + texte + '}'
+
+REQUEST_SECONDS = Histogram('smartticket_request_duration_seconds', 'Durée des requêtes HTTP', BUCKETS_SECONDES)
+REQUESTS = CounterMetric('smartticket_requests_total', 'Requêtes HTTP par endpoint et code')
+SQL_STATEMENTS = Histogram('smartticket_request_sql_statements', 'Requêtes SQL par requête HTTP', BUCKETS_REQUETES)
+SQL_SECONDS = Histogram('smartticket_request_sql_seconds', 'Temps SQL cumulé par requête HTTP', BUCKETS_SECONDES)
+N_PLUS_ONE = CounterMetric('smartticket_n_plus_one_total', 'Requêtes HTTP avec une requête SQL répétée (N+1)')
+SECTION_SECONDS = Histogram('smartticket_section_seconds', 'Durée des sections instrumentées', BUCKETS_SECONDES)
+METRIQUES = (REQUEST_SECONDS, REQUESTS, SQL_STATEMENTS, SQL_SECONDS, N_PLUS_ONE, SECTION_SECONDS)
+
+class RequestStats:
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.nb_sql = 0
+        self.duree_sql = 0.0
+        self.requetes = Counter()
+        self.sections = Counter()
+
+def _stats():
+    return g.get('_instrumentation') if has_request_context() else None
+
+@contextmanager
+def section(nom):
+    """Mesure un bloc (ex. 'bcrypt', 'serialisation') dans la requête courante."""
+    if not _actif:
+        yield
+        return
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        duree = time.perf_counter() - debut
+        SECTION_SECONDS.observe(duree, section=nom)
+        stats = _stats()
+        if stats is not None:
+            stats.sections[nom] += duree
+
+def timed(nom):
+    """Décorateur équivalent à `with section(nom)`."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with section(nom):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Comptabilise l'encodage JSON des réponses dans la section 'serialisation'."""
+
+    def dumps(self, obj, **kwargs):
+        with section('serialisation'):
+            return super().dumps(obj, **kwargs)
+
+# Début de chaque exécution gardé sur son contexte d'exécution (et non sur la connexion) :
+# une requête en échec n'appelle pas after_cursor_execute et ne laisse rien derrière elle
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._instrumentation_debut = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    debut = getattr(context, '_instrumentation_debut', None)
+    stats = _stats()
+    if stats is not None and debut is not None:
+        stats.nb_sql += 1
+        stats.duree_sql += time.perf_counter() - debut
+        if not executemany:
+            stats.requetes[statement] += 1
+
+class SamplingProfiler:
+    """Échantillonne périodiquement la pile des threads servant une requête. Les piles des
+    requêtes plus lentes que le seuil sont écrites au format « folded » (une ligne
+    `f1;f2;f3 nb` par pile), lisible par flamegraph.pl ou speedscope."""
+
+    def __init__(self, directory, intervalle):
+        self.directory = directory
+        self.intervalle = intervalle
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        with self._lock:
+            # thread d'échantillonnage lancé dans chaque processus servant des requêtes
+            # (pas dans le maître qui forke les workers avec APP_PRELOAD)
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._threads.clear()
+                threading.Thread(target=self._boucle, name='sampling-profiler', daemon=True).start()
+            self._threads[threading.get_ident()] = Counter()
+
+    def stop(self):
+        with self._lock:
+            return self._threads.pop(threading.get_ident(), None)
+
+    def _boucle(self):
+        while True:
+            time.sleep(self.intervalle)
+            with self._lock:
+                suivis = dict(self._threads)
+            if not suivis:
+                continue
+            frames = sys._current_frames()
+            for ident, piles in suivis.items():
+                frame = frames.get(ident)
+                pile = []
+                while frame is not None:
+                    code = frame.f_code
+                    pile.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                if pile:
+                    piles[';'.join(reversed(pile))] += 1
+
+    def dump(self, piles, endpoint, duree):
+        nom = f'{time.strftime("%Y%m%d-%H%M%S")}_{endpoint}_{int(duree * 1000)}ms.folded'
+        with open(os.path.join(self.directory, nom), 'w', encoding='utf-8') as fichier:
+            for pile, nb in piles.most_common():
+                fichier.write(f'{pile} {nb}\n')
+
+def _exposition(app):
+    from utils.database import pool_status
+    lignes = []
+    for metrique in METRIQUES:
+        lignes.extend(metrique.exposition())
+    etats = pool_status(app)
+    for mesure in ('checkedout', 'checkedin', 'overflow', 'size'):
+        nom = f'smartticket_db_pool_{mesure}'
+        lignes += [f'# HELP {nom} Pool de connexions : {mesure}', f'# TYPE {nom} gauge']
+        lignes += [f'{nom}{_labels((("bind", bind),))} {etat[mesure]}'
+                   for bind, etat in sorted(etats.items()) if mesure in etat]
+    return '\n'.join(lignes) + '\n'
+
+def init_instrumentation(app, db):
+    global _actif
+    if not app.config.get('INSTRUMENTATION_ENABLED'):
+        return
+    _actif = True
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.json = TimedJSONProvider(app)
+    seuil_n_plus_un = app.config.get('INSTRUMENTATION_N_PLUS_ONE', 5)
+    seuil_lent = app.config.get('PROFILE_SLOW_MS', 0) / 1000
+    profiler = None
+    if seuil_lent > 0:
+        profiler = SamplingProfiler(app.config.get('PROFILE_DIR', 'profiles'),
+                                    app.config.get('PROFILE_INTERVAL_MS', 5) / 1000)
+
+    @app.before_request
+    def _debut_requete():
+        g._instrumentation = RequestStats()
+        if profiler is not None:
+            profiler.start()
+
+    @app.after_request
+    def _fin_requete(response):
+        stats = g.pop('_instrumentation', None)
+        if stats is None:
+            return response
+        duree = time.perf_counter() - stats.debut
+        endpoint = request.endpoint or 'inconnu'
+        REQUEST_SECONDS.observe(duree, endpoint=endpoint, method=request.method)
+        REQUESTS.inc(endpoint=endpoint, method=request.method, code=response.status_code)
+        SQL_STATEMENTS.observe(stats.nb_sql, endpoint=endpoint)
+        SQL_SECONDS.observe(stats.duree_sql, endpoint=endpoint)
+        if stats.requetes:
+            statement, nb = stats.requetes.most_common(1)[0]
+            if nb >= seuil_n_plus_un:
+                N_PLUS_ONE.inc(endpoint=endpoint)
+                app.logger.warning('N+1 sur %s : %d exécutions de %s', endpoint, nb, ' '.join(statement.split())[:200])
+        timings = [f'sql;dur={stats.duree_sql * 1000:.1f};desc="{stats.nb_sql}"']
+        timings += [f'{nom};dur={d * 1000:.1f}' for nom, d in stats.sections.items()]
+        timings.append(f'total;dur={duree * 1000:.1f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+        if profiler is not None:
+            piles = profiler.stop()
+            if piles and duree >= seuil_lent:
+                profiler.dump(piles, endpoint, duree)
+        return response
+
+    if profiler is not None:
+        @app.teardown_request
+        def _arret_profiler(exc):
+            profiler.stop()
+
+    @role_required(['admin'])
+    def metrics_admin():
+        return Response(_exposition(app), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/metrics')
+    def metrics():
+        jeton = app.config.get('METRICS_TOKEN')
+        if not jeton:
+            return metrics_admin()
+        attendu = f'Bearer {jeton}'.encode('utf-8')
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'), attendu):
+            return jsonify({'msg': 'Jeton de métriques invalide'}), 401
+        return Response(_exposition(app), mimetype='text/plain; version=0.0.4')
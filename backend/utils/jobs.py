@@ -0,0 +1,304 @@
+import atexit
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update
+from extensions import db
+from models.job import Job
+from utils.database import is_memory_database
+
+# Tâches de fond persistantes. La table jobs sert de file d'attente (aucun broker externe,
+# SQLite suffit) ; des processus workers (worker.py), lancés avec l'application, réservent
+# les tâches par priorité, publient leur progression et gèrent annulation et nouvelles
+# tentatives. Un worker disparu est détecté par l'absence de battement de cœur.
+
+STATUTS_FINAUX = ('termine', 'echec', 'annule')
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'worker.py')
+# délai minimal entre deux écritures de la progression d'une tâche
+INTERVALLE_PROGRESSION_S = 0.5
+# reprise des tâches orphelines et purge des anciennes tâches
+INTERVALLE_ENTRETIEN_S = 30
+
+class Tache:
+    def __init__(self, fn, roles, max_tentatives, priorite, valider, nettoyer):
+        self.fn = fn
+        self.roles = roles
+        self.max_tentatives = max_tentatives
+        self.priorite = priorite
+        self.valider = valider
+        self.nettoyer = nettoyer
+
+TACHES = {}
+
+def job_task(type, roles=('admin',), max_tentatives=1, priorite=0, valider=None, nettoyer=None):
+    """Déclare `fn(job, **params)` comme tâche de fond `type`.
+    - valider(params, claims) : paramètres nettoyés (ValueError si invalides) ; sans elle,
+      la tâche ne peut pas être soumise par POST /jobs ;
+    - nettoyer(params) : appelée à la purge de la tâche (fichiers temporaires) ;
+    - max_tentatives : 1 pour les tâches non rejouables (import commité par blocs)."""
+    def decorator(fn):
+        TACHES[type] = Tache(fn, roles, max_tentatives, priorite, valider, nettoyer)
+        return fn
+    return decorator
+
+class JobCancelled(Exception):
+    pass
+
+def _mettre_a_jour(job_id, proprietaire, **valeurs):
+    """UPDATE de la tâche si le worker `proprietaire` l'exécute toujours ; renvoie la demande
+    d'annulation. Transaction propre, indépendante de la session utilisée par la tâche."""
+    table = Job.__table__
+    with db.engine.begin() as connection:
+        connection.execute(update(table).where(
+            table.c.id == job_id, table.c.worker == proprietaire).values(**valeurs))
+        return connection.execute(select(table.c.annulation).where(table.c.id == job_id)).scalar()
+
+class JobContext:
+    """Tâche en cours d'exécution, passée en premier argument à la fonction de la tâche."""
+
+    def __init__(self, job_id, worker, timeout):
+        self.id = job_id
+        self.worker = worker
+        self.progression = {}
+        self.erreurs = []
+        self.nb_erreurs = 0
+        self.resultat = None
+        self.annulation = False
+        self.echeance = time.monotonic() + timeout if timeout else None
+        self._ecrit_le = 0.0
+
+    def ajouter_erreur(self, erreur, max_erreurs=1000):
+        """Enregistre une erreur ; seules les `max_erreurs` premières sont conservées en détail."""
+        self.nb_erreurs += 1
+        if len(self.erreurs) < max_erreurs:
+            self.erreurs.append(erreur)
+
+    def etat(self):
+        return {'progression': dict(self.progression), 'erreurs': list(self.erreurs),
+                'nb_erreurs': self.nb_erreurs}
+
+    def checkpoint(self):
+        """À appeler entre deux étapes : enregistre la progression (au plus toutes les
+        INTERVALLE_PROGRESSION_S) et interrompt la tâche si elle a été annulée ou si elle
+        dépasse JOBS_TIMEOUT_S."""
+        if self.annulation:
+            raise JobCancelled()
+        if self.echeance is not None and time.monotonic() > self.echeance:
+            raise TimeoutError('Durée maximale de la tâche dépassée')
+        if time.monotonic() - self._ecrit_le >= INTERVALLE_PROGRESSION_S:
+            self._ecrit_le = time.monotonic()
+            if _mettre_a_jour(self.id, self.worker, heartbeat_le=datetime.utcnow(), **self.etat()):
+                raise JobCancelled()
+
+    @contextmanager
+    def fichier_resultat(self, nom, mimetype):
+        """Fichier binaire du résultat, téléchargeable via GET /jobs/<id>/resultat sous le
+        nom `nom` une fois la tâche terminée."""
+        chemin = result_path(self.id)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        temporaire = chemin + '.tmp'
+        try:
+            with open(temporaire, 'wb') as sortie:
+                yield sortie
+            os.replace(temporaire, chemin)
+        finally:
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+        self.resultat = (nom, mimetype)
+
+class _Battement:
+    """Signe de vie périodique de la tâche en cours (y compris pendant une longue requête
+    SQL sans checkpoint) et lecture de la demande d'annulation."""
+
+    def __init__(self, app, contexte, intervalle):
+        self.app = app
+        self.contexte = contexte
+        self.intervalle = intervalle
+        self.arret = threading.Event()
+        self.thread = threading.Thread(target=self._boucle, name='job-heartbeat', daemon=True)
+        self.thread.start()
+
+    def _boucle(self):
+        with self.app.app_context():
+            while not self.arret.wait(self.intervalle):
+                try:
+                    if _mettre_a_jour(self.contexte.id, self.contexte.worker, heartbeat_le=datetime.utcnow()):
+                        self.contexte.annulation = True
+                except Exception:
+                    traceback.print_exc()
+
+    def stop(self):
+        self.arret.set()
+        self.thread.join()
+
+def result_path(job_id):
+    return os.path.abspath(os.path.join(current_app.config['JOBS_RESULT_DIR'], job_id))
+
+def _reserver(worker):
+    """Réserve la prochaine tâche disponible (priorité décroissante puis ancienneté) par un
+    UPDATE conditionnel : un seul worker peut la faire passer en_cours."""
+    table = Job.__table__
+    maintenant = datetime.utcnow()
+    with db.engine.connect() as connection:
+        candidats = connection.execute(
+            select(table.c.id)
+            .where(table.c.statut == 'en_attente', table.c.disponible_le <= maintenant)
+            .order_by(table.c.priorite.desc(), table.c.cree_le)
+            .limit(10)
+        ).scalars().all()
+    for job_id in candidats:
+        with db.engine.begin() as connection:
+            if connection.execute(update(table).where(
+                    table.c.id == job_id, table.c.statut == 'en_attente').values(
+                    statut='en_cours', worker=worker, tentatives=table.c.tentatives + 1,
+                    debut_le=maintenant, heartbeat_le=maintenant)).rowcount:
+                return job_id
+    return None
+
+def _executer(app, job_id, worker):
+    table = Job.__table__
+    with db.engine.connect() as connection:
+        job = connection.execute(select(table).where(table.c.id == job_id)).one()
+    tache = TACHES.get(job.type)
+    contexte = JobContext(job.id, worker, app.config.get('JOBS_TIMEOUT_S'))
+    battement = _Battement(app, contexte, min(5, app.config.get('JOBS_LEASE_S', 60) / 3))
+    try:
+        if tache is None:
+            raise RuntimeError(f'Type de tâche inconnu : {job.type}')
+        tache.fn(contexte, **job.params)
+        valeurs = {'statut': 'termine', 'message': None, 'termine_le': datetime.utcnow()}
+        if contexte.resultat:
+            valeurs['resultat_nom'], valeurs['resultat_type'] = contexte.resultat
+    except JobCancelled:
+        valeurs = {'statut': 'annule', 'message': 'Tâche annulée', 'termine_le': datetime.utcnow()}
+    except Exception as exc:
+        traceback.print_exc()
+        if job.tentatives < job.max_tentatives:
+            delai = app.config.get('JOBS_RETRY_DELAY_S', 10) * 2 ** (job.tentatives - 1)
+            valeurs = {'statut': 'en_attente', 'message': str(exc), 'worker': None,
+                       'disponible_le': datetime.utcnow() + timedelta(seconds=delai)}
+        else:
+            valeurs = {'statut': 'echec', 'message': str(exc), 'termine_le': datetime.utcnow()}
+    finally:
+        battement.stop()
+        db.session.remove()
+    _mettre_a_jour(job.id, worker, **contexte.etat(), **valeurs)
+
+def _entretien(app):
+    """Remet en file (ou en échec, tentatives épuisées) les tâches dont le worker ne donne
+    plus signe de vie et purge les tâches terminées depuis JOBS_RETENTION_DAYS."""
+    table = Job.__table__
+    maintenant = datetime.utcnow()
+    limite = maintenant - timedelta(seconds=app.config.get('JOBS_LEASE_S', 60))
+    orphelines = (table.c.statut == 'en_cours', table.c.heartbeat_le < limite)
+    with db.engine.begin() as connection:
+        connection.execute(update(table).where(*orphelines, table.c.tentatives < table.c.max_tentatives)
+                           .values(statut='en_attente', worker=None, disponible_le=maintenant,
+                                   message='Worker interrompu'))
+        connection.execute(update(table).where(*orphelines)
+                           .values(statut='echec', termine_le=maintenant, message='Worker interrompu'))
+    retention = maintenant - timedelta(days=app.config.get('JOBS_RETENTION_DAYS', 7))
+    with db.engine.begin() as connection:
+        anciennes = connection.execute(select(table.c.id, table.c.type, table.c.params).where(
+            table.c.statut.in_(STATUTS_FINAUX), table.c.termine_le < retention)).all()
+        for job_id, type, params in anciennes:
+            tache = TACHES.get(type)
+            if tache is not None and tache.nettoyer is not None:
+                tache.nettoyer(params)
+            if os.path.exists(result_path(job_id)):
+                os.remove(result_path(job_id))
+        if anciennes:
+            connection.execute(table.delete().where(table.c.id.in_([a.id for a in anciennes])))
+
+_reveil = threading.Event()
+
+def work(app, arret=None, parent_pid=None):
+    """Boucle d'un worker : réserve et exécute les tâches jusqu'à `arret` (ou la fin du
+    processus parent `parent_pid`)."""
+    arret = arret or threading.Event()
+    worker = f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+    attente = app.config.get('JOBS_POLL_S', 0.5)
+    prochain_entretien = 0
+    with app.app_context():
+        while not arret.is_set():
+            if parent_pid and os.getppid() != parent_pid:
+                return
+            try:
+                if time.monotonic() >= prochain_entretien:
+                    _entretien(app)
+                    prochain_entretien = time.monotonic() + INTERVALLE_ENTRETIEN_S
+                job_id = _reserver(worker)
+                if job_id is not None:
+                    _executer(app, job_id, worker)
+                    continue
+            except Exception:
+                # base momentanément indisponible ou verrouillée : nouvel essai au prochain tour
+                traceback.print_exc()
+                db.session.remove()
+            if _reveil.wait(attente):
+                _reveil.clear()
+
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def start_workers(app):
+    """Lance JOBS_WORKERS workers pour le processus courant (une fois, y compris après un
+    fork) : des processus worker.py, ou des threads si la base SQLite est en mémoire et
+    donc invisible des autres processus."""
+    global _pool_pid
+    nb = app.config.get('JOBS_WORKERS', 0)
+    if nb <= 0 or _pool_pid == os.getpid():
+        return
+    with _pool_lock:
+        if _pool_pid == os.getpid():
+            return
+        _pool_pid = os.getpid()
+        if is_memory_database(app.config['SQLALCHEMY_DATABASE_URI']):
+            for i in range(nb):
+                threading.Thread(target=work, args=(app,), name=f'job-worker-{i}', daemon=True).start()
+            return
+        env = dict(os.environ, JOBS_PARENT_PID=str(os.getpid()))
+        processus = [subprocess.Popen([sys.executable, WORKER_SCRIPT], env=env) for _ in range(nb)]
+        atexit.register(lambda: [p.terminate() for p in processus])
+
+def submit_job(type, params=None, priorite=None, user_id=None):
+    """Enregistre une tâche `type` (voir job_task) et renvoie le Job créé ; elle est exécutée
+    par le premier worker libre."""
+    tache = TACHES[type]
+    job = Job(id=uuid.uuid4().hex, type=type, params=params or {},
+              priorite=tache.priorite if priorite is None else priorite,
+              max_tentatives=tache.max_tentatives, cree_par=user_id)
+    db.session.add(job)
+    db.session.commit()
+    start_workers(current_app)
+    _reveil.set()
+    return job
+
+def cancel_job(job):
+    """Annule une tâche en attente, ou demande l'arrêt d'une tâche en cours (pris en compte
+    à son prochain checkpoint). Renvoie False si la tâche est déjà terminée."""
+    table = Job.__table__
+    with db.engine.begin() as connection:
+        if connection.execute(update(table).where(table.c.id == job.id, table.c.statut == 'en_attente')
+                              .values(statut='annule', annulation=True, message='Tâche annulée',
+                                      termine_le=datetime.utcnow())).rowcount:
+            return True
+        if connection.execute(update(table).where(table.c.id == job.id, table.c.statut == 'en_cours')
+                              .values(annulation=True)).rowcount:
+            return True
+    return False
+
+def init_jobs(app):
+    # le premier processus qui sert une requête lance ses workers (pas le moniteur du
+    # rechargeur de Werkzeug ni le maître de gunicorn)
+    @app.before_request
+    def _demarrer_workers():
+        start_workers(app)
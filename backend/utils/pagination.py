@@ -0,0 +1,40 @@
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(date_d_ouverture: datetime, ticket_id: int) -> str:
+    """Encode la position (date_d_ouverture, id) du dernier ticket d'une page."""
+    payload = json.dumps([date_d_ouverture.isoformat(), ticket_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str):
+    """Décode un curseur ; lève ValueError si le jeton est invalide."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        date_iso, ticket_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(date_iso), int(ticket_id)
+    except (TypeError, ValueError, UnicodeError) as exc:
+        raise ValueError('Curseur invalide') from exc
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE) -> int:
+    """Borne la taille de page demandée à [1, MAX_PAGE_SIZE]."""
+    if value is None:
+        return default
+    return max(1, min(int(value), MAX_PAGE_SIZE))
+
+def encode_sync_cursor(seq: int, ticket_id=None) -> str:
+    """Curseur de synchronisation : 'seq' (version entièrement lue) ou 'seq:id'."""
+    return str(seq) if ticket_id is None else f'{seq}:{ticket_id}'
+
+def decode_sync_cursor(token):
+    """Renvoie (seq, id ou None) ; sans curseur, (-1, None) pour une synchronisation complète."""
+    if not token:
+        return -1, None
+    try:
+        seq, _, ticket_id = token.partition(':')
+        return int(seq), int(ticket_id) if ticket_id else None
+    except ValueError as exc:
+        raise ValueError('Curseur invalide') from exc
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+from sqlalchemy import select, union_all, func
+from models.ticket import Ticket, technicien_ticket
+from models.ticket_archive import TicketArchive, technicien_ticket_archive
+from models.ticket_supprime import TicketSupprime, technicien_ticket_supprime
+
+# (modèle, table d'association des techniciens) : tickets courants puis archivés (utils/archive.py)
+COURANTS = (Ticket, technicien_ticket)
+ARCHIVES = (TicketArchive, technicien_ticket_archive)
+SOURCES = (COURANTS, ARCHIVES)
+
+def scope_tickets(query, claims, source=COURANTS):
+    """Restreint une requête sur Ticket (ou la `source` donnée) aux tickets visibles pour
+    le rôle du JWT."""
+    modele, association = source
+    if claims.get('role') == 'technicien':
+        query = query.join(association, association.c.ticket_id == modele.id) \
+            .filter(association.c.technicien_id == claims.get('user_id'))
+    return query
+
+def scope_deletions(query, claims):
+    """Restreint une requête sur TicketSupprime aux suppressions de tickets visibles pour
+    le rôle du JWT (tickets affectés au technicien au moment de la suppression)."""
+    if claims.get('role') == 'technicien':
+        query = query.join(technicien_ticket_supprime,
+                           technicien_ticket_supprime.c.ticket_supprime_id == TicketSupprime.id) \
+            .filter(technicien_ticket_supprime.c.technicien_id == claims.get('user_id'))
+    return query
+
+def union_tickets(construire):
+    """UNION ALL de construire(source) sur les tickets courants et archivés : chaque
+    branche est filtrée sur sa table (et ses index), les colonnes prennent les noms de la
+    première."""
+    return union_all(*(construire(source) for source in SOURCES))
+
+def colonnes_source(colonnes, source):
+    """Colonnes de Ticket `colonnes` lues sur le modèle de `source`."""
+    return tuple(getattr(source[0], colonne.key) for colonne in colonnes)
+
+def sum_over_sources(construire, nb_cles):
+    """Agrégat sur les deux sources : construire(source) renvoie un SELECT groupé dont les
+    `nb_cles` premières colonnes sont les clés et les suivantes des sommes ou des comptes."""
+    union = union_tickets(construire).subquery()
+    colonnes = list(union.c)
+    cles = colonnes[:nb_cles]
+    return select(*cles, *(func.sum(c) for c in colonnes[nb_cles:])).group_by(*cles)
+
+def parse_date(value):
+    """Date ISO 8601 en datetime naïf UTC (comme les colonnes DateTime) ; une date avec
+    fuseau est convertie en UTC."""
+    try:
+        date = datetime.fromisoformat(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f'Date invalide : {value}') from exc
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+def parse_ids(args, param):
+    """Valeurs entières du paramètre répétable `param` (valeurs vides ignorées). Lève
+    ValueError si l'une n'est pas un entier."""
+    ids = []
+    for valeur in args.getlist(param):
+        if valeur == '':
+            continue
+        try:
+            ids.append(int(valeur))
+        except ValueError:
+            raise ValueError(f'Identifiant invalide pour {param} : {valeur}') from None
+    return ids
+
+def apply_ticket_filters(query, args, dates=True, source=COURANTS):
+    """Applique les filtres de la query string (statut_id, categorie_id, type_id,
+    technicien_id, date_debut, date_fin, demandeur). Lève ValueError si un identifiant ou une
+    date est invalide.
+    Avec dates=False, date_debut et date_fin sont laissés à l'appelant."""
+    modele, association = source
+    for param, column in (('statut_id', modele.statut_id),
+                          ('categorie_id', modele.categorie_id),
+                          ('type_id', modele.type_id)):
+        ids = parse_ids(args, param)
+        if ids:
+            query = query.filter(column.in_(ids))
+    technicien_ids = parse_ids(args, 'technicien_id')
+    if technicien_ids:
+        query = query.filter(modele.id.in_(
+            select(association.c.ticket_id)
+            .where(association.c.technicien_id.in_(technicien_ids))
+        ))
+    if dates and args.get('date_debut'):
+        query = query.filter(modele.date_d_ouverture >= parse_date(args['date_debut']))
+    if dates and args.get('date_fin'):
+        query = query.filter(modele.date_d_ouverture <= parse_date(args['date_fin']))
+    if args.get('demandeur'):
+        query = query.filter(modele.demandeur == args['demandeur'])
+    return query
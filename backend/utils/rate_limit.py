@@ -0,0 +1,39 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TokenBucketLimiter:
+    """Seaux à jetons par clé (IP, compte...) conservés en mémoire du processus.
+
+    Chaque clé dispose de `capacity` jetons, regagnés au rythme de `capacity` par
+    `window` secondes ; les clés les moins récemment utilisées sont oubliées au-delà
+    de `max_keys`.
+    """
+
+    def __init__(self, capacity, window, max_keys=10000):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """Consomme un jeton ; renvoie (autorisé, secondes avant le prochain jeton)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / self.rate
+
+    def refund(self, key):
+        """Rend le jeton consommé par allow() (tentative réussie)."""
+        with self._lock:
+            if key in self._buckets:
+                tokens, last = self._buckets[key]
+                self._buckets[key] = (min(self.capacity, tokens + 1), last)
@@ -0,0 +1,100 @@
+import threading
+import time
+from flask import current_app, g
+from sqlalchemy import event, select
+from extensions import db
+from models.statut import Statut
+from models.categorie import Categorie
+from models.type import Type
+from models.table_version import TableVersion
+
+# Durée de vie par défaut (secondes) des tables chargées
+DEFAULT_TTL = 300
+# Groupe de table_versions incrémenté à chaque écriture ORM d'une table de référence
+# (utils/change_tracking.py) : les écritures des autres processus videront ce cache
+VERSION = 'references'
+
+class ReferenceCache:
+    """Cache mémoire versionné des tables de référence (statuts, catégories, types).
+
+    Chaque table est chargée en une requête au premier accès puis servie depuis la
+    mémoire ; toute écriture ORM sur l'une d'elles vide le cache et incrémente `version`.
+    Une fois par requête (ou tâche), le compteur 'references' de table_versions est relu :
+    s'il a changé, un autre processus a écrit et le cache est vidé.
+    """
+
+    def __init__(self, *models):
+        self.models = models
+        self.version = 0
+        self.version_base = None
+        self._tables = {}
+        self._lock = threading.Lock()
+        for model in models:
+            for evenement in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, evenement, self._on_write)
+
+    def _on_write(self, mapper, connection, target):
+        self.invalidate(type(target))
+
+    def invalidate(self, model=None):
+        with self._lock:
+            if model is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(model, None)
+            self.version += 1
+
+    def _a_jour(self):
+        if g.get('references_a_jour'):
+            return
+        g.references_a_jour = True
+        # connexion plutôt que session : pas d'autoflush (appelé aussi pendant un flush)
+        version_base = db.session.connection().execute(
+            select(TableVersion.version).where(TableVersion.nom == VERSION)).scalar() or 0
+        with self._lock:
+            if version_base != self.version_base:
+                if self.version_base is not None:
+                    self._tables.clear()
+                    self.version += 1
+                self.version_base = version_base
+
+    def _table(self, model):
+        self._a_jour()
+        table = self._tables.get(model)
+        if table is not None and table['expire_le'] > time.monotonic():
+            return table
+        with self._lock:
+            version = self.version
+        lignes = db.session.execute(select(model.id, model.nom).order_by(model.id)).all()
+        ttl = current_app.config.get('REFERENCE_CACHE_TTL', DEFAULT_TTL)
+        table = {
+            'par_id': {id: {'id': id, 'nom': nom} for id, nom in lignes},
+            'par_nom': {nom: id for id, nom in lignes},
+            'expire_le': time.monotonic() + ttl
+        }
+        with self._lock:
+            # une écriture survenue pendant le chargement rend ce résultat obsolète
+            if version == self.version:
+                self._tables[model] = table
+        return table
+
+    def get(self, model, id):
+        """{'id': ..., 'nom': ...} pour cet id, ou None."""
+        if id is None:
+            return None
+        return self._table(model)['par_id'].get(id)
+
+    def nom(self, model, id):
+        reference = self.get(model, id)
+        return reference['nom'] if reference else None
+
+    def id_for(self, model, nom):
+        return self._table(model)['par_nom'].get(nom)
+
+    def ids(self, model):
+        return set(self._table(model)['par_id'])
+
+    def all(self, model):
+        return list(self._table(model)['par_id'].values())
+
+reference_cache = ReferenceCache(Statut, Categorie, Type)
@@ -0,0 +1,61 @@
+import importlib.util
+from flask import current_app, request, Response
+
+# Représentations des listes de tickets négociées par Accept :
+# - application/json : liste d'objets (par défaut) ;
+# - application/vnd.smartticket.colonnes+json : une liste de valeurs par champ, chaque objet
+#   imbriqué (statut, catégorie, type, technicien) n'étant envoyé qu'une fois ;
+# - application/msgpack : la forme en colonnes encodée en MessagePack (paquet `msgpack`).
+MIME_JSON = 'application/json'
+MIME_COLONNES = 'application/vnd.smartticket.colonnes+json'
+MIME_MSGPACK = 'application/msgpack'
+
+def msgpack_disponible():
+    return importlib.util.find_spec('msgpack') is not None
+
+def negotiated_mimetype():
+    offres = [MIME_JSON, MIME_COLONNES] + ([MIME_MSGPACK] if msgpack_disponible() else [])
+    return request.accept_mimetypes.best_match(offres, default=MIME_JSON)
+
+def en_colonnes(lignes):
+    """Liste de dicts aux mêmes clés vers {'nb', 'colonnes': {champ: [valeurs]},
+    'references': {champ: [objets]}} : un objet imbriqué est remplacé par son indice dans
+    references[champ] (une liste d'objets par une liste d'indices)."""
+    champs = list(lignes[0]) if lignes else []
+    colonnes = {champ: [] for champ in champs}
+    references = {}
+    indices = {}
+
+    def indice(champ, objet):
+        cle = (champ, tuple(objet.items()))
+        position = indices.get(cle)
+        if position is None:
+            objets = references.setdefault(champ, [])
+            position = indices[cle] = len(objets)
+            objets.append(objet)
+        return position
+
+    for ligne in lignes:
+        for champ in champs:
+            valeur = ligne[champ]
+            if isinstance(valeur, dict):
+                valeur = indice(champ, valeur)
+            elif isinstance(valeur, list):
+                valeur = [indice(champ, objet) for objet in valeur]
+            colonnes[champ].append(valeur)
+    return {'nb': len(lignes), 'colonnes': colonnes, 'references': references}
+
+def tickets_response(payload, cle=None):
+    """Réponse pour une liste de tickets sérialisés (`payload`, ou payload[cle] pour une
+    enveloppe) dans la représentation négociée."""
+    mimetype = negotiated_mimetype()
+    if mimetype != MIME_JSON:
+        payload = en_colonnes(payload) if cle is None else dict(payload, **{cle: en_colonnes(payload[cle])})
+    if mimetype == MIME_MSGPACK:
+        import msgpack
+        response = Response(msgpack.packb(payload), mimetype=MIME_MSGPACK)
+    else:
+        response = current_app.json.response(payload)
+        response.mimetype = mimetype
+    response.vary.add('Accept')
+    return response
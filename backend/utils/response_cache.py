@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, make_response
+from flask_jwt_extended import get_jwt
+from utils.change_tracking import current_versions
+from utils.compression import compress_response, negotiated_encoding
+from utils.representation import negotiated_mimetype
+
+# En-têtes de la réponse conservés avec le corps
+_EN_TETES = ('Content-Type', 'X-Next-Cursor', 'Content-Encoding', 'Vary')
+
+class LRUCache:
+    """Cache en mémoire du processus, borné en octets (éviction des moins récents)."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.taille = 0
+        self._entrees = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cle):
+        with self._lock:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                self._entrees.move_to_end(cle)
+            return entree
+
+    def set(self, cle, entree):
+        taille = len(entree['corps'])
+        if taille > self.max_bytes:
+            return
+        with self._lock:
+            ancienne = self._entrees.pop(cle, None)
+            if ancienne is not None:
+                self.taille -= len(ancienne['corps'])
+            self._entrees[cle] = entree
+            self.taille += taille
+            while self.taille > self.max_bytes:
+                _, evincee = self._entrees.popitem(last=False)
+                self.taille -= len(evincee['corps'])
+
+class FileCache:
+    """Cache partagé entre les workers d'une même machine : un fichier par entrée dans
+    `directory`, les plus anciens supprimés quand la taille totale dépasse `max_bytes`.
+    Fichier : en-têtes en JSON sur la première ligne, puis le corps brut (pas de pickle,
+    le répertoire étant accessible à d'autres processus)."""
+
+    # nombre d'écritures entre deux contrôles de la taille du répertoire
+    VERIFICATION_TAILLE = 50
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._ecritures = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _chemin(self, cle):
+        return os.path.join(self.directory, cle + '.cache')
+
+    def get(self, cle):
+        try:
+            with open(self._chemin(cle), 'rb') as f:
+                en_tetes = json.loads(f.readline())
+                corps = f.read()
+        except (OSError, ValueError):
+            return None
+        if not isinstance(en_tetes, dict) or not all(
+                isinstance(n, str) and isinstance(v, str) for n, v in en_tetes.items()):
+            return None
+        return {'corps': corps, 'en_tetes': en_tetes}
+
+    def set(self, cle, entree):
+        if len(entree['corps']) > self.max_bytes:
+            return
+        fd, temporaire = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json.dumps(entree['en_tetes']).encode('utf-8') + b'\n')
+            f.write(entree['corps'])
+        os.replace(temporaire, self._chemin(cle))
+        self._ecritures += 1
+        if self._ecritures % self.VERIFICATION_TAILLE == 0:
+            self._evincer()
+
+    def _evincer(self):
+        fichiers = []
+        for nom in os.listdir(self.directory):
+            if nom.endswith('.cache'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, nom))
+                except OSError:
+                    continue
+                fichiers.append((stat.st_mtime, stat.st_size, nom))
+        total = sum(taille for _, taille, _ in fichiers)
+        for _, taille, nom in sorted(fichiers):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, nom))
+            except OSError:
+                pass
+            total -= taille
+
+def cache_key(path, args, claims, versions, variante=None):
+    """Clé de cache (et, tronquée à 32 caractères, ETag) d'une réponse GET ; `variante`
+    distingue les représentations et encodages négociés d'une même ressource."""
+    return hashlib.sha256(repr((
+        path,
+        sorted(args),
+        claims.get('role'),
+        claims.get('user_id'),
+        sorted(versions.items())
+    ) + ((variante,) if variante is not None else ())).encode('utf-8')).hexdigest()
+
+def cached_response(*tables):
+    """Met en cache la réponse d'une route GET et gère If-None-Match.
+
+    L'ETag dérive de la route, de la query string, du rôle et du user_id du JWT et des
+    compteurs de modifications de `tables` : tant qu'aucune écriture n'a eu lieu, la
+    réponse est servie depuis le cache (ou 304) sans être recalculée. Chaque représentation
+    (Accept) et encodage (Accept-Encoding) a son entrée, conservée déjà compressée.
+    À placer sous role_required.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('response_cache')
+            if cache is None:
+                return fn(*args, **kwargs)
+            encodage = negotiated_encoding()
+            cle = cache_key(request.path, request.args.items(multi=True), get_jwt(),
+                            current_versions(*tables), (negotiated_mimetype(), encodage))
+            etag = cle[:32]
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+            else:
+                entree = cache.get(cle)
+                if entree is not None:
+                    response = make_response(entree['corps'], 200, entree['en_tetes'])
+                else:
+                    response = make_response(fn(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    compress_response(response, encodage)
+                    cache.set(cle, {
+                        'corps': response.get_data(),
+                        'en_tetes': {h: response.headers[h] for h in _EN_TETES if h in response.headers}
+                    })
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+def init_response_cache(app):
+    if not app.config.get('RESPONSE_CACHE_ENABLED'):
+        return
+    max_bytes = app.config['RESPONSE_CACHE_MAX_BYTES']
+    if app.config.get('RESPONSE_CACHE_DIR'):
+        app.extensions['response_cache'] = FileCache(app.config['RESPONSE_CACHE_DIR'], max_bytes)
+    else:
+        app.extensions['response_cache'] = LRUCache(max_bytes)
@@ -0,0 +1,32 @@
+import re
+from sqlalchemy import select, table, column, literal_column, text, or_, literal
+from sqlalchemy.dialects.mysql import match
+from models.ticket import Ticket
+
+# Poids de bm25 pour (titre, description, demandeur) : le titre compte le plus
+_POIDS_BM25 = (10.0, 1.0, 3.0)
+_MOT = re.compile(r'\w+', re.UNICODE)
+
+tickets_fts = table('tickets_fts', column('rowid'))
+
+def termes(q):
+    """Mots de la recherche, sans opérateurs ni ponctuation."""
+    return _MOT.findall(q or '')
+
+def search_select(dialect, mots, colonnes):
+    """SELECT des `colonnes` de Ticket plus une colonne `score` (plus grand = plus pertinent),
+    restreint aux tickets contenant tous les mots, chacun pouvant être un préfixe."""
+    if dialect == 'sqlite':
+        requete = ' '.join('"%s"*' % mot for mot in mots)
+        bm25 = literal_column('bm25(tickets_fts, %s)' % ', '.join(str(p) for p in _POIDS_BM25))
+        return select(*colonnes, (-bm25).label('score')) \
+            .join(tickets_fts, literal_column('tickets_fts.rowid') == Ticket.id) \
+            .where(text('tickets_fts MATCH :requete').bindparams(requete=requete))
+    if dialect == 'mysql':
+        requete = ' '.join('+%s*' % mot for mot in mots)
+        score = match(Ticket.titre, Ticket.description, Ticket.demandeur, against=requete).in_boolean_mode()
+        return select(*colonnes, score.label('score')).where(score > 0)
+    # Autres bases : recherche par LIKE, sans classement
+    conditions = [or_(Ticket.titre.ilike(f'%{mot}%'), Ticket.description.ilike(f'%{mot}%'),
+                      Ticket.demandeur.ilike(f'%{mot}%')) for mot in mots]
+    return select(*colonnes, literal(0).label('score')).where(*conditions)
@@ -0,0 +1,39 @@
+import bisect
+import math
+from sqlalchemy import case
+
+# Histogramme à classes géométriques (raison 1.25, de 1 minute à ~2 ans) utilisé comme
+# résumé fusionnable des durées de résolution : fusionner deux périodes revient à
+# additionner les effectifs classe par classe, et les quantiles estimés ont une erreur
+# relative d'environ 12 %.
+RAISON = 1.25
+BORNES = [round(60 * RAISON ** i) for i in range(64)]
+NB_CLASSES = len(BORNES) + 1
+
+def classe(duree_s: float) -> int:
+    """Indice de la classe contenant une durée en secondes."""
+    return bisect.bisect_right(BORNES, duree_s)
+
+def classe_sql(duree):
+    """Même calcul que `classe` sous forme d'expression SQL."""
+    return case(*[(duree < borne, i) for i, borne in enumerate(BORNES)], else_=len(BORNES))
+
+def _representant(indice: int) -> float:
+    if indice == 0:
+        return BORNES[0] / 2
+    if indice >= len(BORNES):
+        return float(BORNES[-1])
+    return math.sqrt(BORNES[indice - 1] * BORNES[indice])
+
+def quantile(histogramme: dict, q: float):
+    """Estime le quantile q (0..1) d'un histogramme {classe: effectif} ; None s'il est vide."""
+    total = sum(histogramme.values())
+    if not total:
+        return None
+    rang = max(1, math.ceil(q * total))
+    cumul = 0
+    for indice in sorted(histogramme):
+        cumul += histogramme[indice]
+        if cumul >= rang:
+            return _representant(indice)
+    return _representant(max(histogramme))
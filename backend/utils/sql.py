@@ -0,0 +1,67 @@
+from sqlalchemy import literal_column
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import Float, String
+
+class duree_secondes(FunctionElement):
+    """Durée en secondes entre deux colonnes DateTime : duree_secondes(debut, fin)."""
+    type = Float()
+    name = 'duree_secondes'
+    inherit_cache = True
+
+@compiles(duree_secondes)
+def _duree_secondes_default(element, compiler, **kw):
+    debut, fin = list(element.clauses)
+    return 'EXTRACT(EPOCH FROM (%s - %s))' % (compiler.process(fin, **kw), compiler.process(debut, **kw))
+
+@compiles(duree_secondes, 'sqlite')
+def _duree_secondes_sqlite(element, compiler, **kw):
+    debut, fin = list(element.clauses)
+    return 'ROUND((julianday(%s) - julianday(%s)) * 86400.0, 3)' % (compiler.process(fin, **kw), compiler.process(debut, **kw))
+
+@compiles(duree_secondes, 'mysql')
+def _duree_secondes_mysql(element, compiler, **kw):
+    debut, fin = list(element.clauses)
+    return 'TIMESTAMPDIFF(SECOND, %s, %s)' % (compiler.process(debut, **kw), compiler.process(fin, **kw))
+
+PERIODES = ('jour', 'semaine', 'mois')
+
+class debut_periode(FunctionElement):
+    """Début ('YYYY-MM-DD') de la période contenant une date : debut_periode(colonne, 'jour'|'semaine'|'mois').
+    Les semaines commencent le lundi."""
+    type = String()
+    name = 'debut_periode'
+    inherit_cache = False
+
+    def __init__(self, expr, periode):
+        if periode not in PERIODES:
+            raise ValueError(f'Période invalide : {periode}')
+        self.periode = periode
+        super().__init__(expr)
+
+
+def _format(compiler, fmt, **kw):
+    return compiler.process(literal_column(f"'{fmt}'"), **kw)
+
+@compiles(debut_periode)
+def _debut_periode_default(element, compiler, **kw):
+    date = compiler.process(list(element.clauses)[0], **kw)
+    unite = {'jour': 'day', 'semaine': 'week', 'mois': 'month'}[element.periode]
+    return "to_char(date_trunc('%s', %s), 'YYYY-MM-DD')" % (unite, date)
+
+@compiles(debut_periode, 'sqlite')
+def _debut_periode_sqlite(element, compiler, **kw):
+    date = compiler.process(list(element.clauses)[0], **kw)
+    if element.periode == 'semaine':
+        return "date(%s, 'weekday 0', '-6 days')" % date
+    if element.periode == 'mois':
+        return 'strftime(%s, %s)' % (_format(compiler, '%Y-%m-01', **kw), date)
+    return 'date(%s)' % date
+
+@compiles(debut_periode, 'mysql')
+def _debut_periode_mysql(element, compiler, **kw):
+    date = compiler.process(list(element.clauses)[0], **kw)
+    if element.periode == 'semaine':
+        date = 'DATE_SUB(%s, INTERVAL WEEKDAY(%s) DAY)' % (date, date)
+    fmt = '%Y-%m-01' if element.periode == 'mois' else '%Y-%m-%d'
+    return 'DATE_FORMAT(%s, %s)' % (date, _format(compiler, fmt, **kw))
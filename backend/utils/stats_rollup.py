@@ -0,0 +1,191 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import event, func, inspect, insert, update, delete, select
+from extensions import db
+from models.ticket import Ticket
+from models.ticket_stats_daily import TicketStatsDaily
+from models.ticket_resolution_daily import TicketResolutionDaily
+from utils.sketch import classe, classe_sql
+from utils.sql import duree_secondes
+from utils.queries import sum_over_sources
+from utils.jobs import job_task
+
+# Colonnes de Ticket dont dépendent les tables d'agrégats
+DIMENSIONS = ('date_d_ouverture', 'statut_id', 'categorie_id', 'type_id', 'date_resolution')
+COMPTEURS = ('nb_tickets', 'nb_avec_resolution', 'duree_resolution_s')
+_CLE = ('jour', 'statut_id', 'categorie_id', 'type_id')
+COMPTEURS_RESOLUTION = ('nb_resolus', 'duree_resolution_s')
+_CLE_RESOLUTION = ('jour', 'categorie_id', 'type_id', 'classe')
+
+class Deltas:
+    """Variations à reporter dans ticket_stats_daily (par jour d'ouverture) et
+    ticket_resolution_daily (par jour de résolution)."""
+    def __init__(self):
+        self.ouvertures = defaultdict(lambda: [0, 0, 0.0])
+        self.resolutions = defaultdict(lambda: [0, 0.0])
+
+    def __bool__(self):
+        return bool(self.ouvertures or self.resolutions)
+
+def _as_datetime(value):
+    """datetime naïf UTC (valeur en chaîne ISO ou datetime, avec ou sans fuseau)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def contribution(values, deltas, signe=1):
+    """Ajoute (signe=1) ou retire (signe=-1) la contribution d'un ticket à `deltas`.
+    `values` associe chaque nom de DIMENSIONS à sa valeur."""
+    ouverture = _as_datetime(values['date_d_ouverture'])
+    if ouverture is None:
+        return
+    resolution = _as_datetime(values['date_resolution'])
+    cle = (ouverture.date(), values['statut_id'], values['categorie_id'], values['type_id'])
+    compteurs = deltas.ouvertures[cle]
+    compteurs[0] += signe
+    if resolution is not None:
+        duree = round((resolution - ouverture).total_seconds(), 3)
+        compteurs[1] += signe
+        compteurs[2] += signe * duree
+        cle = (resolution.date(), values['categorie_id'], values['type_id'], classe(duree))
+        compteurs = deltas.resolutions[cle]
+        compteurs[0] += signe
+        compteurs[1] += signe * duree
+
+def _valeurs_courantes(ticket):
+    return {attr: getattr(ticket, attr) for attr in DIMENSIONS}
+
+def _valeurs_precedentes(ticket):
+    state = inspect(ticket)
+    valeurs = {}
+    for attr in DIMENSIONS:
+        history = state.attrs[attr].history
+        valeurs[attr] = history.deleted[0] if history.deleted else getattr(ticket, attr)
+    return valeurs
+
+def _a_change(ticket):
+    state = inspect(ticket)
+    return any(state.attrs[attr].history.has_changes() for attr in DIMENSIONS)
+
+def _upsert(connection, table, cle, compteurs, rows):
+    """Ajoute les compteurs de `rows` aux lignes existantes (ou les insère)."""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(cle),
+            set_={c: table.c[c] + stmt.excluded[c] for c in compteurs}
+        )
+        connection.execute(stmt, rows)
+    elif dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as upsert
+        stmt = upsert(table)
+        stmt = stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in compteurs})
+        connection.execute(stmt, rows)
+    else:
+        for row in rows:
+            result = connection.execute(
+                update(table)
+                .where(*(table.c[c] == row[c] for c in cle))
+                .values({c: table.c[c] + row[c] for c in compteurs})
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(table).values(row))
+
+def _rows(deltas, cle, compteurs):
+    return [dict(zip(cle, k), **dict(zip(compteurs, v))) for k, v in deltas.items() if any(v)]
+
+def apply_deltas(connection, deltas):
+    """Reporte un objet Deltas dans les tables d'agrégats."""
+    rows = _rows(deltas.ouvertures, _CLE, COMPTEURS)
+    if rows:
+        _upsert(connection, TicketStatsDaily.__table__, _CLE, COMPTEURS, rows)
+    rows = _rows(deltas.resolutions, _CLE_RESOLUTION, COMPTEURS_RESOLUTION)
+    if rows:
+        _upsert(connection, TicketResolutionDaily.__table__, _CLE_RESOLUTION, COMPTEURS_RESOLUTION, rows)
+
+def _after_flush(session, flush_context):
+    deltas = Deltas()
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            contribution(_valeurs_courantes(obj), deltas)
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and _a_change(obj):
+            contribution(_valeurs_precedentes(obj), deltas, -1)
+            contribution(_valeurs_courantes(obj), deltas)
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            contribution(_valeurs_precedentes(obj), deltas, -1)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+def rollup_select():
+    """SELECT agrégé des tickets courants et archivés au format de ticket_stats_daily."""
+    def par_source(source):
+        modele = source[0]
+        jour = func.date(modele.date_d_ouverture)
+        return select(
+            jour,
+            modele.statut_id,
+            modele.categorie_id,
+            modele.type_id,
+            func.count(modele.id),
+            func.count(modele.date_resolution),
+            func.coalesce(func.sum(duree_secondes(modele.date_d_ouverture, modele.date_resolution)), 0)
+        ).group_by(jour, modele.statut_id, modele.categorie_id, modele.type_id)
+    return sum_over_sources(par_source, len(_CLE))
+
+def resolution_select():
+    """SELECT agrégé des tickets courants et archivés au format de ticket_resolution_daily."""
+    def par_source(source):
+        modele = source[0]
+        jour = func.date(modele.date_resolution)
+        duree = duree_secondes(modele.date_d_ouverture, modele.date_resolution)
+        classe_duree = classe_sql(duree)
+        return select(
+            jour,
+            modele.categorie_id,
+            modele.type_id,
+            classe_duree,
+            func.count(modele.id),
+            func.sum(duree)
+        ).where(modele.date_resolution.isnot(None)) \
+            .group_by(jour, modele.categorie_id, modele.type_id, classe_duree)
+    return sum_over_sources(par_source, len(_CLE_RESOLUTION))
+
+def rebuild_rollup():
+    """Reconstruit entièrement les tables d'agrégats depuis la table tickets."""
+    table = TicketStatsDaily.__table__
+    db.session.execute(delete(table))
+    db.session.execute(insert(table).from_select(list(_CLE) + list(COMPTEURS), rollup_select()))
+    table = TicketResolutionDaily.__table__
+    db.session.execute(delete(table))
+    db.session.execute(insert(table).from_select(
+        list(_CLE_RESOLUTION) + list(COMPTEURS_RESOLUTION), resolution_select()))
+    db.session.commit()
+
+def _valider_rebuild(params, claims):
+    if not current_app.config.get('STATS_ROLLUP_ENABLED'):
+        raise ValueError("Tables d'agrégats désactivées (STATS_ROLLUP_ENABLED)")
+    return {}
+
+# POST /jobs {"type": "rollup"} (admin)
+@job_task('rollup', max_tentatives=3, priorite=-5, valider=_valider_rebuild)
+def rebuild_rollup_job(job):
+    rebuild_rollup()
+
+def init_stats_rollup(app):
+    if not app.config.get('STATS_ROLLUP_ENABLED'):
+        return
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats_command():
+        """Reconstruit les tables ticket_stats_daily et ticket_resolution_daily."""
+        rebuild_rollup()
+        print("Tables d'agrégats reconstruites.")
@@ -0,0 +1,157 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import select, update, delete, insert
+from extensions import db
+from models.ticket import Ticket, technicien_ticket
+from models.user import User
+from models.statut import Statut
+from utils.reference_cache import reference_cache
+from utils.change_tracking import bump_versions, record_deletions
+from utils.stats_rollup import DIMENSIONS, Deltas, contribution, apply_deltas
+from utils.queries import parse_date
+from utils.workload import est_ouvert, contribution_charge, apply_charges
+
+# Opérations de POST /tickets/batch ; les deux dernières sont réservées aux admins
+ACTIONS = ('statut', 'resolution', 'techniciens', 'suppression')
+ACTIONS_ADMIN = ('techniciens', 'suppression')
+# Nombre maximal de tickets (toutes opérations confondues) par requête
+MAX_BATCH_TICKETS = 5000
+# Taille des lots d'ids dans les clauses IN (limite de paramètres SQLite)
+IN_BATCH_SIZE = 500
+
+def _lots(ids):
+    for debut in range(0, len(ids), IN_BATCH_SIZE):
+        yield ids[debut:debut + IN_BATCH_SIZE]
+
+def _ids(value, champ):
+    if not isinstance(value, list) or not all(isinstance(i, int) for i in value):
+        raise ValueError(f'{champ} doit être une liste d\'entiers')
+    return list(dict.fromkeys(value))
+
+def parse_operations(data, role):
+    """Valide le corps de POST /tickets/batch et renvoie [(action, ids, valeur), ...].
+    Lève ValueError si la requête est invalide, PermissionError si le rôle ne permet pas
+    une des actions. Rien n'est appliqué dans ces deux cas."""
+    operations = (data or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        raise ValueError('Liste operations manquante')
+    resultat, total = [], 0
+    for operation in operations:
+        action = operation.get('action') if isinstance(operation, dict) else None
+        if action not in ACTIONS:
+            raise ValueError(f'Action inconnue : {action}')
+        if action in ACTIONS_ADMIN and role != 'admin':
+            raise PermissionError(f'Action réservée aux admins : {action}')
+        ids = _ids(operation.get('ids'), 'ids')
+        total += len(ids)
+        valeur = None
+        if action == 'statut':
+            valeur = operation.get('statut_id')
+            if valeur not in reference_cache.ids(Statut):
+                raise ValueError(f'Statut inconnu : {valeur}')
+        elif action == 'resolution':
+            valeur = operation.get('date_resolution')
+            valeur = parse_date(valeur) if valeur is not None else None
+        elif action == 'techniciens':
+            valeur = _ids(operation.get('technicien_ids'), 'technicien_ids')
+            existants = set(db.session.execute(select(User.id).where(User.id.in_(valeur))).scalars())
+            inconnus = [i for i in valeur if i not in existants]
+            if inconnus:
+                raise ValueError('Utilisateurs inconnus : ' + ', '.join(map(str, inconnus)))
+        resultat.append((action, ids, valeur))
+    if total > MAX_BATCH_TICKETS:
+        raise ValueError(f'Au plus {MAX_BATCH_TICKETS} tickets par requête')
+    return resultat
+
+def _charger(connection, ids):
+    """({id: valeurs de DIMENSIONS}, {id: set des techniciens}) des tickets existants."""
+    tickets, techniciens = {}, {}
+    for lot in _lots(ids):
+        for ligne in connection.execute(
+                select(Ticket.id, *(getattr(Ticket, attr) for attr in DIMENSIONS))
+                .where(Ticket.id.in_(lot))).mappings():
+            tickets[ligne['id']] = {attr: ligne[attr] for attr in DIMENSIONS}
+            techniciens[ligne['id']] = set()
+        for ticket_id, technicien_id in connection.execute(
+                select(technicien_ticket.c.ticket_id, technicien_ticket.c.technicien_id)
+                .where(technicien_ticket.c.ticket_id.in_(lot))):
+            techniciens[ticket_id].add(technicien_id)
+    return tickets, techniciens
+
+def apply_batch(operations, claims, rollup=False):
+    """Applique les opérations validées par parse_operations dans la transaction courante,
+    dans l'ordre, par UPDATE/DELETE ... WHERE id IN et insertions groupées. Les tickets
+    inexistants, pour un technicien non assignés, ou (résolution) ouverts après la date de
+    résolution sont ignorés et reportés.
+    Renvoie (résultats par opération, événements à publier après le commit)."""
+    connection = db.session.connection()
+    table = Ticket.__table__
+    maintenant = datetime.utcnow()
+    deltas = Deltas()
+    charges = Counter()
+    resolu_id = reference_cache.id_for(Statut, 'Résolu')
+    seq = None
+    resultats, evenements = [], []
+    for action, ids, valeur in operations:
+        tickets, techniciens = _charger(connection, ids)
+        introuvables = [i for i in ids if i not in tickets]
+        interdits = []
+        appliques = [i for i in ids if i in tickets]
+        if claims.get('role') == 'technicien':
+            user_id = claims.get('user_id')
+            interdits = [i for i in appliques if user_id not in techniciens[i]]
+            appliques = [i for i in appliques if user_id in techniciens[i]]
+        invalides = []
+        if action == 'resolution' and valeur is not None:
+            # une résolution antérieure à l'ouverture donnerait une durée négative
+            invalides = [i for i in appliques if tickets[i]['date_d_ouverture'] > valeur]
+            appliques = [i for i in appliques if tickets[i]['date_d_ouverture'] <= valeur]
+        resultats.append({'action': action, 'appliques': appliques, 'introuvables': introuvables,
+                          'interdits': interdits, 'invalides': invalides})
+        if not appliques:
+            continue
+        ouverts = {i: est_ouvert(tickets[i]['statut_id'], tickets[i]['date_resolution'], resolu_id) for i in appliques}
+        if seq is None:
+            seq = bump_versions(connection, 'tickets')['tickets']
+
+        if action == 'suppression':
+            record_deletions(connection, appliques, seq)
+            for lot in _lots(appliques):
+                connection.execute(delete(technicien_ticket).where(technicien_ticket.c.ticket_id.in_(lot)))
+                connection.execute(delete(table).where(table.c.id.in_(lot)))
+            for i in appliques:
+                contribution(tickets[i], deltas, -1)
+                contribution_charge(techniciens[i], ouverts[i], charges, -1)
+                evenements.append(('ticket_supprime', i, sorted(techniciens[i])))
+            continue
+
+        valeurs = {'date_modification': maintenant, 'seq_modification': seq}
+        if action == 'statut':
+            valeurs['statut_id'] = valeur
+        elif action == 'resolution':
+            valeurs['date_resolution'] = valeur
+        for lot in _lots(appliques):
+            connection.execute(update(table).where(table.c.id.in_(lot)).values(valeurs))
+            if action == 'techniciens':
+                connection.execute(delete(technicien_ticket).where(technicien_ticket.c.ticket_id.in_(lot)))
+        if action == 'techniciens':
+            if valeur:
+                connection.execute(insert(technicien_ticket), [
+                    {'ticket_id': i, 'technicien_id': t} for i in appliques for t in valeur])
+            for i in appliques:
+                contribution_charge(techniciens[i], ouverts[i], charges, -1)
+                contribution_charge(valeur, ouverts[i], charges)
+                # une réaffectation est aussi notifiée aux techniciens retirés du ticket
+                evenements.append(('ticket_assigne', i, sorted(techniciens[i] | set(valeur))))
+            continue
+        for i in appliques:
+            apres = dict(tickets[i], **{k: v for k, v in valeurs.items() if k in DIMENSIONS})
+            contribution(tickets[i], deltas, -1)
+            contribution(apres, deltas)
+            contribution_charge(techniciens[i], ouverts[i], charges, -1)
+            contribution_charge(techniciens[i], est_ouvert(apres['statut_id'], apres['date_resolution'], resolu_id), charges)
+            evenements.append(('ticket_modifie', i, sorted(techniciens[i])))
+    if rollup and deltas:
+        apply_deltas(connection, deltas)
+    apply_charges(connection, charges)
+    return resultats, [(type, i, t, seq) for type, i, t in evenements]
@@ -0,0 +1,242 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import select, func
+from werkzeug.datastructures import MultiDict
+from extensions import db
+from models.user import User
+from models.categorie import Categorie
+from models.statut import Statut
+from models.type import Type
+from utils.reference_cache import reference_cache
+from utils.queries import COURANTS, scope_tickets, apply_ticket_filters, union_tickets
+from utils.jobs import job_task
+
+# Nombre de lignes lues par aller-retour avec le curseur serveur (et par row group Parquet)
+BATCH_SIZE = 2000
+
+COLONNES = (
+    'id', 'titre', 'description', 'date_d_ouverture', 'demandeur', 'categorie_id', 'statut_id',
+    'type_id', 'departement_demandeur', 'date_resolution', 'date_modification',
+    'categorie', 'statut', 'type', 'techniciens'
+)
+
+FORMATS = {
+    'csv': ('text/csv', 'tickets.csv'),
+    'ndjson': ('application/x-ndjson', 'tickets.ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'tickets.parquet'),
+}
+
+def export_select(source=COURANTS):
+    """Tickets de `source` (courants ou archivés) avec les noms des techniciens agrégés en
+    une seule requête ; les noms de catégorie, statut et type sont ajoutés depuis le cache
+    de référence."""
+    modele, association = source
+    noms_techniciens = select(
+        association.c.ticket_id,
+        func.aggregate_strings(User.nom, ', ').label('techniciens')
+    ).join(User, User.id == association.c.technicien_id) \
+        .group_by(association.c.ticket_id).subquery()
+    return select(
+        modele.id, modele.titre, modele.description, modele.date_d_ouverture, modele.demandeur,
+        modele.categorie_id, modele.statut_id, modele.type_id, modele.departement_demandeur,
+        modele.date_resolution, modele.date_modification,
+        noms_techniciens.c.techniciens
+    ).outerjoin(noms_techniciens, noms_techniciens.c.ticket_id == modele.id)
+
+def export_statement(claims, args):
+    """Export des tickets courants et archivés visibles pour `claims`, filtrés par `args`
+    (query string de GET /tickets), par id. Lève ValueError si un filtre est invalide."""
+    union = union_tickets(lambda source: apply_ticket_filters(
+        scope_tickets(export_select(source), claims, source), args, source=source))
+    return union.order_by(union.selected_columns.id)
+
+def noms_references():
+    """{modèle: {id: nom}} des références, figé pour la durée d'un export."""
+    return {model: {r['id']: r['nom'] for r in reference_cache.all(model)}
+            for model in (Categorie, Statut, Type)}
+
+def _avec_references(lignes, noms):
+    categories, statuts, types = noms[Categorie], noms[Statut], noms[Type]
+    return [
+        tuple(ligne[:-1]) + (
+            categories.get(ligne.categorie_id),
+            statuts.get(ligne.statut_id),
+            types.get(ligne.type_id),
+            ligne.techniciens
+        )
+        for ligne in lignes
+    ]
+
+def _partitions(stmt):
+    noms = noms_references()
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=BATCH_SIZE))
+    try:
+        for lignes in result.partitions():
+            yield _avec_references(lignes, noms)
+    finally:
+        result.close()
+
+# Encodeurs : debut(), lot(lignes) et fin() renvoient les octets à émettre, ce qui permet
+# de les alimenter depuis un résultat synchrone (export_tickets) ou asynchrone (asgi.py)
+
+class _Csv:
+    def __init__(self):
+        self.tampon = io.StringIO()
+        self.writer = csv.writer(self.tampon)
+
+    def _vider(self):
+        data = self.tampon.getvalue().encode('utf-8')
+        self.tampon.seek(0)
+        self.tampon.truncate()
+        return data
+
+    def debut(self):
+        self.writer.writerow(COLONNES)
+        return self._vider()
+
+    def lot(self, lignes):
+        self.writer.writerows(lignes)
+        return self._vider()
+
+    def fin(self):
+        return b''
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Type non sérialisable : {type(value).__name__}')
+
+class _Ndjson:
+    def debut(self):
+        return b''
+
+    def lot(self, lignes):
+        return ''.join(
+            json.dumps(dict(zip(COLONNES, ligne)), default=_json_default, ensure_ascii=False) + '\n'
+            for ligne in lignes
+        ).encode('utf-8')
+
+    def fin(self):
+        return b''
+
+class _Flux:
+    """Sortie minimale pour pyarrow : accumule les octets écrits jusqu'au prochain vidage."""
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def vider(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+class _Parquet:
+    def __init__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.schema = pa.schema([
+            ('id', pa.int64()), ('titre', pa.string()), ('description', pa.string()),
+            ('date_d_ouverture', pa.timestamp('us')), ('demandeur', pa.string()),
+            ('categorie_id', pa.int64()), ('statut_id', pa.int64()), ('type_id', pa.int64()),
+            ('departement_demandeur', pa.string()), ('date_resolution', pa.timestamp('us')),
+            ('date_modification', pa.timestamp('us')), ('categorie', pa.string()),
+            ('statut', pa.string()), ('type', pa.string()), ('techniciens', pa.string())
+        ])
+        self.flux = _Flux()
+        self.writer = pq.ParquetWriter(self.flux, self.schema)
+
+    def debut(self):
+        return self.flux.vider()
+
+    def lot(self, lignes):
+        colonnes = list(zip(*lignes))
+        # un row group par lot lu
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(valeurs, type=champ.type) for valeurs, champ in zip(colonnes, self.schema)],
+            schema=self.schema
+        ))
+        return self.flux.vider()
+
+    def fin(self):
+        self.writer.close()
+        return self.flux.vider()
+
+ENCODEURS = {'csv': _Csv, 'ndjson': _Ndjson, 'parquet': _Parquet}
+
+def parquet_disponible():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def export_tickets(stmt, format):
+    """Générateur des octets de l'export au format demandé."""
+    encodeur = ENCODEURS[format]()
+    yield encodeur.debut()
+    for lignes in _partitions(stmt):
+        yield encodeur.lot(lignes)
+    yield encodeur.fin()
+
+async def export_tickets_async(connection, stmt, format, noms):
+    """Équivalent asynchrone d'export_tickets sur une AsyncConnection ; `noms` provient
+    de noms_references(), appelé au préalable dans un contexte d'application."""
+    encodeur = ENCODEURS[format]()
+    yield encodeur.debut()
+    result = await connection.stream(stmt.execution_options(yield_per=BATCH_SIZE))
+    try:
+        async for lignes in result.partitions():
+            yield encodeur.lot(_avec_references(lignes, noms))
+    finally:
+        await result.close()
+    yield encodeur.fin()
+
+def _valider_export(params, claims):
+    format = params.get('format', 'csv')
+    if format not in FORMATS:
+        raise ValueError(f'Format invalide : {format}')
+    if format == 'parquet' and not parquet_disponible():
+        raise ValueError("L'export Parquet nécessite pyarrow")
+    filtres = params.get('filtres') or {}
+    if not isinstance(filtres, dict):
+        raise ValueError('filtres doit être un objet')
+    # mêmes valeurs que dans la query string de GET /export
+    filtres = {cle: [str(v) for v in (valeurs if isinstance(valeurs, list) else [valeurs])]
+               for cle, valeurs in filtres.items()}
+    export_statement(claims, MultiDict(filtres))
+    return {'format': format, 'filtres': filtres, 'claims': claims}
+
+# POST /jobs {"type": "export", "params": {"format": ..., "filtres": {...}}} : export écrit
+# dans le fichier résultat de la tâche
+@job_task('export', roles=('admin', 'user', 'technicien'), max_tentatives=3, valider=_valider_export)
+def export_job(job, format, filtres, claims):
+    stmt = export_statement(claims, MultiDict(filtres))
+    mimetype, nom_fichier = FORMATS[format]
+    encodeur = ENCODEURS[format]()
+    job.progression = {'lignes': 0}
+    with job.fichier_resultat(nom_fichier, mimetype) as sortie:
+        sortie.write(encodeur.debut())
+        for lignes in _partitions(stmt):
+            sortie.write(encodeur.lot(lignes))
+            job.progression['lignes'] += len(lignes)
+            job.checkpoint()
+        sortie.write(encodeur.fin())
@@ -0,0 +1,131 @@
+import os
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert
+from extensions import db
+from models.ticket import Ticket
+from models.categorie import Categorie
+from models.statut import Statut
+from models.type import Type
+from utils.reference_cache import reference_cache
+from utils.change_tracking import bump_versions
+from utils.stats_rollup import Deltas, contribution, apply_deltas
+from utils.events import publish_event
+from utils.jobs import job_task
+
+CHUNK_SIZE = 5000
+COLONNES_REQUISES = ('titre', 'date_d_ouverture', 'demandeur', 'categorie_id', 'statut_id', 'type_id')
+
+# pandas (~0,5 s et plusieurs dizaines de Mo par processus) n'est importé qu'au premier import
+# de CSV : le module reste chargé au démarrage pour enregistrer la tâche 'import'
+
+def _dates(serie, erreurs, colonne, obligatoire):
+    """Conversion vectorisée ; les valeurs au format non reconnu sont reprises une à une.
+    Comme parse_date, une date avec fuseau est convertie en UTC et stockée sans fuseau."""
+    import pandas as pd
+    dates = pd.to_datetime(serie, errors='coerce', utc=True)
+    a_reprendre = dates.isna() & serie.notna()
+    if a_reprendre.any():
+        dates[a_reprendre] = pd.to_datetime(serie[a_reprendre], errors='coerce', format='mixed', utc=True)
+    dates = dates.dt.tz_localize(None)
+    invalides = dates.isna() & (serie.notna() | obligatoire)
+    for index in serie.index[invalides]:
+        erreurs.setdefault(index, []).append(f'{colonne} invalide')
+    return [d.to_pydatetime() if pd.notna(d) else None for d in dates]
+
+def _ids(serie, erreurs, colonne, connus):
+    import pandas as pd
+    nombres = pd.to_numeric(serie, errors='coerce')
+    valides = nombres.notna() & (nombres % 1 == 0)
+    ids = nombres.where(valides).astype('Int64')
+    valides &= ids.isin(connus).fillna(False).astype(bool)
+    for index in serie.index[~valides]:
+        erreurs.setdefault(index, []).append(f'{colonne} invalide')
+    return ids.astype(object).where(valides, None).tolist()
+
+def _textes(serie, obligatoire=False, erreurs=None, colonne=None):
+    if obligatoire:
+        vides = serie.isna() | (serie.str.strip() == '')
+        for index in serie.index[vides]:
+            erreurs.setdefault(index, []).append(f'{colonne} manquant')
+    return serie.astype(object).where(serie.notna(), None).tolist()
+
+def _preparer_chunk(df, references):
+    """Valide et convertit un bloc du CSV ; renvoie (lignes valides, {index: erreurs})."""
+    import pandas as pd
+    erreurs = {}
+    vide = pd.Series([None] * len(df), index=df.index, dtype=object)
+    colonnes = {
+        'titre': _textes(df['titre'], True, erreurs, 'titre'),
+        'description': _textes(df.get('description', vide)),
+        'date_d_ouverture': _dates(df['date_d_ouverture'], erreurs, 'date_d_ouverture', True),
+        'demandeur': _textes(df['demandeur'], True, erreurs, 'demandeur'),
+        'categorie_id': _ids(df['categorie_id'], erreurs, 'categorie_id', references['categorie_id']),
+        'statut_id': _ids(df['statut_id'], erreurs, 'statut_id', references['statut_id']),
+        'type_id': _ids(df['type_id'], erreurs, 'type_id', references['type_id']),
+        'departement_demandeur': _textes(df.get('departement_demandeur', vide)),
+        'date_resolution': _dates(df.get('date_resolution', vide), erreurs, 'date_resolution', False),
+    }
+    maintenant = datetime.utcnow()
+    lignes = []
+    for position, index in enumerate(df.index):
+        if index in erreurs:
+            continue
+        ligne = {nom: valeurs[position] for nom, valeurs in colonnes.items()}
+        ligne['date_modification'] = maintenant
+        lignes.append(ligne)
+    return lignes, erreurs
+
+def _references():
+    return {
+        'categorie_id': reference_cache.ids(Categorie),
+        'statut_id': reference_cache.ids(Statut),
+        'type_id': reference_cache.ids(Type),
+    }
+
+def _importer_chunk(job, df, references, rollup):
+    manquantes = [c for c in COLONNES_REQUISES if c not in df.columns]
+    if manquantes:
+        raise ValueError('Colonnes manquantes : ' + ', '.join(manquantes))
+    lignes, erreurs = _preparer_chunk(df, references)
+    for index, messages in sorted(erreurs.items()):
+        # +2 : ligne d'en-tête et numérotation à partir de 1
+        job.ajouter_erreur({'ligne': int(index) + 2, 'erreurs': messages})
+    if lignes:
+        seq = bump_versions(db.session.connection(), 'tickets')['tickets']
+        for ligne in lignes:
+            ligne['seq_modification'] = seq
+        db.session.execute(insert(Ticket.__table__), lignes)
+        if rollup:
+            deltas = Deltas()
+            for ligne in lignes:
+                contribution(ligne, deltas)
+            apply_deltas(db.session.connection(), deltas)
+        db.session.commit()
+        publish_event('tickets_importes', nb=len(lignes), seq=seq)
+    job.progression['lignes_lues'] += len(df)
+    job.progression['lignes_importees'] += len(lignes)
+
+def _supprimer_fichier(params):
+    if os.path.exists(params['chemin']):
+        os.remove(params['chemin'])
+
+# non rejouable : les blocs déjà importés sont commités
+@job_task('import', priorite=5, nettoyer=_supprimer_fichier)
+def import_tickets(job, chemin, chunk_size=CHUNK_SIZE):
+    """Importe un CSV de tickets par blocs de `chunk_size` lignes, un commit par bloc.
+    Les lignes invalides sont ignorées et reportées dans job.erreurs."""
+    import pandas as pd
+    job.progression = {'lignes_lues': 0, 'lignes_importees': 0}
+    try:
+        references = _references()
+        rollup = current_app.config.get('STATS_ROLLUP_ENABLED')
+        try:
+            for df in pd.read_csv(chemin, chunksize=chunk_size, dtype=str):
+                _importer_chunk(job, df, references, rollup)
+                job.checkpoint()
+        except Exception:
+            db.session.rollback()
+            raise
+    finally:
+        _supprimer_fichier({'chemin': chemin})
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_header
+from flask_jwt_extended.config import config
+from flask_jwt_extended.exceptions import RevokedTokenError
+from extensions import jwt
+from utils.events import get_hub, publish_event
+
+# Vérification des JWT sans refaire la signature HMAC ni le décodage à chaque requête d'un
+# même client : cache des jetons déjà vérifiés par processus, et révocation côté serveur
+# des jetons d'un utilisateur (suppression, changement de rôle) sans accès à la base.
+
+# Événement relayé entre processus par le broker de utils/events.py
+REVOCATION = 'jetons_revoques'
+
+class TokenCache:
+    """LRU borné en nombre d'entrées : empreinte SHA-256 du jeton -> (en-tête, claims,
+    emplacement), valable jusqu'à l'expiration (`exp`) du jeton."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entrees = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, empreinte):
+        with self._lock:
+            entree = self._entrees.get(empreinte)
+            if entree is None:
+                return None
+            if entree[1].get('exp', float('inf')) <= time.time():
+                del self._entrees[empreinte]
+                return None
+            self._entrees.move_to_end(empreinte)
+            return entree
+
+    def set(self, empreinte, entree):
+        with self._lock:
+            self._entrees[empreinte] = entree
+            self._entrees.move_to_end(empreinte)
+            while len(self._entrees) > self.maxsize:
+                self._entrees.popitem(last=False)
+
+class Revocations:
+    """user_id -> instant de révocation (secondes entières, comme `iat`) : les jetons émis
+    avant cette seconde sont refusés, ceux de la même seconde acceptés (reconnexion juste
+    après un changement de rôle). Une entrée est oubliée quand tous les jetons qu'elle vise
+    ont expiré."""
+
+    def __init__(self, duree):
+        self.duree = duree
+        self.pid = None
+        self._revoques = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, user_id, instant):
+        with self._lock:
+            self._revoques[user_id] = max(instant, self._revoques.get(user_id, 0))
+            if self.duree:
+                limite = time.time() - self.duree
+                for cle in [cle for cle, revoque in self._revoques.items() if revoque < limite]:
+                    del self._revoques[cle]
+
+    def est_revoque(self, claims):
+        instant = self._revoques.get(claims.get('user_id'))
+        return instant is not None and claims.get('iat', 0) < instant
+
+def _revocations():
+    """Révocations de l'application, abonnées au hub d'événements du processus courant
+    (une fois par processus, y compris après un fork)."""
+    revocations = current_app.extensions.get('jwt_revocations')
+    if revocations is not None and revocations.pid != os.getpid():
+        get_hub().listen(REVOCATION, lambda event: revocations.revoke(event['user_id'], event['instant']))
+        revocations.pid = os.getpid()
+    return revocations
+
+def revoke_user(user_id):
+    """Révoque les jetons déjà émis pour `user_id` ; à appeler après le commit. Relayé aux
+    autres processus par le broker d'événements (EVENTS_BROKER_DIR), sans lui au seul
+    processus courant."""
+    if _revocations() is not None:
+        publish_event(REVOCATION, user_id=user_id, instant=int(time.time()))
+
+def _jeton(locations):
+    """(jeton, emplacement) lu comme le ferait flask_jwt_extended, ou None si le jeton est
+    absent ou dans une forme qui demande la vérification complète (messages d'erreur)."""
+    if isinstance(locations, str):
+        locations = [locations]
+    for location in locations or config.token_location:
+        if location == 'headers':
+            valeur = request.headers.get(config.header_name)
+            if valeur is None:
+                continue
+            if not config.header_type:
+                return valeur, location
+            parties = valeur.split()
+            if len(parties) == 2 and parties[0] == config.header_type:
+                return parties[1], location
+            return None
+        if location == 'query_string':
+            valeur = request.args.get(config.query_string_name)
+            if valeur is None:
+                continue
+            prefixe = config.query_string_value_prefix
+            return (valeur[len(prefixe):], location) if valeur.startswith(prefixe) else None
+        # cookies, json : pas de raccourci
+        return None
+    return None
+
+def verify_jwt(locations=None):
+    """verify_jwt_in_request() servi depuis le cache quand le jeton a déjà été vérifié ;
+    renvoie les claims (get_jwt() reste utilisable)."""
+    cache = current_app.extensions.get('jwt_cache')
+    revocations = _revocations()
+    trouve = _jeton(locations) if cache is not None and request.method not in config.exempt_methods else None
+    if trouve is None:
+        verify_jwt_in_request(locations=locations)
+        return get_jwt()
+    jeton, location = trouve
+    empreinte = hashlib.sha256(jeton.encode('utf-8')).digest()
+    entree = cache.get(empreinte)
+    if entree is None:
+        verify_jwt_in_request(locations=locations)
+        cache.set(empreinte, (get_jwt_header(), get_jwt(), location))
+        return get_jwt()
+    en_tete, claims, location = entree
+    if revocations is not None and revocations.est_revoque(claims):
+        raise RevokedTokenError(en_tete, claims)
+    # mêmes attributs que verify_jwt_in_request (pas de user_lookup_loader dans l'application)
+    g._jwt_extended_jwt_user = None
+    g._jwt_extended_jwt_header = en_tete
+    g._jwt_extended_jwt = claims
+    g._jwt_extended_jwt_location = location
+    return claims
+
+def init_token_cache(app):
+    taille = app.config.get('JWT_CACHE_SIZE', 0)
+    if taille > 0:
+        app.extensions['jwt_cache'] = TokenCache(taille)
+    if app.config.get('JWT_REVOCATION_ENABLED'):
+        expiration = app.config.get('JWT_ACCESS_TOKEN_EXPIRES')
+        duree = expiration.total_seconds() if hasattr(expiration, 'total_seconds') else expiration
+        app.extensions['jwt_revocations'] = Revocations(duree or None)
+
+        # vérification complète (jeton absent du cache) : même contrôle
+        @jwt.token_in_blocklist_loader
+        def _jeton_revoque(jwt_header, jwt_payload):
+            revocations = _revocations()
+            return revocations is not None and revocations.est_revoque(jwt_payload)
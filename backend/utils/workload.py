@@ -0,0 +1,230 @@
+import heapq
+import threading
+from collections import Counter
+from flask import current_app
+from sqlalchemy import event, select, delete, insert, func
+from extensions import db
+from models.ticket import Ticket, technicien_ticket
+from models.user import User, technicien_categorie
+from models.statut import Statut
+from models.technicien_charge import TechnicienCharge
+from utils.change_tracking import bump_versions, current_versions
+from utils.reference_cache import reference_cache
+from utils.stats_rollup import _upsert
+from utils.jobs import job_task
+
+# Charge des techniciens (tickets ouverts affectés) pour l'affectation automatique, sans
+# agrégat sur technicien_ticket : la table technicien_charges est mise à jour dans la
+# transaction de chaque écriture, et chaque processus en garde un index en mémoire (tas par
+# catégorie) tenu à jour après ses propres commits et rechargé quand le compteur 'charges'
+# de table_versions montre une écriture d'un autre processus.
+
+# Groupe de table_versions incrémenté à chaque variation de technicien_charges
+VERSION = 'charges'
+# Attributs de Ticket dont dépend la charge
+ATTRIBUTS = ('statut_id', 'date_resolution', 'techniciens')
+
+def est_ouvert(statut_id, date_resolution, resolu_id):
+    return date_resolution is None and statut_id != resolu_id
+
+def apply_charges(connection, deltas):
+    """Reporte {technicien_id: variation} dans technicien_charges (transaction de
+    `connection`) ; l'index en mémoire suit au commit de db.session."""
+    lignes = [{'technicien_id': t, 'tickets_ouverts': d} for t, d in deltas.items() if d]
+    if not lignes:
+        return
+    _upsert(connection, TechnicienCharge.__table__, ('technicien_id',), ('tickets_ouverts',), lignes)
+    version = bump_versions(connection, VERSION)[VERSION]
+    db.session.info.setdefault('charges', []).append((dict(deltas), version))
+
+def contribution_charge(techniciens, ouvert, deltas, signe=1):
+    if ouvert:
+        for technicien_id in techniciens:
+            deltas[technicien_id] += signe
+
+class ChargeIndex:
+    """Charges en mémoire : technicien -> tickets ouverts, et un tas (charge, id) par
+    catégorie de compétence (None : tous les techniciens). Les entrées d'un tas dont la
+    charge n'est plus à jour sont écartées à la lecture."""
+
+    def __init__(self):
+        self.version = None
+        self.charges = {}
+        self.noms = {}
+        self.categories = {}
+        self._tas = {}
+        self._lock = threading.Lock()
+
+    def _charger(self, versions):
+        lignes = db.session.execute(
+            select(User.id, User.nom, func.coalesce(TechnicienCharge.tickets_ouverts, 0))
+            .outerjoin(TechnicienCharge, TechnicienCharge.technicien_id == User.id)
+            .where(User.role == 'technicien')).all()
+        self.charges = {id: charge for id, _, charge in lignes}
+        self.noms = {id: nom for id, nom, _ in lignes}
+        self.categories = {id: set() for id in self.charges}
+        for technicien_id, categorie_id in db.session.execute(
+                select(technicien_categorie.c.technicien_id, technicien_categorie.c.categorie_id)):
+            if technicien_id in self.categories:
+                self.categories[technicien_id].add(categorie_id)
+        self._reconstruire()
+        self.version = versions
+
+    def _reconstruire(self):
+        self._tas = {None: [(charge, id) for id, charge in self.charges.items()]}
+        for id, categories in self.categories.items():
+            for categorie_id in categories:
+                self._tas.setdefault(categorie_id, []).append((self.charges[id], id))
+        for tas in self._tas.values():
+            heapq.heapify(tas)
+
+    def _a_jour(self):
+        """Recharge l'index si un autre processus a modifié les charges ou les techniciens
+        (une lecture de table_versions)."""
+        versions = current_versions(VERSION, 'users')
+        if versions != self.version:
+            self._charger(versions)
+
+    def appliquer(self, deltas, version):
+        """Variations commitées à la version `version` du compteur 'charges'."""
+        with self._lock:
+            if self.version is None or self.version[VERSION] != version - 1:
+                self.version = None
+                return
+            for technicien_id, delta in deltas.items():
+                if technicien_id not in self.charges:
+                    continue
+                self.charges[technicien_id] += delta
+                entree = (self.charges[technicien_id], technicien_id)
+                heapq.heappush(self._tas[None], entree)
+                for categorie_id in self.categories[technicien_id]:
+                    heapq.heappush(self._tas[categorie_id], entree)
+            self.version = dict(self.version, **{VERSION: version})
+            # entrées périmées : reconstruction quand elles dominent
+            if len(self._tas[None]) > 4 * len(self.charges) + 64:
+                self._reconstruire()
+
+    def moins_charge(self, categorie_id=None):
+        """Technicien ayant le moins de tickets ouverts parmi ceux compétents pour
+        `categorie_id` (tous si aucun ne l'est), le plus petit id à égalité ; None sans
+        technicien."""
+        with self._lock:
+            self._a_jour()
+            tas = self._tas.get(categorie_id) or self._tas[None]
+            while tas and tas[0][0] != self.charges[tas[0][1]]:
+                heapq.heappop(tas)
+            return tas[0][1] if tas else None
+
+    def etat(self, categorie_id=None):
+        with self._lock:
+            self._a_jour()
+            ids = [id for id in self.charges if categorie_id is None or categorie_id in self.categories[id]]
+            return [{
+                'technicien_id': id,
+                'nom': self.noms[id],
+                'tickets_ouverts': self.charges[id],
+                'categorie_ids': sorted(self.categories[id])
+            } for id in sorted(ids, key=lambda id: (self.charges[id], id))]
+
+def _index():
+    return current_app.extensions['charges_techniciens']
+
+def least_loaded(categorie_id=None):
+    return _index().moins_charge(categorie_id)
+
+def technician_loads(categorie_id=None):
+    """Techniciens du moins au plus chargé, avec leurs compétences."""
+    return _index().etat(categorie_id)
+
+def _avant(connection, ids):
+    """{ticket_id: (techniciens, ouvert)} en base, avant le flush."""
+    resolu_id = reference_cache.id_for(Statut, 'Résolu')
+    etats = {}
+    for id, statut_id, date_resolution in connection.execute(
+            select(Ticket.id, Ticket.statut_id, Ticket.date_resolution).where(Ticket.id.in_(ids))):
+        etats[id] = (set(), est_ouvert(statut_id, date_resolution, resolu_id))
+    for ticket_id, technicien_id in connection.execute(
+            select(technicien_ticket.c.ticket_id, technicien_ticket.c.technicien_id)
+            .where(technicien_ticket.c.ticket_id.in_(ids))):
+        etats[ticket_id][0].add(technicien_id)
+    return etats
+
+def _apres(ticket, resolu_id):
+    return {t.id for t in ticket.techniciens}, est_ouvert(ticket.statut_id, ticket.date_resolution, resolu_id)
+
+def _a_change(ticket):
+    etat = db.inspect(ticket)
+    return any(etat.attrs[attr].history.has_changes() for attr in ATTRIBUTS)
+
+def _before_flush(session, flush_context, instances):
+    nouveaux = [obj for obj in session.new if isinstance(obj, Ticket)]
+    modifies = [obj for obj in session.dirty if isinstance(obj, Ticket) and _a_change(obj)]
+    supprimes = [obj for obj in session.deleted if isinstance(obj, Ticket)]
+    techniciens_supprimes = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if not (nouveaux or modifies or supprimes or techniciens_supprimes):
+        return
+    connection = session.connection()
+    resolu_id = reference_cache.id_for(Statut, 'Résolu')
+    deltas = Counter()
+    with session.no_autoflush:
+        avant = _avant(connection, [t.id for t in modifies + supprimes]) if modifies or supprimes else {}
+        for ticket in nouveaux:
+            contribution_charge(*_apres(ticket, resolu_id), deltas)
+        for ticket in modifies:
+            contribution_charge(*avant[ticket.id], deltas, -1)
+            contribution_charge(*_apres(ticket, resolu_id), deltas)
+    for ticket in supprimes:
+        contribution_charge(*avant[ticket.id], deltas, -1)
+    for technicien_id in techniciens_supprimes:
+        deltas.pop(technicien_id, None)
+    apply_charges(connection, deltas)
+    if techniciens_supprimes:
+        connection.execute(delete(TechnicienCharge.__table__)
+                           .where(TechnicienCharge.technicien_id.in_(techniciens_supprimes)))
+
+def _after_commit(session):
+    variations = session.info.pop('charges', None)
+    if variations and current_app:
+        index = current_app.extensions.get('charges_techniciens')
+        for deltas, version in variations:
+            index.appliquer(deltas, version)
+
+def _after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('charges', None)
+
+def charges_select():
+    """Tickets ouverts par technicien, recalculés depuis technicien_ticket."""
+    resolus = select(Statut.id).where(Statut.nom == 'Résolu')
+    return select(technicien_ticket.c.technicien_id, func.count()) \
+        .join(Ticket, Ticket.id == technicien_ticket.c.ticket_id) \
+        .where(Ticket.date_resolution.is_(None), Ticket.statut_id.not_in(resolus)) \
+        .group_by(technicien_ticket.c.technicien_id)
+
+def rebuild_charges():
+    """Reconstruit technicien_charges depuis les tickets (après une écriture hors
+    application)."""
+    connection = db.session.connection()
+    table = TechnicienCharge.__table__
+    connection.execute(delete(table))
+    connection.execute(insert(table).from_select(['technicien_id', 'tickets_ouverts'], charges_select()))
+    bump_versions(connection, VERSION)
+    db.session.commit()
+
+# POST /jobs {"type": "charges"} (admin)
+@job_task('charges', max_tentatives=3, priorite=-5, valider=lambda params, claims: {})
+def rebuild_charges_job(job):
+    rebuild_charges()
+
+def init_workload(app):
+    app.extensions['charges_techniciens'] = ChargeIndex()
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_soft_rollback', _after_rollback)
+
+    @app.cli.command('rebuild-charges')
+    def rebuild_charges_command():
+        """Reconstruit la table technicien_charges."""
+        rebuild_charges()
+        print('Charges des techniciens reconstruites.')
@@ -0,0 +1,38 @@
+"""Worker des tâches de fond (table jobs, voir utils/jobs.py).
+
+    python worker.py [--nb 4]
+
+L'application lance elle-même JOBS_WORKERS workers par processus qui sert l'API. Avec
+plusieurs processus (gunicorn, uvicorn --workers), mettre JOBS_WORKERS=0 et lancer les
+workers séparément avec ce script. La configuration est lue dans l'environnement, comme
+pour l'application.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+def main():
+    parser = argparse.ArgumentParser(description='Exécute les tâches de fond de SmartTicket.')
+    parser.add_argument('--nb', type=int, default=1, help='nombre de processus workers')
+    args = parser.parse_args()
+    if args.nb > 1:
+        processus = [subprocess.Popen([sys.executable, os.path.abspath(__file__)]) for _ in range(args.nb)]
+        try:
+            for p in processus:
+                p.wait()
+        except KeyboardInterrupt:
+            pass
+        return
+    # ce processus n'en lance pas d'autres
+    os.environ['JOBS_WORKERS'] = '0'
+    from app import create_app
+    from utils.jobs import work
+    app = create_app()
+    try:
+        work(app, parent_pid=int(os.environ.get('JOBS_PARENT_PID', 0)) or None)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()